@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+benchmark_import.py - Benchmark the importers against an in-memory Cosmos DB
+
+Replays the captured divisionRosters.json / schedules.json responses through
+import_division() and import_schedule(), with memory_cosmos.InMemoryCosmosClient
+standing in for Cosmos DB. Divisions are scaled up by copying every team (with new
+team IDs, team numbers and member numbers) and every scheduled match. For each scale
+it runs four scenarios:
+
+  rosters (cold)   - empty database
+  rosters (warm)   - same rosters again, nothing changed
+  rosters (sync)   - --sync run after a weekly skill-level refresh
+  schedule (cold)  - teams imported, no matches yet
+  schedule (warm)  - same schedule again, nothing changed
+
+and reports wall time, Cosmos DB round trips by operation and simulated RU. With
+--index-cache the importers look documents up through a fresh index_cache.IndexCache
+per scale.
+
+Usage:
+    python benchmark_import.py
+    python benchmark_import.py --scale 1 4 16 --latency-ms 5 --physical-partitions 4
+    python benchmark_import.py --json benchmark.json
+    python benchmark_import.py --index-cache
+"""
+
+import argparse
+import contextlib
+import copy
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+from graphql_client import ReplayClient, capture_file_name, use_client
+from import_division import division_rosters_operation, import_division
+from import_schedule import division_schedule_operation, import_schedule
+from memory_cosmos import InMemoryCosmosClient
+
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ROSTERS_FILE = os.path.join(SCRIPT_DIR, "divisionRosters.json")
+DEFAULT_SCHEDULE_FILE = os.path.join(SCRIPT_DIR, "schedules.json")
+DEFAULT_SCALES = [1, 4, 16]
+
+# Added to team, roster entry and member IDs of each copy so copies never collide
+COPY_ID_OFFSET = 100_000_000
+
+# Share of rostered players whose skill level changes before the sync scenario
+SKILL_REFRESH_EVERY = 4
+
+
+def load_captured_division(path: str) -> Dict:
+    """
+    Load the division from a captured GraphQL response file.
+
+    Args:
+        path: Path to a captured response (list with one {"data": {"division": ...}})
+
+    Returns:
+        Division data dictionary
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    entry = data[0] if isinstance(data, list) else data
+    return entry["data"]["division"]
+
+
+def _copy_team_ref(team: Optional[Dict], copy_index: int) -> Optional[Dict]:
+    """Copy a team (or a match's home/away team) with IDs shifted for copy_index."""
+    if not team:
+        return team
+    scaled = copy.deepcopy(team)
+    scaled["id"] = team["id"] + copy_index * COPY_ID_OFFSET
+    if team.get("number"):
+        scaled["number"] = f"{team['number']}{copy_index:03d}"
+    for roster_entry in scaled.get("roster") or []:
+        roster_entry["id"] = roster_entry["id"] + copy_index * COPY_ID_OFFSET
+        roster_entry["memberNumber"] = str(int(roster_entry["memberNumber"]) + copy_index * COPY_ID_OFFSET)
+    return scaled
+
+
+def scale_division(division_data: Dict, factor: int) -> Dict:
+    """
+    Make a larger division by copying every team and scheduled match.
+
+    Args:
+        division_data: Division from a divisionRosters or divisionSchedule response
+        factor: Number of copies (1 returns an unchanged copy)
+
+    Returns:
+        Scaled division data dictionary
+    """
+    scaled = copy.deepcopy(division_data)
+    real_teams = [team for team in division_data.get("teams", []) if not team.get("isBye")]
+
+    for copy_index in range(1, factor):
+        scaled["teams"].extend(_copy_team_ref(team, copy_index) for team in real_teams)
+
+    for scaled_week, week in zip(scaled.get("schedule", []), division_data.get("schedule", [])):
+        for copy_index in range(1, factor):
+            for match in week.get("matches") or []:
+                scaled_match = copy.deepcopy(match)
+                scaled_match["id"] = match["id"] + copy_index * COPY_ID_OFFSET
+                scaled_match["home"] = _copy_team_ref(match.get("home"), copy_index)
+                scaled_match["away"] = _copy_team_ref(match.get("away"), copy_index)
+                scaled_week["matches"].append(scaled_match)
+
+    return scaled
+
+
+def refresh_skill_levels(division_data: Dict, every: int = SKILL_REFRESH_EVERY) -> Dict:
+    """
+    Copy a division with every `every`-th rostered player moved up one skill level.
+
+    Args:
+        division_data: Division from a divisionRosters response
+        every: Interval between changed roster entries
+
+    Returns:
+        Division data dictionary with updated skill levels
+    """
+    refreshed = copy.deepcopy(division_data)
+    roster_entries = [
+        roster_entry
+        for team in refreshed.get("teams", []) if not team.get("isBye")
+        for roster_entry in team.get("roster") or []
+    ]
+    for roster_entry in roster_entries[::every]:
+        roster_entry["skillLevel"] = (roster_entry.get("skillLevel") or 0) + 1
+    return refreshed
+
+
+def write_capture(directory: str, operation: Dict, division_data: Dict):
+    """
+    Write division data as a captured response that ReplayClient can serve.
+
+    Args:
+        directory: Capture directory
+        operation: GraphQL operation the response answers
+        division_data: Division data dictionary
+    """
+    path = os.path.join(directory, capture_file_name(operation))
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([{"data": {"division": division_data}}], f)
+
+
+def run_scenario(
+    name: str,
+    scale: int,
+    import_func: Callable,
+    kwargs: Dict,
+    cosmos_client: InMemoryCosmosClient,
+    verbose: bool = False
+) -> Dict:
+    """
+    Run one import against the in-memory database and collect its measurements.
+
+    Args:
+        name: Scenario name
+        scale: Scale factor the data was built with
+        import_func: import_division or import_schedule
+        kwargs: Arguments for import_func
+        cosmos_client: In-memory Cosmos client shared by the scenarios of one scale
+        verbose: Show the importer's output
+
+    Returns:
+        Result dict with wall time, round trips, operation counts and RU
+    """
+    cosmos_client.reset_counters()
+    output = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stdout if verbose else output):
+        import_func(cosmos_client=cosmos_client, **kwargs)
+    wall_seconds = time.perf_counter() - start
+
+    containers = cosmos_client.counters()
+    operations: Dict[str, int] = {}
+    for counters in containers.values():
+        for operation, count in counters["operations"].items():
+            operations[operation] = operations.get(operation, 0) + count
+
+    return {
+        "scenario": name,
+        "scale": scale,
+        "wall_seconds": round(wall_seconds, 4),
+        "round_trips": sum(c["round_trips"] for c in containers.values()),
+        "request_charge": round(sum(c["request_charge"] for c in containers.values()), 2),
+        "operations": operations,
+        "containers": containers,
+    }
+
+
+def run_benchmark(
+    rosters: Dict,
+    schedule: Dict,
+    scales: List[int],
+    latency_ms: float = 0.0,
+    physical_partitions: int = 1,
+    verbose: bool = False,
+    index_cache: bool = False
+) -> List[Dict]:
+    """
+    Run every scenario at every scale.
+
+    Args:
+        rosters: Division data from a divisionRosters response
+        schedule: Division data from a divisionSchedule response
+        scales: Scale factors to run
+        latency_ms: Simulated latency per Cosmos round trip
+        physical_partitions: Partitions a cross-partition query fans out to
+        verbose: Show the importers' output
+        index_cache: Run the importers with a local index cache
+
+    Returns:
+        List of result dicts from run_scenario()
+    """
+    results = []
+    division_id = rosters["id"]
+    common = {
+        "division_id": division_id,
+        "refresh_token": None,
+        "cosmos_uri": None,
+        "cosmos_key": None,
+        "cosmos_db": "benchmark",
+    }
+
+    for scale in scales:
+        with tempfile.TemporaryDirectory(prefix="sidespins-bench-") as capture_dir:
+            scaled_rosters = scale_division(rosters, scale)
+            rosters_operation = division_rosters_operation(division_id)
+            write_capture(capture_dir, rosters_operation, scaled_rosters)
+            write_capture(capture_dir, division_schedule_operation(division_id), scale_division(schedule, scale))
+            use_client(ReplayClient(from_dir=capture_dir))
+
+            cosmos_client = InMemoryCosmosClient(latency_ms=latency_ms, physical_partitions=physical_partitions)
+            cache_args = {"index_cache": os.path.join(capture_dir, "index.sqlite")} if index_cache else {}
+            roster_args = dict(common, division_name="Benchmark Division", **cache_args)
+            schedule_args = dict(common, session_id="session_benchmark", **cache_args)
+
+            # (name, import function, arguments, rosters to serve from then on)
+            for name, import_func, kwargs, serve_rosters in [
+                ("rosters (cold)", import_division, roster_args, None),
+                ("rosters (warm)", import_division, roster_args, None),
+                ("rosters (sync)", import_division, dict(roster_args, sync=True), refresh_skill_levels(scaled_rosters)),
+                ("schedule (cold)", import_schedule, schedule_args, None),
+                ("schedule (warm)", import_schedule, schedule_args, None),
+            ]:
+                if serve_rosters:
+                    write_capture(capture_dir, rosters_operation, serve_rosters)
+                result = run_scenario(name, scale, import_func, kwargs, cosmos_client, verbose)
+                results.append(result)
+                print_result(result)
+
+    return results
+
+
+def print_result(result: Dict):
+    """Print one scenario result as a table row."""
+    operations = ", ".join(f"{op} {count}" for op, count in sorted(result["operations"].items()))
+    print(
+        f"{result['scenario']:<17} {result['scale']:>5} {result['wall_seconds']:>9.3f} "
+        f"{result['round_trips']:>11} {result['request_charge']:>10.1f}  {operations}"
+    )
+
+
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the importers against an in-memory Cosmos DB"
+    )
+    parser.add_argument(
+        "--scale",
+        type=int,
+        nargs="+",
+        default=DEFAULT_SCALES,
+        help=f"Division scale factors to run (default: {' '.join(map(str, DEFAULT_SCALES))})"
+    )
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=0.0,
+        help="Simulated latency per Cosmos DB round trip in milliseconds (default: 0)"
+    )
+    parser.add_argument(
+        "--physical-partitions",
+        type=int,
+        default=1,
+        help="Partitions a cross-partition query fans out to (default: 1)"
+    )
+    parser.add_argument(
+        "--rosters-file",
+        default=DEFAULT_ROSTERS_FILE,
+        help="Captured divisionRosters response (default: divisionRosters.json)"
+    )
+    parser.add_argument(
+        "--schedule-file",
+        default=DEFAULT_SCHEDULE_FILE,
+        help="Captured divisionSchedule response (default: schedules.json)"
+    )
+    parser.add_argument(
+        "--json",
+        help="Write the results to this JSON file"
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Show the importers' output"
+    )
+    parser.add_argument(
+        "--index-cache",
+        action="store_true",
+        help="Run the importers with a local SQLite index cache"
+    )
+
+    args = parser.parse_args()
+
+    try:
+        rosters = load_captured_division(args.rosters_file)
+        schedule = load_captured_division(args.schedule_file)
+        if rosters["id"] != schedule["id"]:
+            raise Exception(f"Rosters (division {rosters['id']}) and schedule (division {schedule['id']}) do not match")
+
+        print(f"Benchmarking division {rosters['id']} at scales {args.scale} "
+              f"({args.latency_ms:g} ms latency, {args.physical_partitions} physical partitions)")
+        print(f"\n{'Scenario':<17} {'Scale':>5} {'Wall (s)':>9} {'Round trips':>11} {'RU':>10}  Operations")
+        print(f"{'-'*80}")
+
+        results = run_benchmark(
+            rosters,
+            schedule,
+            args.scale,
+            latency_ms=args.latency_ms,
+            physical_partitions=args.physical_partitions,
+            verbose=args.verbose,
+            index_cache=args.index_cache
+        )
+
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump({
+                    "divisionId": rosters["id"],
+                    "latencyMs": args.latency_ms,
+                    "physicalPartitions": args.physical_partitions,
+                    "results": results
+                }, f, indent=2)
+            print(f"\n✓ Results written to {args.json}")
+    except Exception as e:
+        print(f"\n❌ Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+cosmos_batch.py - Transactional batch writes shared by the TeamsIngest importers
+
+Documents that share a partition key value are sent to Cosmos DB as transactional
+batches of up to 100 operations. A batch is atomic, so when one operation fails the
+batch is split around the failing operation and the remainder is retried. Every
+operation gets its own outcome, returned in the same order as the input.
+
+Operations use the SDK's batch tuple format, e.g. ("upsert", (document,)).
+
+Writes planned from a stored document carry that document's ETag (with_if_match).
+execute_with_conflict_retry() re-reads the documents whose precondition failed
+(412), lets the caller re-plan against the fresh copy and retries a bounded
+number of times.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from azure.cosmos import exceptions
+
+
+# Cosmos DB limit on operations per transactional batch
+MAX_BATCH_OPERATIONS = 100
+
+# Writes per operation before a repeatedly conflicting operation is reported as failed
+MAX_CONFLICT_ATTEMPTS = 3
+
+PRECONDITION_FAILED = 412
+
+
+def _failure(status_code: Optional[int], error: str) -> Dict[str, Any]:
+    return {"ok": False, "status_code": status_code, "error": error, "body": None}
+
+
+def _split_failed_batch(
+    error: Exception,
+    indexes: List[int],
+    results: List[Optional[Dict[str, Any]]]
+) -> List[List[int]]:
+    """
+    Record what can be attributed from a failed batch and return the parts to retry.
+
+    Args:
+        error: Exception raised by execute_item_batch
+        indexes: Positions in the operation list that made up the batch
+        results: Outcome list to fill in
+
+    Returns:
+        Lists of operation positions to retry as smaller batches
+    """
+    failed = getattr(error, "error_index", None)
+    if isinstance(error, exceptions.CosmosBatchOperationError) and failed is not None and 0 <= failed < len(indexes):
+        # Record the operation that sank the batch, then retry the rest without it
+        status_code = error.status_code
+        if error.operation_responses and failed < len(error.operation_responses):
+            status_code = error.operation_responses[failed].get("statusCode", status_code)
+        results[indexes[failed]] = _failure(status_code, str(error.http_error_message))
+        return [indexes[:failed], indexes[failed + 1:]]
+
+    # Failing operation unknown (or whole request rejected, e.g. 413) - halve the batch
+    if len(indexes) == 1:
+        message = getattr(error, "http_error_message", None) or getattr(error, "message", str(error))
+        results[indexes[0]] = _failure(error.status_code, str(message))
+        return []
+    mid = len(indexes) // 2
+    return [indexes[:mid], indexes[mid:]]
+
+
+def _execute_chunk(
+    container,
+    operations: Sequence[Tuple],
+    indexes: List[int],
+    partition_key: Any,
+    results: List[Optional[Dict[str, Any]]]
+):
+    """
+    Execute one batch and record per-operation outcomes, splitting on failure.
+
+    Args:
+        container: Cosmos DB container client
+        operations: All operations being written
+        indexes: Positions in `operations` that make up this batch
+        partition_key: Partition key value shared by the batch
+        results: Outcome list to fill in (same order as `operations`)
+    """
+    if not indexes:
+        return
+
+    try:
+        responses = container.execute_item_batch(
+            batch_operations=[operations[i] for i in indexes],
+            partition_key=partition_key
+        )
+    except (exceptions.CosmosBatchOperationError, exceptions.CosmosHttpResponseError) as e:
+        for retry in _split_failed_batch(e, indexes, results):
+            _execute_chunk(container, operations, retry, partition_key, results)
+        return
+
+    for i, response in zip(indexes, responses):
+        results[i] = {
+            "ok": True,
+            "status_code": response.get("statusCode"),
+            "error": None,
+            "body": response.get("resourceBody"),
+        }
+
+
+async def _execute_chunk_async(
+    container,
+    operations: Sequence[Tuple],
+    indexes: List[int],
+    partition_key: Any,
+    results: List[Optional[Dict[str, Any]]]
+):
+    """Async counterpart of _execute_chunk for azure.cosmos.aio containers."""
+    if not indexes:
+        return
+
+    try:
+        responses = await container.execute_item_batch(
+            batch_operations=[operations[i] for i in indexes],
+            partition_key=partition_key
+        )
+    except (exceptions.CosmosBatchOperationError, exceptions.CosmosHttpResponseError) as e:
+        for retry in _split_failed_batch(e, indexes, results):
+            await _execute_chunk_async(container, operations, retry, partition_key, results)
+        return
+
+    for i, response in zip(indexes, responses):
+        results[i] = {
+            "ok": True,
+            "status_code": response.get("statusCode"),
+            "error": None,
+            "body": response.get("resourceBody"),
+        }
+
+
+def execute_in_batches(
+    container,
+    operations: Sequence[Tuple],
+    partition_key: Any,
+    batch_size: int = MAX_BATCH_OPERATIONS
+) -> List[Dict[str, Any]]:
+    """
+    Write operations that share one partition key as transactional batches.
+
+    Args:
+        container: Cosmos DB container client
+        operations: Batch operation tuples, e.g. [("upsert", (doc,)), ...]
+        partition_key: Partition key value shared by every operation
+        batch_size: Maximum operations per batch (capped at 100)
+
+    Returns:
+        List of {ok, status_code, error, body} dicts, one per operation, in input
+        order. For upserts, status_code 201 means created and 200 means replaced;
+        body is the written document as returned by Cosmos DB (None on failure).
+    """
+    batch_size = max(1, min(batch_size, MAX_BATCH_OPERATIONS))
+    results: List[Optional[Dict[str, Any]]] = [None] * len(operations)
+
+    for start in range(0, len(operations), batch_size):
+        indexes = list(range(start, min(start + batch_size, len(operations))))
+        _execute_chunk(container, operations, indexes, partition_key, results)
+
+    return results
+
+
+async def execute_in_batches_async(
+    container,
+    operations: Sequence[Tuple],
+    partition_key: Any,
+    batch_size: int = MAX_BATCH_OPERATIONS
+) -> List[Dict[str, Any]]:
+    """
+    Async counterpart of execute_in_batches for azure.cosmos.aio containers.
+
+    Batches for one partition are sent sequentially; run several partitions
+    concurrently to parallelize.
+    """
+    batch_size = max(1, min(batch_size, MAX_BATCH_OPERATIONS))
+    results: List[Optional[Dict[str, Any]]] = [None] * len(operations)
+
+    for start in range(0, len(operations), batch_size):
+        indexes = list(range(start, min(start + batch_size, len(operations))))
+        await _execute_chunk_async(container, operations, indexes, partition_key, results)
+
+    return results
+
+
+def with_if_match(operation: Tuple, etag: Optional[str]) -> Tuple:
+    """
+    Add an If-Match precondition to a batch operation.
+
+    Args:
+        operation: Batch operation tuple
+        etag: ETag of the stored document the operation was planned from
+
+    Returns:
+        Operation tuple that fails with 412 if the document has changed since
+        (unchanged if there is no ETag)
+    """
+    if not etag:
+        return operation
+    options = dict(operation[2]) if len(operation) > 2 else {}
+    options["if_match_etag"] = etag
+    return (operation[0], operation[1], options)
+
+
+def _operation_id(operation: Tuple) -> str:
+    """ID of the document a batch operation writes."""
+    target = operation[1][0]
+    return target if isinstance(target, str) else target["id"]
+
+
+def _conflicts(results: List[Dict[str, Any]], indexes: List[int]) -> List[int]:
+    return [i for i in indexes if not results[i]["ok"] and results[i]["status_code"] == PRECONDITION_FAILED]
+
+
+def _apply_replans(
+    operations: Sequence[Tuple],
+    conflicted: List[int],
+    stored_docs: Dict[str, Dict],
+    replan: Callable[[int, Optional[Dict]], Optional[Tuple]],
+    results: List[Dict[str, Any]]
+) -> Tuple[List[int], List[Tuple]]:
+    """Re-plan conflicted operations; returns the (positions, operations) still to write."""
+    retry_indexes, retry_operations = [], []
+    for i in conflicted:
+        results[i]["conflicts"] += 1
+        operation = replan(i, stored_docs.get(_operation_id(operations[i])))
+        if operation is None:
+            results[i].update(ok=True, status_code=None, error=None, superseded=True)
+        else:
+            retry_indexes.append(i)
+            retry_operations.append(operation)
+    return retry_indexes, retry_operations
+
+
+def execute_with_conflict_retry(
+    container,
+    operations: Sequence[Tuple],
+    partition_key: Any,
+    replan: Callable[[int, Optional[Dict]], Optional[Tuple]],
+    batch_size: int = MAX_BATCH_OPERATIONS,
+    max_attempts: int = MAX_CONFLICT_ATTEMPTS
+) -> List[Dict[str, Any]]:
+    """
+    Write operations as transactional batches, re-planning those that conflict.
+
+    An operation that fails with 412 (its If-Match ETag or filter predicate no
+    longer holds) is retried against a fresh read of its document, for at most
+    max_attempts writes in total.
+
+    Args:
+        container: Cosmos DB container client
+        operations: Batch operation tuples sharing one partition key
+        partition_key: Partition key value shared by every operation
+        replan: replan(position, stored_doc) returns the operation rebuilt against
+            the re-read document (None if it was deleted), or None when no write
+            is needed any more
+        batch_size: Maximum operations per batch (capped at 100)
+        max_attempts: Writes per operation before a conflict is reported as failed
+
+    Returns:
+        Results as for execute_in_batches(), each with "conflicts" (412s retried)
+        and "superseded" (True if the re-read made the write unnecessary)
+    """
+    results = execute_in_batches(container, operations, partition_key, batch_size)
+    for result in results:
+        result.update(conflicts=0, superseded=False)
+
+    pending = list(range(len(operations)))
+    for _ in range(max_attempts - 1):
+        conflicted = _conflicts(results, pending)
+        if not conflicted:
+            break
+        ids = sorted({_operation_id(operations[i]) for i in conflicted})
+        stored_docs = {
+            doc["id"]: doc
+            for doc in container.read_items(items=[(doc_id, partition_key) for doc_id in ids])
+        }
+        pending, retry_operations = _apply_replans(operations, conflicted, stored_docs, replan, results)
+        retried = execute_in_batches(container, retry_operations, partition_key, batch_size)
+        for i, result in zip(pending, retried):
+            results[i].update(result)
+
+    return results
+
+
+async def execute_with_conflict_retry_async(
+    container,
+    operations: Sequence[Tuple],
+    partition_key: Any,
+    replan: Callable[[int, Optional[Dict]], Optional[Tuple]],
+    batch_size: int = MAX_BATCH_OPERATIONS,
+    max_attempts: int = MAX_CONFLICT_ATTEMPTS
+) -> List[Dict[str, Any]]:
+    """Async counterpart of execute_with_conflict_retry for azure.cosmos.aio containers."""
+    results = await execute_in_batches_async(container, operations, partition_key, batch_size)
+    for result in results:
+        result.update(conflicts=0, superseded=False)
+
+    pending = list(range(len(operations)))
+    for _ in range(max_attempts - 1):
+        conflicted = _conflicts(results, pending)
+        if not conflicted:
+            break
+        ids = sorted({_operation_id(operations[i]) for i in conflicted})
+        stored_docs = {
+            doc["id"]: doc
+            for doc in await container.read_items(items=[(doc_id, partition_key) for doc_id in ids])
+        }
+        pending, retry_operations = _apply_replans(operations, conflicted, stored_docs, replan, results)
+        retried = await execute_in_batches_async(container, retry_operations, partition_key, batch_size)
+        for i, result in zip(pending, retried):
+            results[i].update(result)
+
+    return results
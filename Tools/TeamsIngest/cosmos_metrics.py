@@ -0,0 +1,452 @@
+"""
+cosmos_metrics.py - Request charge and latency accounting for the TeamsIngest importers
+
+MeteredContainer wraps a Cosmos DB container client and records every call: the
+request charge from the x-ms-request-charge response header, and the wall-clock
+latency. Calls are grouped by phase and by container and summarized as totals with
+p50/p95/max latency, for the import summary and the --metrics-json report. The db
+tools record through CosmosMetrics.call() instead of wrapping their containers, so
+every tool reports the same phases.
+
+Phases:
+  - lookup: reads and queries
+  - create / update: writes. Batch operations are attributed from their status
+    codes (201 created, 200 replaced). Other writes count as creates unless they
+    are made inside `with phase("update"):`.
+"""
+
+import contextlib
+import contextvars
+import json
+import math
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from azure.cosmos import exceptions
+
+
+PHASES = ("lookup", "create", "update")
+REQUEST_CHARGE_HEADER = "x-ms-request-charge"
+
+# Latencies kept per phase and container for the p50/p95 figures
+LATENCY_SAMPLES = 10000
+
+# Phase for writes made in the current context (works across asyncio tasks)
+_current_phase: contextvars.ContextVar = contextvars.ContextVar("cosmos_phase", default=None)
+
+
+@contextlib.contextmanager
+def phase(name: str):
+    """
+    Attribute writes made inside the block to the given phase.
+
+    Args:
+        name: "create" or "update"
+    """
+    token = _current_phase.set(name)
+    try:
+        yield
+    finally:
+        _current_phase.reset(token)
+
+
+def request_charge(headers) -> float:
+    """
+    Read the request charge from Cosmos DB response headers.
+
+    Args:
+        headers: Response headers (may be None)
+
+    Returns:
+        Request units charged, or 0.0 if the header is missing
+    """
+    try:
+        return float((headers or {}).get(REQUEST_CHARGE_HEADER, 0) or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile.
+
+    Args:
+        values: Samples
+        pct: Percentile between 0 and 100
+
+    Returns:
+        Percentile value, or 0.0 for no samples
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _summarize(groups: List[Dict]) -> Dict:
+    latencies = [latency for g in groups for latency in g["latencies"]]
+    return {
+        "calls": sum(g["calls"] for g in groups),
+        "requestCharge": round(sum(g["requestCharge"] for g in groups), 2),
+        "latencyMs": {
+            "total": round(sum(g["latencyMs"] for g in groups), 1),
+            "p50": round(percentile(latencies, 50), 1),
+            "p95": round(percentile(latencies, 95), 1),
+            "max": round(max((g["max"] for g in groups), default=0.0), 1),
+        },
+    }
+
+
+def batch_charges(operations, responses, batch_charge: float = 0.0) -> Dict[str, float]:
+    """
+    Split a batch's request charge into phases by each operation's outcome.
+
+    Args:
+        operations: Batch operation tuples
+        responses: Per-operation results ({statusCode, requestCharge, ...})
+        batch_charge: Charge of the whole batch, used when operations report none
+
+    Returns:
+        Dict mapping phase to request units
+    """
+    names = []
+    for operation, response in zip(operations, responses or []):
+        if operation[0] == "read":
+            names.append("lookup")
+        else:
+            names.append("create" if response.get("statusCode") == 201 else "update")
+
+    per_operation = [float(response.get("requestCharge", 0) or 0) for response in responses or []]
+    if names and not any(per_operation):
+        per_operation = [batch_charge / len(names)] * len(names)
+
+    charges: Dict[str, float] = {}
+    for name, charge in zip(names, per_operation):
+        charges[name] = charges.get(name, 0.0) + charge
+    return charges
+
+
+class CosmosMetrics:
+    """
+    Collects request charge and latency for one import run.
+
+    Calls are added up per phase and container as they are recorded, so memory stays
+    flat on long runs. Latency percentiles come from a uniform sample of up to
+    LATENCY_SAMPLES calls per phase and container (exact below that). Safe to share
+    between threads.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.groups: Dict[Tuple[str, str], Dict] = {}
+        self.total_charge = 0.0
+
+    def record(self, phase_name: str, container: str, charge: float, latency_ms: float):
+        """
+        Record one Cosmos DB call.
+
+        Args:
+            phase_name: "lookup", "create" or "update"
+            container: Container name
+            charge: Request units charged
+            latency_ms: Wall-clock latency in milliseconds
+        """
+        with self.lock:
+            group = self.groups.setdefault((phase_name, container), {
+                "calls": 0, "requestCharge": 0.0, "latencyMs": 0.0, "max": 0.0, "latencies": []
+            })
+            group["calls"] += 1
+            group["requestCharge"] += charge
+            group["latencyMs"] += latency_ms
+            group["max"] = max(group["max"], latency_ms)
+            if len(group["latencies"]) < LATENCY_SAMPLES:
+                group["latencies"].append(latency_ms)
+            else:
+                # Reservoir sampling: every call is kept with the same probability
+                i = random.randrange(group["calls"])
+                if i < LATENCY_SAMPLES:
+                    group["latencies"][i] = latency_ms
+            self.total_charge += charge
+
+    def call(self, phase_name: str, container: str, fn: Callable, *args, **kwargs):
+        """
+        Make and record one call on an unwrapped container client.
+
+        For callers that choose the phase per call (the db tools). "upsert" records
+        a create or an update from the response status (201 or 200), and "batch"
+        (fn is execute_item_batch, args[0] its operations) is split by phase like
+        MeteredContainer.execute_item_batch().
+
+        Args:
+            phase_name: "lookup", "create", "update", "upsert" or "batch"
+            container: Container name
+            fn: Container method, or a function that passes response_hook on to one
+            *args: Positional arguments for fn
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            fn's result
+        """
+        recorder = _CallRecorder(
+            self, container, "create" if phase_name in ("upsert", "batch") else phase_name,
+            kwargs.pop("response_hook", None)
+        )
+        if phase_name == "upsert":
+            def raw_response_hook(pipeline_response):
+                status = pipeline_response.http_response.status_code
+                recorder.phase = {201: "create", 200: "update"}.get(status, recorder.phase)
+            kwargs["raw_response_hook"] = raw_response_hook
+        try:
+            result = fn(*args, response_hook=recorder, **kwargs)
+        except (exceptions.CosmosBatchOperationError, exceptions.CosmosHttpResponseError) as e:
+            recorder.failed(e)
+            recorder.done()
+            raise
+        if phase_name == "batch":
+            recorder.done_batch(args[0], result)
+        else:
+            recorder.done()
+        return result
+
+    def wrap(self, container) -> "MeteredContainer":
+        """Wrap a sync container client so its calls are recorded."""
+        return MeteredContainer(container, self)
+
+    def wrap_async(self, container) -> "AsyncMeteredContainer":
+        """Wrap an azure.cosmos.aio container client so its calls are recorded."""
+        return AsyncMeteredContainer(container, self)
+
+    def wrap_database(self, database) -> "MeteredDatabase":
+        """Wrap a database client so every container it hands out is metered."""
+        return MeteredDatabase(database, self.wrap)
+
+    def wrap_database_async(self, database) -> "MeteredDatabase":
+        """Wrap an azure.cosmos.aio database client so its containers are metered."""
+        return MeteredDatabase(database, self.wrap_async)
+
+    def summary(self) -> Dict:
+        """
+        Summarize the recorded calls.
+
+        Returns:
+            Dict with "total", "phases" and "containers" (per container, per phase)
+            entries of {calls, requestCharge, latencyMs: {total, p50, p95, max}}
+        """
+        with self.lock:
+            groups = {key: dict(group, latencies=list(group["latencies"])) for key, group in self.groups.items()}
+
+        containers: Dict[str, Dict] = {}
+        for name in sorted({container for _, container in groups}):
+            containers[name] = {
+                "total": _summarize([g for (_, container), g in groups.items() if container == name]),
+                "phases": {
+                    p: _summarize([groups[(p, name)]])
+                    for p in PHASES
+                    if (p, name) in groups
+                },
+            }
+
+        return {
+            "total": _summarize(list(groups.values())),
+            "phases": {p: _summarize([g for (name, _), g in groups.items() if name == p]) for p in PHASES},
+            "containers": containers,
+        }
+
+    def print_summary(self):
+        """Print request charge and latency by phase and by container."""
+        if not self.groups:
+            return
+        summary = self.summary()
+        total = summary["total"]
+        print(f"Cosmos DB:   {total['calls']} calls, {total['requestCharge']:.1f} RU")
+        rows = [(name, stats) for name, stats in summary["phases"].items() if stats["calls"]]
+        rows += [(name, entry["total"]) for name, entry in summary["containers"].items()]
+        for name, stats in rows:
+            latency = stats["latencyMs"]
+            print(
+                f"  {name:<16} {stats['calls']:>5} calls {stats['requestCharge']:>9.1f} RU   "
+                f"p50 {latency['p50']:.0f} ms, p95 {latency['p95']:.0f} ms, max {latency['max']:.0f} ms"
+            )
+
+    def write_json(self, path: str, **context):
+        """
+        Write the summary to a JSON file.
+
+        Args:
+            path: Output file path
+            **context: Extra top-level fields (division ID, timestamp, counts, ...)
+        """
+        report = dict(context)
+        report.update(self.summary())
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Metrics written to {path}")
+
+
+class _CallRecorder:
+    """Collects charges reported for one call through response_hook."""
+
+    def __init__(self, metrics: CosmosMetrics, container: str, phase_name: str, user_hook: Optional[Callable]):
+        self.metrics = metrics
+        self.container = container
+        self.phase = phase_name
+        self.user_hook = user_hook
+        self.charge = 0.0
+        self.start = time.perf_counter()
+
+    def __call__(self, headers, result):
+        self.charge += request_charge(headers)
+        if self.user_hook:
+            self.user_hook(headers, result)
+
+    def failed(self, error: Exception):
+        self.charge += request_charge(getattr(error, "headers", None))
+
+    def done(self):
+        latency_ms = (time.perf_counter() - self.start) * 1000
+        self.metrics.record(self.phase, self.container, self.charge, latency_ms)
+
+    def done_batch(self, operations, responses):
+        # One sample per phase the batch touched, each with the batch's latency
+        latency_ms = (time.perf_counter() - self.start) * 1000
+        for name, charge in batch_charges(operations, responses, self.charge).items():
+            self.metrics.record(name, self.container, charge, latency_ms)
+
+
+class MeteredContainer:
+    """
+    Container client proxy that records request charge and latency of every call.
+
+    Calls the importers do not use are passed through unrecorded.
+    """
+
+    def __init__(self, container, metrics: CosmosMetrics):
+        self._container = container
+        self._metrics = metrics
+        self.id = container.id
+
+    def __getattr__(self, name):
+        return getattr(self._container, name)
+
+    def _call(self, default_phase: str, method: str, *args, **kwargs):
+        recorder = _CallRecorder(
+            self._metrics, self.id, _current_phase.get() or default_phase, kwargs.pop("response_hook", None)
+        )
+        try:
+            return getattr(self._container, method)(*args, response_hook=recorder, **kwargs)
+        except exceptions.CosmosHttpResponseError as e:
+            recorder.failed(e)
+            raise
+        finally:
+            recorder.done()
+
+    def read_item(self, *args, **kwargs):
+        return self._call("lookup", "read_item", *args, **kwargs)
+
+    def read_items(self, *args, **kwargs):
+        return self._call("lookup", "read_items", *args, **kwargs)
+
+    def upsert_item(self, *args, **kwargs):
+        return self._call("create", "upsert_item", *args, **kwargs)
+
+    def create_item(self, *args, **kwargs):
+        return self._call("create", "create_item", *args, **kwargs)
+
+    def replace_item(self, *args, **kwargs):
+        return self._call("update", "replace_item", *args, **kwargs)
+
+    def patch_item(self, *args, **kwargs):
+        return self._call("update", "patch_item", *args, **kwargs)
+
+    def query_items(self, *args, **kwargs):
+        """Record the query when its results have been fully iterated."""
+        recorder = _CallRecorder(
+            self._metrics, self.id, _current_phase.get() or "lookup", kwargs.pop("response_hook", None)
+        )
+
+        def iterate():
+            try:
+                yield from self._container.query_items(*args, response_hook=recorder, **kwargs)
+            except exceptions.CosmosHttpResponseError as e:
+                recorder.failed(e)
+                raise
+            finally:
+                recorder.done()
+
+        return iterate()
+
+    def execute_item_batch(self, batch_operations, *args, **kwargs):
+        """Attribute the batch's charge to phases by each operation's status code."""
+        recorder = _CallRecorder(self._metrics, self.id, "create", kwargs.pop("response_hook", None))
+        try:
+            responses = self._container.execute_item_batch(batch_operations, *args, response_hook=recorder, **kwargs)
+        except (exceptions.CosmosBatchOperationError, exceptions.CosmosHttpResponseError) as e:
+            recorder.failed(e)
+            recorder.done()
+            raise
+        recorder.done_batch(batch_operations, responses)
+        return responses
+
+
+class AsyncMeteredContainer(MeteredContainer):
+    """MeteredContainer for azure.cosmos.aio container clients."""
+
+    async def _call(self, default_phase: str, method: str, *args, **kwargs):
+        recorder = _CallRecorder(
+            self._metrics, self.id, _current_phase.get() or default_phase, kwargs.pop("response_hook", None)
+        )
+        try:
+            return await getattr(self._container, method)(*args, response_hook=recorder, **kwargs)
+        except exceptions.CosmosHttpResponseError as e:
+            recorder.failed(e)
+            raise
+        finally:
+            recorder.done()
+
+    def query_items(self, *args, **kwargs):
+        """Record the query when its results have been fully iterated."""
+        recorder = _CallRecorder(
+            self._metrics, self.id, _current_phase.get() or "lookup", kwargs.pop("response_hook", None)
+        )
+
+        async def iterate():
+            try:
+                async for item in self._container.query_items(*args, response_hook=recorder, **kwargs):
+                    yield item
+            except exceptions.CosmosHttpResponseError as e:
+                recorder.failed(e)
+                raise
+            finally:
+                recorder.done()
+
+        return iterate()
+
+    async def execute_item_batch(self, batch_operations, *args, **kwargs):
+        recorder = _CallRecorder(self._metrics, self.id, "create", kwargs.pop("response_hook", None))
+        try:
+            responses = await self._container.execute_item_batch(
+                batch_operations, *args, response_hook=recorder, **kwargs
+            )
+        except (exceptions.CosmosBatchOperationError, exceptions.CosmosHttpResponseError) as e:
+            recorder.failed(e)
+            recorder.done()
+            raise
+        recorder.done_batch(batch_operations, responses)
+        return responses
+
+
+class MeteredDatabase:
+    """Database client proxy whose get_container_client() returns metered containers."""
+
+    def __init__(self, database, wrap: Callable):
+        self._database = database
+        self._wrap = wrap
+
+    def __getattr__(self, name):
+        return getattr(self._database, name)
+
+    def get_container_client(self, container):
+        return self._wrap(self._database.get_container_client(container))
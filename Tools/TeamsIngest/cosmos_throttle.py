@@ -0,0 +1,285 @@
+"""
+cosmos_throttle.py - RU/s budget for the TeamsIngest importers' Cosmos DB writes
+
+RuThrottle is a token bucket refilled at a fixed RU/s budget. Every write reserves
+its expected request charge before it is sent (the running average of earlier
+writes) and is settled against its actual x-ms-request-charge afterwards, so an
+import spends at most its share of the container throughput and leaves the rest
+to the app.
+
+When Cosmos DB throttles anyway (429, including throttles the SDK retried
+internally and reports in x-ms-throttle-retry-count), the rate is halved and all
+writes pause for x-ms-retry-after-ms. The rate then grows back to the budget by
+a small step every second.
+
+ThrottledContainer wraps a container client (usually a MeteredContainer) and
+sends its writes through the throttle; reads and queries pass through. Use one
+RuThrottle per import so every container shares the same budget. RuThrottle.call()
+sends any single Cosmos call through the budget, for callers that do not wrap
+containers (db/import_cosmos_sidespins.py and the tools built on it). The bucket
+is guarded by a lock, so one throttle can be shared by worker threads.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from azure.cosmos import exceptions
+
+from cosmos_metrics import request_charge
+
+
+TOO_MANY_REQUESTS = 429
+RETRY_AFTER_HEADER = "x-ms-retry-after-ms"
+THROTTLE_RETRY_COUNT_HEADER = "x-ms-throttle-retry-count"
+THROTTLE_RETRY_WAIT_HEADER = "x-ms-throttle-retry-wait-time-ms"
+
+# Rate multiplier applied on every throttle, and the floor as a share of the budget
+BACKOFF_FACTOR = 0.5
+MIN_RATE_SHARE = 0.1
+
+# Share of the budget the rate grows back by per second without throttles
+RECOVERY_SHARE_PER_SECOND = 0.05
+
+# Charge reserved for the first write, before any charge has been seen
+INITIAL_CHARGE_ESTIMATE = 10.0
+
+# Weight of each new charge in the running average reservations are based on
+ESTIMATE_SMOOTHING = 0.2
+
+# 429s retried by the throttle (after the SDK's own retries) before giving up
+MAX_THROTTLED_RETRIES = 5
+
+WRITE_METHODS = ("upsert_item", "create_item", "replace_item", "patch_item", "delete_item", "execute_item_batch")
+
+
+def _header_ms(headers, name: str) -> float:
+    try:
+        return float((headers or {}).get(name, 0) or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class RuThrottle:
+    """Adaptive token bucket shared by every write of one import run."""
+
+    def __init__(self, ru_per_second: float, clock: Callable[[], float] = time.monotonic):
+        if ru_per_second <= 0:
+            raise ValueError("RU/s budget must be positive")
+        self.lock = threading.RLock()
+        self.budget = float(ru_per_second)
+        self.rate = self.budget
+        self.clock = clock
+        self.tokens = self.budget
+        self.updated = clock()
+        self.paused_until = 0.0
+        self.estimate = INITIAL_CHARGE_ESTIMATE
+        self.writes = 0
+        self.charged = 0.0
+        self.delayed = 0
+        self.throttles = 0
+
+    def _refill(self):
+        now = self.clock()
+        elapsed = max(0.0, now - self.updated)
+        self.updated = now
+        self.rate = min(self.budget, self.rate + self.budget * RECOVERY_SHARE_PER_SECOND * elapsed)
+        # Up to one second of budget can be saved up for a burst
+        self.tokens = min(self.budget, self.tokens + self.rate * elapsed)
+
+    def reserve(self) -> Tuple[float, float]:
+        """
+        Reserve the expected charge of one write.
+
+        Returns:
+            (request units reserved, seconds to wait before sending the write)
+        """
+        with self.lock:
+            self._refill()
+            reserved = self.estimate
+            self.tokens -= reserved
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            wait = max(wait, self.paused_until - self.updated)
+            self.delayed += wait > 0
+            return reserved, wait
+
+    def settle(self, reserved: float, charge: float, headers=None):
+        """
+        Settle a reservation against the write's actual request charge.
+
+        Args:
+            reserved: Request units reserved by reserve()
+            charge: Request units the write was charged (0 if it was rejected)
+            headers: Response headers, checked for throttles the SDK retried
+        """
+        with self.lock:
+            self.tokens -= charge - reserved
+            if charge:
+                self.writes += 1
+                self.charged += charge
+                # Running average, so reservations track the current document sizes
+                self.estimate += (charge - self.estimate) * ESTIMATE_SMOOTHING
+        retries = _header_ms(headers, THROTTLE_RETRY_COUNT_HEADER)
+        if retries:
+            self.throttled(_header_ms(headers, THROTTLE_RETRY_WAIT_HEADER) / retries)
+
+    def throttled(self, retry_after_ms: float = 0.0):
+        """
+        Back off after a 429: halve the rate and pause writes for retry_after_ms.
+
+        Args:
+            retry_after_ms: Wait Cosmos DB asked for (x-ms-retry-after-ms)
+        """
+        with self.lock:
+            self._refill()
+            self.throttles += 1
+            self.rate = max(self.budget * MIN_RATE_SHARE, self.rate * BACKOFF_FACTOR)
+            self.tokens = min(self.tokens, 0.0)
+            self.paused_until = max(self.paused_until, self.updated + retry_after_ms / 1000)
+
+    def call(self, method: Callable, *args, max_retries: int = MAX_THROTTLED_RETRIES, **kwargs):
+        """
+        Send one sync Cosmos call through the budget, retrying 429s the SDK gave up on.
+
+        Args:
+            method: Callable accepting a response_hook keyword (a container method, or
+                a wrapper such as a metrics recorder that passes it on)
+            *args: Positional arguments for method
+            max_retries: 429s to retry; 0 for calls that cannot be repeated
+            **kwargs: Keyword arguments for method
+
+        Returns:
+            The call's result
+        """
+        user_hook = kwargs.pop("response_hook", None)
+        for attempt in range(max_retries + 1):
+            reserved, wait = self.reserve()
+            time.sleep(wait)
+            recorder = _ChargeRecorder(user_hook)
+            try:
+                result = method(*args, response_hook=recorder, **kwargs)
+            except (exceptions.CosmosBatchOperationError, exceptions.CosmosHttpResponseError) as e:
+                throttled = _throttle_error(e)
+                self.settle(reserved, 0.0 if throttled else request_charge(getattr(e, "headers", None)))
+                if not throttled or attempt == max_retries:
+                    raise
+                self.throttled(_header_ms(e.headers, RETRY_AFTER_HEADER))
+                continue
+            self.settle(reserved, recorder.charge, recorder.headers)
+            return result
+
+    def wrap(self, container) -> "ThrottledContainer":
+        """Wrap a sync container client so its writes are throttled."""
+        return ThrottledContainer(container, self)
+
+    def wrap_async(self, container) -> "AsyncThrottledContainer":
+        """Wrap an azure.cosmos.aio container client so its writes are throttled."""
+        return AsyncThrottledContainer(container, self)
+
+    def wrap_database_async(self, database) -> "ThrottledDatabase":
+        """Wrap an azure.cosmos.aio database client so its containers' writes are throttled."""
+        return ThrottledDatabase(database, self.wrap_async)
+
+    def print_stats(self):
+        """Print how much the throttle held writes back."""
+        print(
+            f"Throttle:    {self.writes} writes, {self.charged:.1f} RU at a {self.budget:g} RU/s budget, "
+            f"{self.delayed} held back, {self.throttles} throttled (429)"
+        )
+
+    def summary(self) -> Dict:
+        return {
+            "budget": self.budget,
+            "writes": self.writes,
+            "requestCharge": round(self.charged, 2),
+            "delayed": self.delayed,
+            "throttles": self.throttles,
+        }
+
+
+class _ChargeRecorder:
+    """response_hook that keeps the headers for settling and chains the caller's hook."""
+
+    def __init__(self, user_hook: Optional[Callable]):
+        self.user_hook = user_hook
+        self.headers = None
+        self.charge = 0.0
+
+    def __call__(self, headers, result):
+        self.headers = headers
+        self.charge += request_charge(headers)
+        if self.user_hook:
+            self.user_hook(headers, result)
+
+
+def _throttle_error(error: Exception) -> bool:
+    return isinstance(error, exceptions.CosmosHttpResponseError) and error.status_code == TOO_MANY_REQUESTS
+
+
+class ThrottledContainer:
+    """Container client proxy that sends writes through an RuThrottle."""
+
+    def __init__(self, container, throttle: RuThrottle):
+        self._container = container
+        self._throttle = throttle
+        self.id = container.id
+
+    def __getattr__(self, name):
+        attribute = getattr(self._container, name)
+        if name not in WRITE_METHODS:
+            return attribute
+        return lambda *args, **kwargs: self._write(attribute, *args, **kwargs)
+
+    def _write(self, method, *args, **kwargs):
+        return self._throttle.call(method, *args, **kwargs)
+
+
+class AsyncThrottledContainer(ThrottledContainer):
+    """ThrottledContainer for azure.cosmos.aio container clients."""
+
+    async def _write(self, method, *args, **kwargs):
+        user_hook = kwargs.pop("response_hook", None)
+        for attempt in range(MAX_THROTTLED_RETRIES + 1):
+            reserved, wait = self._throttle.reserve()
+            await asyncio.sleep(wait)
+            recorder = _ChargeRecorder(user_hook)
+            try:
+                result = await method(*args, response_hook=recorder, **kwargs)
+            except (exceptions.CosmosBatchOperationError, exceptions.CosmosHttpResponseError) as e:
+                throttled = _throttle_error(e)
+                self._throttle.settle(reserved, 0.0 if throttled else request_charge(getattr(e, "headers", None)))
+                if not throttled or attempt == MAX_THROTTLED_RETRIES:
+                    raise
+                self._throttle.throttled(_header_ms(e.headers, RETRY_AFTER_HEADER))
+                continue
+            self._throttle.settle(reserved, recorder.charge, recorder.headers)
+            return result
+
+
+class ThrottledDatabase:
+    """Database client proxy whose get_container_client() returns throttled containers."""
+
+    def __init__(self, database, wrap: Callable):
+        self._database = database
+        self._wrap = wrap
+
+    def __getattr__(self, name):
+        return getattr(self._database, name)
+
+    def get_container_client(self, container):
+        return self._wrap(self._database.get_container_client(container))
+
+
+def throttle_writes(throttle: Optional[RuThrottle], container):
+    """
+    Wrap a sync container client with the throttle, if there is one.
+
+    Args:
+        throttle: Write throttle, or None
+        container: Container client
+
+    Returns:
+        ThrottledContainer, or the container itself without a throttle
+    """
+    return throttle.wrap(container) if throttle else container
@@ -0,0 +1,208 @@
+"""
+cosmos_throughput.py - Temporary throughput boost for bulk imports
+
+boosted_throughput() raises the provisioned throughput of the containers an
+import writes to for the duration of a `with` block, and always puts the
+original values back afterwards, including when the import fails or is
+interrupted with Ctrl-C.
+
+Containers are left alone when:
+  - the account is serverless (detected like db/import_cosmos_sidespins.py
+    ensure_container() does, from the error message)
+  - the container has no throughput of its own (it shares database throughput)
+  - the container is already provisioned at or above the boost
+
+Autoscale containers have their maximum raised instead, rounded up to the
+1000 RU/s steps autoscale allows.
+
+Cosmos DB never lowers a container below the highest throughput it ever had
+divided by 100 (autoscale: the highest maximum divided by 10). A boost is capped
+so the original value can still be restored, and a restore that fails raises
+once every container has been tried.
+"""
+
+import contextlib
+import math
+from typing import Iterable, List, Optional, Tuple
+
+from azure.cosmos import ThroughputProperties, exceptions
+
+
+AUTOSCALE_STEP = 1000
+
+# Lowest throughput Cosmos DB allows = highest ever provisioned / this divisor
+MANUAL_MIN_DIVISOR = 100
+AUTOSCALE_MIN_DIVISOR = 10
+
+
+def is_serverless_error(error: Exception) -> bool:
+    """Whether a Cosmos DB error says the account is serverless."""
+    message = str(error).lower()
+    return "serverless" in message
+
+
+def _boost_value(current: ThroughputProperties, ru: int):
+    """Throughput to replace current with, or None if it is already high enough."""
+    if current.auto_scale_max_throughput:
+        target = math.ceil(ru / AUTOSCALE_STEP) * AUTOSCALE_STEP
+        if current.auto_scale_max_throughput >= target:
+            return None
+        return ThroughputProperties(auto_scale_max_throughput=target)
+    if (current.offer_throughput or 0) >= ru:
+        return None
+    return ru
+
+
+def _value(throughput) -> int:
+    if isinstance(throughput, ThroughputProperties):
+        return throughput.auto_scale_max_throughput or throughput.offer_throughput or 0
+    return throughput or 0
+
+
+def _max_ever_provisioned(current: ThroughputProperties) -> int:
+    """Highest throughput the container ever had, from the offer's minimum-throughput parameters."""
+    content = (current.properties or {}).get("content") or {}
+    parameters = content.get("offerMinimumThroughputParameters") or {}
+    return max(int(parameters.get("maxThroughputEverProvisioned") or 0), _value(current))
+
+
+def _describe(throughput) -> str:
+    if isinstance(throughput, ThroughputProperties):
+        if throughput.auto_scale_max_throughput:
+            return f"autoscale max {throughput.auto_scale_max_throughput} RU/s"
+        return f"{throughput.offer_throughput} RU/s"
+    return f"{throughput} RU/s"
+
+
+def _original_value(current: ThroughputProperties):
+    if current.auto_scale_max_throughput:
+        return ThroughputProperties(auto_scale_max_throughput=current.auto_scale_max_throughput)
+    return current.offer_throughput
+
+
+def _unboostable_reason(error: exceptions.CosmosHttpResponseError) -> Optional[str]:
+    """Why reading a container's throughput failed, if that means it cannot be boosted."""
+    if is_serverless_error(error):
+        return "serverless"
+    if error.status_code == 404:
+        return "no dedicated throughput"
+    return None
+
+
+def _plan_boost(container, current: ThroughputProperties, ru: int):
+    boost = _boost_value(current, ru)
+    if boost is None:
+        print(f"= Throughput already at {_describe(current)}: {container.id}")
+        return None
+
+    # A boost above the highest value ever provisioned raises the floor the restore must clear
+    autoscale = bool(current.auto_scale_max_throughput)
+    divisor = AUTOSCALE_MIN_DIVISOR if autoscale else MANUAL_MIN_DIVISOR
+    ceiling = max(_max_ever_provisioned(current), _value(current) * divisor)
+    if autoscale:
+        ceiling = ceiling // AUTOSCALE_STEP * AUTOSCALE_STEP
+    if _value(boost) <= ceiling:
+        return boost
+    print(
+        f"~ Capping the boost of {container.id} at {ceiling} RU/s: after {_value(boost)} RU/s Cosmos DB "
+        f"would not go back below {math.ceil(_value(boost) / divisor)} RU/s "
+        f"(highest throughput ever provisioned / {divisor}), so {_describe(current)} could not be restored"
+    )
+    if autoscale:
+        return ThroughputProperties(auto_scale_max_throughput=ceiling)
+    return ceiling
+
+
+def _restore_failed(container, original, error: Exception) -> str:
+    print(f"❌ Could not restore throughput of {container.id} to {_describe(original)}: {error}")
+    return f"{container.id} ({_describe(original)})"
+
+
+def _raise_if_unrestored(failed: List[str]):
+    if failed:
+        raise RuntimeError(
+            f"Throughput of {', '.join(failed)} was not restored after the boost; restore it in the Azure portal"
+        )
+
+
+@contextlib.contextmanager
+def boosted_throughput(containers: Iterable, ru: Optional[int]):
+    """
+    Raise the throughput of containers to ru RU/s inside the block, then restore it.
+
+    Args:
+        containers: Container clients the import writes to
+        ru: Boosted throughput in RU/s (None or 0: do nothing). Capped per container
+            at the highest value its original throughput can be restored from.
+
+    Raises:
+        RuntimeError: If a container's original throughput could not be restored
+    """
+    boosted: List[Tuple[object, object]] = []
+    try:
+        for container in containers if ru else []:
+            try:
+                current, reason = container.get_throughput(), None
+            except exceptions.CosmosHttpResponseError as e:
+                current, reason = None, _unboostable_reason(e)
+                if not reason:
+                    raise
+            if reason == "serverless":
+                print("~ Serverless account detected, not boosting throughput")
+                break
+            if reason:
+                print(f"~ Not boosting {container.id}: {reason}")
+                continue
+            boost = _plan_boost(container, current, ru)
+            if boost is None:
+                continue
+            # Recorded first, so an interrupt during the replace still restores
+            boosted.append((container, _original_value(current)))
+            container.replace_throughput(boost)
+            print(f"✓ Throughput boosted: {container.id} {_describe(current)} -> {_describe(boost)}")
+        yield
+    finally:
+        failed = []
+        for container, original in reversed(boosted):
+            try:
+                container.replace_throughput(original)
+                print(f"✓ Throughput restored: {container.id} {_describe(original)}")
+            except Exception as e:
+                failed.append(_restore_failed(container, original, e))
+        _raise_if_unrestored(failed)
+
+
+@contextlib.asynccontextmanager
+async def boosted_throughput_async(containers: Iterable, ru: Optional[int]):
+    """Async counterpart of boosted_throughput for azure.cosmos.aio container clients."""
+    boosted: List[Tuple[object, object]] = []
+    try:
+        for container in containers if ru else []:
+            try:
+                current, reason = await container.get_throughput(), None
+            except exceptions.CosmosHttpResponseError as e:
+                current, reason = None, _unboostable_reason(e)
+                if not reason:
+                    raise
+            if reason == "serverless":
+                print("~ Serverless account detected, not boosting throughput")
+                break
+            if reason:
+                print(f"~ Not boosting {container.id}: {reason}")
+                continue
+            boost = _plan_boost(container, current, ru)
+            if boost is None:
+                continue
+            boosted.append((container, _original_value(current)))
+            await container.replace_throughput(boost)
+            print(f"✓ Throughput boosted: {container.id} {_describe(current)} -> {_describe(boost)}")
+        yield
+    finally:
+        failed = []
+        for container, original in reversed(boosted):
+            try:
+                await container.replace_throughput(original)
+                print(f"✓ Throughput restored: {container.id} {_describe(original)}")
+            except Exception as e:
+                failed.append(_restore_failed(container, original, e))
+        _raise_if_unrestored(failed)
@@ -0,0 +1,56 @@
+"""
+doc_diff.py - Content hashing used by the TeamsIngest importers to skip no-op writes
+
+A freshly transformed document is compared with the stored one by hashing both
+with volatile fields removed. Volatile fields are import timestamps (createdAt,
+joinedAt) and Cosmos DB system properties (_rid, _etag, _ts, ...), which differ on
+every run even when nothing meaningful has changed.
+"""
+
+import hashlib
+import json
+from typing import Dict, FrozenSet, Optional
+
+
+# Fields that are stamped at import time and should not trigger a write
+VOLATILE_FIELDS = frozenset({"createdAt", "joinedAt"})
+
+
+def content_hash(doc: Dict, ignore_fields: FrozenSet[str] = VOLATILE_FIELDS) -> str:
+    """
+    Hash the meaningful content of a document.
+
+    Args:
+        doc: Document to hash
+        ignore_fields: Top-level fields to leave out of the hash
+
+    Returns:
+        Hex SHA-256 digest of the canonical JSON content
+    """
+    content = {
+        key: value for key, value in doc.items()
+        if key not in ignore_fields and not key.startswith("_")
+    }
+    encoded = json.dumps(content, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def has_changes(
+    new_doc: Dict,
+    stored_doc: Optional[Dict],
+    ignore_fields: FrozenSet[str] = VOLATILE_FIELDS
+) -> bool:
+    """
+    Check whether writing new_doc would change the stored document.
+
+    Args:
+        new_doc: Newly transformed document
+        stored_doc: Document currently in the database, or None if missing
+        ignore_fields: Top-level fields to ignore in the comparison
+
+    Returns:
+        True if the document is missing or its content differs
+    """
+    if stored_doc is None:
+        return True
+    return content_hash(new_doc, ignore_fields) != content_hash(stored_doc, ignore_fields)
@@ -0,0 +1,754 @@
+"""
+graphql_client.py - Shared APA GraphQL client for the TeamsIngest importers
+
+Wraps a pooled requests.Session so every call in a run reuses the same keep-alive
+connections (one TLS handshake instead of one per request). Requests get a
+connect/read timeout, and transient failures (connection errors, timeouts, 429
+and 5xx responses) are retried with jittered exponential backoff that honors the
+server's Retry-After header. The client counts requests, retries and latency so
+importers can report them in their summaries.
+
+Access tokens are cached on disk (owner-only permissions), keyed by a hash of the
+refresh token, and reused until shortly before the JWT's exp claim. A 401 response
+drops the cached token, mints a new one and retries the request once.
+
+Several operations can be packed into one POST (the Apollo endpoint accepts a JSON
+array of operations and answers with an array in the same order). Responses are
+demultiplexed back per operation, and an operation that returned errors fails on
+its own without failing the rest of the batch.
+
+Responses can be captured to a directory (--capture-dir) and replayed later with
+ReplayClient (--from-file / --from-dir), so imports can be re-run, profiled and
+benchmarked without network access or a refresh token.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# GraphQL API Configuration
+GRAPHQL_ENDPOINT = "https://gql.poolplayers.com/graphql"
+GRAPHQL_HEADERS = {
+    "accept": "*/*",
+    "accept-language": "en-US,en;q=0.9",
+    "apollographql-client-name": "MemberServices",
+    "apollographql-client-version": "3.18.44-3550",
+    "content-type": "application/json",
+    "origin": "https://league.poolplayers.com",
+    "referer": "https://league.poolplayers.com/",
+    "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+}
+
+GENERATE_ACCESS_TOKEN_MUTATION = """
+mutation GenerateAccessTokenMutation($refreshToken: String!) {
+    generateAccessToken(refreshToken: $refreshToken) {
+        accessToken
+        __typename
+    }
+}
+"""
+
+# Retry policy
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_READ_TIMEOUT = 60.0
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 30.0
+DEFAULT_POOL_SIZE = 10
+
+# Maximum operations packed into one POST
+DEFAULT_OPERATION_BATCH_SIZE = 10
+
+# Access token cache
+DEFAULT_TOKEN_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "sidespins", "apa-tokens.json")
+TOKEN_EXPIRY_MARGIN = 120  # seconds before exp at which a cached token is no longer used
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header value.
+
+    Args:
+        value: Header value, either delay seconds or an HTTP date
+
+    Returns:
+        Seconds to wait, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(
+    attempt: int,
+    retry_after: Optional[float] = None,
+    base: float = DEFAULT_BACKOFF_BASE,
+    cap: float = DEFAULT_BACKOFF_MAX
+) -> float:
+    """
+    Compute the wait before a retry using full-jitter exponential backoff.
+
+    Args:
+        attempt: Zero-based retry attempt
+        retry_after: Server-requested delay in seconds, if any (always honored)
+        base: Base delay in seconds
+        cap: Maximum backoff delay in seconds
+
+    Returns:
+        Seconds to sleep before the next attempt
+    """
+    delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+def print_request_stats(stats: Dict):
+    """
+    Print a client's request, retry and latency counters as one summary line.
+
+    Args:
+        stats: The client's stats dict (requests, retries, failures, latencies_ms)
+    """
+    latencies = stats["latencies_ms"]
+    if not latencies:
+        return
+    print(
+        f"GraphQL:     {stats['requests']} requests, {stats['retries']} retries, "
+        f"{stats['failures']} failed, "
+        f"avg {sum(latencies) / len(latencies):.0f} ms, max {max(latencies):.0f} ms"
+    )
+
+
+class GraphQLError(Exception):
+    """A single GraphQL operation returned errors or no data."""
+
+    def __init__(self, operation_name: str, errors: Optional[List[Dict]] = None):
+        self.operation_name = operation_name
+        self.errors = errors or []
+        messages = "; ".join(str(e.get("message", e)) for e in self.errors) or "no data returned"
+        super().__init__(f"GraphQL operation {operation_name} failed: {messages}")
+
+
+def split_batches(operations: List[Dict], batch_size: int) -> List[List[Dict]]:
+    """
+    Split operations into request-sized batches.
+
+    Args:
+        operations: GraphQL operations
+        batch_size: Maximum operations per request
+
+    Returns:
+        List of operation batches
+    """
+    batch_size = max(1, batch_size)
+    return [operations[i:i + batch_size] for i in range(0, len(operations), batch_size)]
+
+
+def demultiplex_batch(operations: List[Dict], response) -> List[Union[Dict, GraphQLError]]:
+    """
+    Map a batched response back to its operations.
+
+    Args:
+        operations: Operations sent in the request
+        response: Decoded JSON response
+
+    Returns:
+        One entry per operation: its "data" dict, or a GraphQLError
+
+    Raises:
+        Exception: If the response is not an array matching the request
+    """
+    if not isinstance(response, list) or len(response) != len(operations):
+        raise Exception(
+            f"Batched GraphQL response does not match request "
+            f"({len(operations)} operations): {str(response)[:300]}"
+        )
+
+    results = []
+    for operation, result in zip(operations, response):
+        data = (result or {}).get("data")
+        if not data or not any(value is not None for value in data.values()):
+            results.append(GraphQLError(operation.get("operationName"), (result or {}).get("errors")))
+        else:
+            results.append(data)
+    return results
+
+
+def capture_file_name(operation: Dict) -> str:
+    """
+    Name of the file a captured operation response is stored in.
+
+    Args:
+        operation: GraphQL operation dict
+
+    Returns:
+        File name like "divisionSchedule_418320.json"
+    """
+    variables = operation.get("variables") or {}
+    suffix = "_".join(str(value) for value in variables.values())
+    return f"{operation['operationName']}_{suffix}.json" if suffix else f"{operation['operationName']}.json"
+
+
+def save_captured_responses(capture_dir: str, operations: List[Dict], response):
+    """
+    Save each operation's response entry for later replay.
+
+    Files use the same layout as a raw API response (a one-element list), so
+    they can be replayed with --from-file as well as --from-dir.
+
+    Args:
+        capture_dir: Directory to write captured responses to
+        operations: Operations sent in the request
+        response: Decoded JSON response (one entry per operation)
+    """
+    if not isinstance(response, list) or len(response) != len(operations):
+        return
+    os.makedirs(capture_dir, exist_ok=True)
+    for operation, entry in zip(operations, response):
+        path = os.path.join(capture_dir, capture_file_name(operation))
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump([entry], f, indent=2)
+        print(f"  💾 Captured response: {path}")
+
+
+def decode_jwt_expiry(token: str) -> Optional[float]:
+    """
+    Read the exp claim from a JWT without verifying it.
+
+    Args:
+        token: JWT access token (optionally prefixed with "Bearer ")
+
+    Returns:
+        Expiry as a Unix timestamp, or None if the token has no readable exp
+    """
+    try:
+        payload = token.split()[-1].split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        return float(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+class TokenCache:
+    """
+    On-disk access token cache keyed by a SHA-256 hash of the refresh token.
+
+    The file is written atomically with owner-only permissions, so concurrent
+    importer runs can share it without corrupting it.
+    """
+
+    def __init__(self, path: str = DEFAULT_TOKEN_CACHE_PATH, margin: float = TOKEN_EXPIRY_MARGIN):
+        self.path = path
+        self.margin = margin
+
+    @staticmethod
+    def _key(refresh_token: str) -> str:
+        return hashlib.sha256(refresh_token.encode("utf-8")).hexdigest()
+
+    def _load(self) -> Dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, refresh_token: str) -> Optional[str]:
+        """
+        Get a cached access token that is not about to expire.
+
+        Args:
+            refresh_token: Refresh token the access token was minted from
+
+        Returns:
+            Access token, or None if missing or within the expiry margin
+        """
+        entry = self._load().get(self._key(refresh_token))
+        if not entry or not entry.get("expiresAt"):
+            return None
+        if entry["expiresAt"] - self.margin <= time.time():
+            return None
+        return entry.get("accessToken")
+
+    def put(self, refresh_token: str, access_token: str):
+        """
+        Store an access token; tokens without a readable exp are not cached.
+
+        Args:
+            refresh_token: Refresh token the access token was minted from
+            access_token: Newly minted access token
+        """
+        expires_at = decode_jwt_expiry(access_token)
+        if expires_at is None:
+            return
+        now = time.time()
+        entries = {
+            key: entry for key, entry in self._load().items()
+            if entry.get("expiresAt", 0) > now
+        }
+        entries[self._key(refresh_token)] = {"accessToken": access_token, "expiresAt": expires_at}
+        self._write(entries)
+
+    def invalidate(self, refresh_token: str):
+        """
+        Drop the cached access token for a refresh token.
+
+        Args:
+            refresh_token: Refresh token whose access token was rejected
+        """
+        entries = self._load()
+        if entries.pop(self._key(refresh_token), None) is not None:
+            self._write(entries)
+
+    def _write(self, entries: Dict):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.path)
+
+
+class GraphQLClient:
+    """
+    Pooled, retrying HTTP client for the APA GraphQL endpoint.
+
+    Use one instance for a whole run so connections are reused across requests.
+    """
+
+    def __init__(
+        self,
+        endpoint: str = GRAPHQL_ENDPOINT,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_base: float = DEFAULT_BACKOFF_BASE,
+        backoff_max: float = DEFAULT_BACKOFF_MAX,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        token_cache: Optional[TokenCache] = None,
+        capture_dir: Optional[str] = None
+    ):
+        self.endpoint = endpoint
+        self.token_cache = token_cache
+        self.capture_dir = capture_dir
+        self.refresh_token: Optional[str] = None
+        self.access_token: Optional[str] = None
+        self._superseded_tokens = set()
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        # Retries are handled here (with Retry-After support), not by urllib3
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(GRAPHQL_HEADERS)
+
+        self.stats = {
+            "requests": 0,
+            "retries": 0,
+            "failures": 0,
+            "latencies_ms": []
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """Close pooled connections."""
+        self.session.close()
+
+    def post(self, payload: List[Dict], access_token: str = None) -> List[Dict]:
+        """
+        POST a GraphQL payload, retrying transient failures.
+
+        Args:
+            payload: List of GraphQL operations
+            access_token: Access token for authenticated operations (optional)
+
+        Returns:
+            Decoded JSON response (one entry per operation)
+
+        Raises:
+            requests.RequestException: If the request still fails after all retries
+        """
+        reauthenticated = False
+        attempt = 0
+
+        while True:
+            # Callers may still hold a token that was replaced after a 401
+            if access_token in self._superseded_tokens:
+                access_token = self.access_token
+            headers = {"authorization": access_token} if access_token else None
+
+            start = time.perf_counter()
+            retry_after = None
+            try:
+                response = self.session.post(
+                    self.endpoint,
+                    json=payload,
+                    headers=headers,
+                    timeout=self.timeout
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._record(start)
+                if attempt >= self.max_retries:
+                    self.stats["failures"] += 1
+                    raise
+                reason = type(e).__name__
+            else:
+                self._record(start)
+                if response.status_code == 401 and access_token and self.refresh_token and not reauthenticated:
+                    # Token expired or revoked - mint a new one and retry once
+                    print("  ⚠ Access token rejected (HTTP 401), refreshing...")
+                    access_token = self._reauthenticate(access_token)
+                    reauthenticated = True
+                    continue
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    if not response.ok:
+                        self.stats["failures"] += 1
+                    response.raise_for_status()
+                    return response.json()
+                reason = f"HTTP {response.status_code}"
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+
+            delay = backoff_delay(attempt, retry_after, self.backoff_base, self.backoff_max)
+            self.stats["retries"] += 1
+            print(f"  ⚠ GraphQL request failed ({reason}), retrying in {delay:.1f}s "
+                  f"(attempt {attempt + 1}/{self.max_retries})")
+            time.sleep(delay)
+            attempt += 1
+
+    def execute_batch(
+        self,
+        operations: List[Dict],
+        access_token: str = None,
+        batch_size: int = DEFAULT_OPERATION_BATCH_SIZE
+    ) -> List[Union[Dict, GraphQLError]]:
+        """
+        Run many operations, packing up to batch_size of them into each POST.
+
+        Args:
+            operations: GraphQL operations ({operationName, variables, query})
+            access_token: Access token for authenticated operations (optional)
+            batch_size: Maximum operations per request
+
+        Returns:
+            One entry per operation, in order: its "data" dict, or a GraphQLError
+            if that operation failed
+        """
+        results = []
+        for batch in split_batches(operations, batch_size):
+            response = self.post(batch, access_token)
+            if self.capture_dir:
+                save_captured_responses(self.capture_dir, batch, response)
+            results.extend(demultiplex_batch(batch, response))
+        return results
+
+    def fetch_access_token(self, refresh_token: str) -> str:
+        """
+        Fetch an access token from the GraphQL API using a refresh token.
+
+        Args:
+            refresh_token: The refresh token for authentication
+
+        Returns:
+            Access token string
+
+        Raises:
+            Exception: If the API request fails
+        """
+        payload = [{
+            "operationName": "GenerateAccessTokenMutation",
+            "variables": {"refreshToken": refresh_token},
+            "query": GENERATE_ACCESS_TOKEN_MUTATION
+        }]
+
+        print("Fetching access token...")
+        data = self.post(payload)
+        if not data or not data[0].get("data", {}).get("generateAccessToken"):
+            raise Exception(f"Failed to get access token: {data}")
+
+        access_token = data[0]["data"]["generateAccessToken"]["accessToken"]
+        print(f"✓ Access token obtained")
+        return access_token
+
+    def authenticate(self, refresh_token: str) -> str:
+        """
+        Get an access token, reusing a cached one when it is still valid.
+
+        The refresh token is remembered so the client can mint a new access
+        token by itself when a request is rejected with 401.
+
+        Args:
+            refresh_token: The refresh token for authentication
+
+        Returns:
+            Access token string
+        """
+        self.refresh_token = refresh_token
+        cached = self.token_cache.get(refresh_token) if self.token_cache else None
+        if cached:
+            expires_at = decode_jwt_expiry(cached)
+            minutes_left = (expires_at - time.time()) / 60 if expires_at else 0
+            print(f"✓ Using cached access token (expires in {minutes_left:.0f} min)")
+            self.access_token = cached
+            return cached
+
+        self.access_token = self.fetch_access_token(refresh_token)
+        if self.token_cache:
+            self.token_cache.put(refresh_token, self.access_token)
+        return self.access_token
+
+    def _reauthenticate(self, rejected_token: str) -> str:
+        if self.token_cache:
+            self.token_cache.invalidate(self.refresh_token)
+        self._superseded_tokens.add(rejected_token)
+        if self.access_token and self.access_token != rejected_token:
+            # Another caller already refreshed
+            return self.access_token
+        self.access_token = self.fetch_access_token(self.refresh_token)
+        if self.token_cache:
+            self.token_cache.put(self.refresh_token, self.access_token)
+        return self.access_token
+
+    def _record(self, start: float):
+        self.stats["requests"] += 1
+        self.stats["latencies_ms"].append((time.perf_counter() - start) * 1000)
+
+    def print_stats(self):
+        """Print request, retry and latency counters."""
+        print_request_stats(self.stats)
+
+
+class ReplayClient:
+    """
+    Stand-in for GraphQLClient that answers operations from captured responses.
+
+    With from_file, that one file answers every operation. With from_dir, each
+    operation is answered from the file --capture-dir wrote for it.
+    """
+
+    def __init__(self, from_file: Optional[str] = None, from_dir: Optional[str] = None):
+        if not from_file and not from_dir:
+            raise ValueError("ReplayClient needs from_file or from_dir")
+        self.from_file = from_file
+        self.from_dir = from_dir
+        self.stats = {"responses": 0}
+
+    def close(self):
+        """Nothing to close; present for GraphQLClient compatibility."""
+
+    def authenticate(self, refresh_token: Optional[str] = None) -> Optional[str]:
+        """
+        No authentication is needed when replaying.
+
+        Returns:
+            None (there is no access token)
+        """
+        print(f"✓ Replaying captured responses from {self.from_file or self.from_dir} (no API access)")
+        return None
+
+    def load(self, operation: Dict) -> List[Dict]:
+        """
+        Read the captured response for an operation.
+
+        Args:
+            operation: GraphQL operation dict
+
+        Returns:
+            Captured response (one-element list)
+
+        Raises:
+            Exception: If no capture exists for the operation
+        """
+        path = self.from_file or os.path.join(self.from_dir, capture_file_name(operation))
+        if not os.path.exists(path):
+            raise Exception(f"No captured response for {operation['operationName']}: {path} not found")
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.stats["responses"] += 1
+        return data[:1] if isinstance(data, list) else [data]
+
+    def execute_batch(
+        self,
+        operations: List[Dict],
+        access_token: str = None,
+        batch_size: int = DEFAULT_OPERATION_BATCH_SIZE
+    ) -> List[Union[Dict, GraphQLError]]:
+        """
+        Answer operations from captured responses, like GraphQLClient.execute_batch().
+
+        A capture for a different ID than the operation asked for (e.g. a
+        --from-file for another division) is reported as a GraphQLError.
+
+        Args:
+            operations: GraphQL operations
+            access_token: Ignored
+            batch_size: Ignored
+
+        Returns:
+            One entry per operation: its "data" dict, or a GraphQLError
+        """
+        results = []
+        for operation in operations:
+            [result] = demultiplex_batch([operation], self.load(operation))
+            expected_id = (operation.get("variables") or {}).get("id")
+            if isinstance(result, dict) and expected_id is not None:
+                captured_ids = [
+                    value["id"] for value in result.values()
+                    if isinstance(value, dict) and value.get("id") is not None
+                ]
+                if captured_ids and expected_id not in captured_ids:
+                    result = GraphQLError(operation["operationName"], [{
+                        "message": f"captured response does not contain ID {expected_id} (found {captured_ids})"
+                    }])
+            results.append(result)
+        return results
+
+    def print_stats(self):
+        """Print how many captured responses were replayed."""
+        print(f"GraphQL:     {self.stats['responses']} captured responses replayed (no API requests)")
+
+
+_shared_client: Optional[GraphQLClient] = None
+
+
+def configure_client(**kwargs) -> GraphQLClient:
+    """
+    Replace the shared client with one built from the given options.
+
+    Args:
+        **kwargs: GraphQLClient constructor options (timeouts, retries, ...)
+
+    Returns:
+        The new shared client
+    """
+    return use_client(GraphQLClient(**kwargs))
+
+
+def use_client(client):
+    """
+    Make the given client (GraphQLClient or ReplayClient) the shared client.
+
+    Args:
+        client: Client to share
+
+    Returns:
+        The new shared client
+    """
+    global _shared_client
+    if _shared_client is not None and _shared_client is not client:
+        _shared_client.close()
+    _shared_client = client
+    return _shared_client
+
+
+def get_client() -> GraphQLClient:
+    """
+    Get the process-wide shared client, creating it with defaults if needed.
+
+    Returns:
+        Shared GraphQLClient (with the default token cache)
+    """
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = GraphQLClient(token_cache=TokenCache())
+    return _shared_client
+
+
+def add_graphql_arguments(parser):
+    """
+    Add the shared GraphQL client options to an importer's argument parser.
+
+    Args:
+        parser: argparse.ArgumentParser to extend
+    """
+    parser.add_argument(
+        "--http-timeout",
+        type=float,
+        default=DEFAULT_READ_TIMEOUT,
+        help=f"GraphQL read timeout in seconds (default: {DEFAULT_READ_TIMEOUT:.0f})"
+    )
+    parser.add_argument(
+        "--http-retries",
+        type=int,
+        default=DEFAULT_MAX_RETRIES,
+        help=f"Retries for transient GraphQL failures (default: {DEFAULT_MAX_RETRIES})"
+    )
+    parser.add_argument(
+        "--token-cache",
+        default=os.getenv("SIDESPINS_TOKEN_CACHE", DEFAULT_TOKEN_CACHE_PATH),
+        help="Access token cache file (default: ~/.cache/sidespins/apa-tokens.json)"
+    )
+    parser.add_argument(
+        "--no-token-cache",
+        action="store_true",
+        help="Always mint a new access token instead of reusing a cached one"
+    )
+    replay = parser.add_mutually_exclusive_group()
+    replay.add_argument(
+        "--from-file",
+        help="Replay a captured GraphQL response file instead of calling the API"
+    )
+    replay.add_argument(
+        "--from-dir",
+        help="Replay captured GraphQL responses from a --capture-dir directory"
+    )
+    parser.add_argument(
+        "--capture-dir",
+        help="Save live GraphQL responses to this directory for later replay"
+    )
+
+
+def configure_client_from_args(args) -> GraphQLClient:
+    """
+    Configure the shared client from options added by add_graphql_arguments().
+
+    Args:
+        args: Parsed argparse namespace
+
+    Returns:
+        The new shared client (a ReplayClient with --from-file / --from-dir)
+    """
+    if args.from_file or args.from_dir:
+        return use_client(ReplayClient(from_file=args.from_file, from_dir=args.from_dir))
+
+    if not args.refresh_token:
+        raise Exception("--refresh-token is required unless replaying with --from-file or --from-dir")
+
+    return configure_client(
+        read_timeout=args.http_timeout,
+        max_retries=args.http_retries,
+        token_cache=None if args.no_token_cache else TokenCache(args.token_cache),
+        capture_dir=args.capture_dir
+    )
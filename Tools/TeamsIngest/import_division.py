@@ -14,31 +14,105 @@ Usage:
         --cosmos-key "..." \\
         --cosmos-db "sidespins" \\
         --what-if
+
+    # Weekly refresh: patch skill levels and roster changes of existing teams
+    python import_division.py --division-id 418320 --refresh-token "eyJhbGc..." \\
+        --division-name "Nottingham Wednesday 8-Ball" --sync \\
+        --cosmos-uri "https://..." --cosmos-key "..." --cosmos-db "sidespins"
+
+    # Replay a captured API response (no network access or refresh token needed)
+    python import_division.py --division-id 418320 --from-file divisionRosters.json \\
+        --division-name "Nottingham Wednesday 8-Ball" \\
+        --cosmos-uri "https://..." --cosmos-key "..." --cosmos-db "sidespins"
 """
 
 import argparse
 import json
+import os
 import re
 import sys
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
-import requests
 from azure.cosmos import CosmosClient, exceptions
 
+from cosmos_batch import execute_with_conflict_retry, with_if_match
+from cosmos_metrics import CosmosMetrics, phase
+from cosmos_throttle import RuThrottle, throttle_writes
+from cosmos_throughput import boosted_throughput
+from doc_diff import has_changes
+from graphql_client import GraphQLClient, GraphQLError, add_graphql_arguments, configure_client_from_args, get_client
+from import_schedule import load_division_teams, team_apa_id
+from index_cache import DEFAULT_INDEX_CACHE_PATH, PLAYER_SCOPE, IndexCache, cached_query, cached_read_players, remember
 
-# GraphQL API Configuration
-GRAPHQL_ENDPOINT = "https://gql.poolplayers.com/graphql"
-GRAPHQL_HEADERS = {
-    "accept": "*/*",
-    "accept-language": "en-US,en;q=0.9",
-    "apollographql-client-name": "MemberServices",
-    "apollographql-client-version": "3.18.44-3550",
-    "content-type": "application/json",
-    "origin": "https://league.poolplayers.com",
-    "referer": "https://league.poolplayers.com/",
-    "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+
+# Membership fields kept in sync with the API roster by --sync
+SKILL_LEVEL_FIELDS = ("skillLevel_8b", "skillLevel_9b")
+
+DIVISION_ROSTERS_QUERY = """
+query divisionRosters($id: Int!) {
+    division(id: $id) {
+        id
+        teams {
+            isBye
+            ...rosterComponent
+            location {
+                id
+                name
+                address {
+                    id
+                    name
+                    __typename
+                }
+                __typename
+            }
+            __typename
+        }
+        __typename
+    }
+}
+
+fragment rosterComponent on Team {
+    id
+    name
+    number
+    league {
+        id
+        slug
+        __typename
+    }
+    division {
+        id
+        type
+        __typename
+    }
+    roster {
+        id
+        memberNumber
+        displayName
+        matchesWon
+        matchesPlayed
+        ... on EightBallPlayer {
+            pa
+            ppm
+            skillLevel
+            __typename
+        }
+        ... on NineBallPlayer {
+            pa
+            ppm
+            skillLevel
+            __typename
+        }
+        member {
+            id
+            __typename
+        }
+        __typename
+    }
+    __typename
 }
+"""
 
 
 def slugify(text: str) -> str:
@@ -92,56 +166,31 @@ def split_display_name(display_name: str) -> Tuple[str, str]:
     return "", ""
 
 
-def fetch_access_token(refresh_token: str) -> str:
+def division_rosters_operation(division_id: int) -> Dict:
     """
-    Fetch an access token from the GraphQL API using a refresh token.
+    Build the GraphQL operation that fetches one division's rosters.
     
     Args:
-        refresh_token: The refresh token for authentication
+        division_id: The division ID to fetch
         
     Returns:
-        Access token string
-        
-    Raises:
-        Exception: If the API request fails
+        GraphQL operation dict (sent alone or batched with other operations)
     """
-    query = """
-    mutation GenerateAccessTokenMutation($refreshToken: String!) {
-        generateAccessToken(refreshToken: $refreshToken) {
-            accessToken
-            __typename
-        }
+    return {
+        "operationName": "divisionRosters",
+        "variables": {"id": division_id},
+        "query": DIVISION_ROSTERS_QUERY
     }
-    """
-    
-    payload = [{
-        "operationName": "GenerateAccessTokenMutation",
-        "variables": {"refreshToken": refresh_token},
-        "query": query
-    }]
-    
-    headers = GRAPHQL_HEADERS.copy()
-    
-    print("Fetching access token...")
-    response = requests.post(GRAPHQL_ENDPOINT, headers=headers, json=payload)
-    response.raise_for_status()
-    
-    data = response.json()
-    if not data or not data[0].get("data", {}).get("generateAccessToken"):
-        raise Exception(f"Failed to get access token: {data}")
-    
-    access_token = data[0]["data"]["generateAccessToken"]["accessToken"]
-    print(f"✓ Access token obtained")
-    return access_token
 
 
-def fetch_division_rosters(access_token: str, division_id: int) -> Dict:
+def fetch_division_rosters(access_token: str, division_id: int, client: GraphQLClient = None) -> Dict:
     """
     Fetch division roster data from the GraphQL API.
     
     Args:
         access_token: The access token for authentication
         division_id: The division ID to fetch
+        client: GraphQL client to use (defaults to the shared client)
         
     Returns:
         Division data dictionary
@@ -149,141 +198,117 @@ def fetch_division_rosters(access_token: str, division_id: int) -> Dict:
     Raises:
         Exception: If the API request fails
     """
-    query = """
-    query divisionRosters($id: Int!) {
-        division(id: $id) {
-            id
-            teams {
-                isBye
-                ...rosterComponent
-                location {
-                    id
-                    name
-                    address {
-                        id
-                        name
-                        __typename
-                    }
-                    __typename
-                }
-                __typename
-            }
-            __typename
-        }
-    }
-
-    fragment rosterComponent on Team {
-        id
-        name
-        number
-        league {
-            id
-            slug
-            __typename
-        }
-        division {
-            id
-            type
-            __typename
-        }
-        roster {
-            id
-            memberNumber
-            displayName
-            matchesWon
-            matchesPlayed
-            ... on EightBallPlayer {
-                pa
-                ppm
-                skillLevel
-                __typename
-            }
-            ... on NineBallPlayer {
-                pa
-                ppm
-                skillLevel
-                __typename
-            }
-            member {
-                id
-                __typename
-            }
-            __typename
-        }
-        __typename
-    }
-    """
-    
-    payload = [{
-        "operationName": "divisionRosters",
-        "variables": {"id": division_id},
-        "query": query
-    }]
-    
-    headers = GRAPHQL_HEADERS.copy()
-    headers["authorization"] = access_token
-    
     print(f"Fetching division {division_id} rosters...")
-    response = requests.post(GRAPHQL_ENDPOINT, headers=headers, json=payload)
-    response.raise_for_status()
-    
-    data = response.json()
-    if not data or not data[0].get("data", {}).get("division"):
-        raise Exception(f"Failed to get division rosters: {data}")
+    [result] = (client or get_client()).execute_batch([division_rosters_operation(division_id)], access_token)
+    if isinstance(result, GraphQLError) or not result.get("division"):
+        raise Exception(f"Failed to get division rosters: {result}")
     
-    division_data = data[0]["data"]["division"]
+    division_data = result["division"]
     team_count = len([t for t in division_data["teams"] if not t.get("isBye")])
     print(f"✓ Division data received: {team_count} teams")
     return division_data
 
 
-def check_player_exists(players_container, apa_number: str) -> Optional[Dict]:
+def division_member_numbers(division_data: Dict, skip_apa_team_ids=()) -> List[str]:
+    """
+    Collect the APA member numbers of every rostered player in a division.
+    
+    Args:
+        division_data: Raw GraphQL division data
+        skip_apa_team_ids: APA team IDs whose rosters to leave out (e.g. existing teams)
+        
+    Returns:
+        Sorted, de-duplicated list of member numbers
+    """
+    return sorted({
+        roster_entry["memberNumber"]
+        for team_data in division_data["teams"]
+        if not team_data.get("isBye") and str(team_data["id"]) not in skip_apa_team_ids
+        for roster_entry in team_data.get("roster", [])
+    })
+
+
+def load_players(players_container, apa_numbers: List[str], cache: IndexCache = None) -> Dict[str, Dict]:
     """
-    Check if a player already exists in the database by APA number.
+    Look up many players at once with a single bulk read.
     
     Args:
         players_container: Cosmos DB players container client
-        apa_number: APA member number to check
+        apa_numbers: APA member numbers to look up
+        cache: Local index cache to serve unchanged players from (optional)
         
     Returns:
-        Existing player document or None
+        Dict mapping player IDs (p_{memberNumber}) to existing player documents
+    """
+    # Players are partitioned by /id, so each player is read as (id, id)
+    player_ids = [f"p_{apa_number}" for apa_number in apa_numbers]
+    return {player["id"]: player for player in cached_read_players(players_container, cache, player_ids)}
+
+
+def load_teams_by_apa_id(teams_container, division_id: str, cache: IndexCache = None) -> Dict[str, Dict]:
+    """
+    Load a division's stored teams once and index them by APA team ID.
+    
+    Uses the same apaTeamId fallback as import_schedule.build_team_mapping_from_db().
+    
+    Args:
+        teams_container: Cosmos DB teams container client
+        division_id: Division ID (the Teams partition key)
+        cache: Local index cache to serve unchanged teams from (optional)
+        
+    Returns:
+        Dict mapping APA team IDs to stored team documents
+    """
+    teams_by_apa_id = {}
+    for team in load_division_teams(teams_container, division_id, cache):
+        apa_team_id = team_apa_id(team)
+        if apa_team_id:
+            teams_by_apa_id[apa_team_id] = team
+    return teams_by_apa_id
+
+
+def check_division_exists(divisions_container, division_id: str) -> Optional[Dict]:
+    """
+    Read the stored division document, if any.
+    
+    Args:
+        divisions_container: Cosmos DB divisions container client
+        division_id: Division ID (also the partition key)
+        
+    Returns:
+        Existing division document or None
     """
-    player_id = f"p_{apa_number}"
     try:
-        existing_player = players_container.read_item(
-            item=player_id,
-            partition_key=player_id
+        return divisions_container.read_item(
+            item=division_id,
+            partition_key=division_id
         )
-        return existing_player
     except exceptions.CosmosResourceNotFoundError:
         return None
 
 
-def check_team_exists(teams_container, apa_team_id: str, division_id: str) -> Optional[Dict]:
+def load_team_memberships(memberships_container, team_id: str, cache: IndexCache = None) -> Dict[str, Dict]:
     """
-    Check if a team already exists in the database by APA team ID.
+    Load all stored memberships for a team in a single-partition query.
     
     Args:
-        teams_container: Cosmos DB teams container client
-        apa_team_id: APA team ID to check
-        division_id: Division partition key
+        memberships_container: Cosmos DB memberships container client
+        team_id: Team ID (partition key)
+        cache: Local index cache to serve unchanged memberships from (optional)
         
     Returns:
-        Existing team document or None
+        Dict mapping membership IDs to membership documents
     """
-    query = "SELECT * FROM c WHERE c.apaTeamId = @apaTeamId AND c.divisionId = @divisionId"
-    parameters = [
-        {"name": "@apaTeamId", "value": apa_team_id},
-        {"name": "@divisionId", "value": division_id}
-    ]
-    
-    items = list(teams_container.query_items(
-        query=query,
-        parameters=parameters,
-        enable_cross_partition_query=True
-    ))
+    items = cached_query(
+        memberships_container,
+        cache,
+        "c.teamId = @teamId",
+        [{"name": "@teamId", "value": team_id}],
+        partition_key=team_id,
+        scope=f"teamId={team_id}"
+    )
     
-    return items[0] if items else None
+    return {item["id"]: item for item in items}
 
 
 def compare_names(display_name: str, first_name: str, last_name: str) -> bool:
@@ -438,213 +463,730 @@ def transform_membership(
     return membership
 
 
-def import_division(
-    division_id: int,
-    refresh_token: str,
-    division_name: str,
-    cosmos_uri: str,
-    cosmos_key: str,
-    cosmos_db: str,
-    what_if: bool = False,
-    sidespins_division_id: str = None
-):
+def membership_patch_operations(membership_doc: Dict, stored_membership: Dict) -> List[Dict]:
     """
-    Main import function to fetch and import division data.
+    Build the partial-document patch that brings a stored membership up to date.
+    
+    Only the skill level and a previous departure (leftAt) are synced; every other
+    field keeps its stored value.
     
     Args:
-        division_id: Division ID to import
-        refresh_token: API refresh token
-        division_name: Human-readable division name
-        cosmos_uri: Cosmos DB endpoint URI
-        cosmos_key: Cosmos DB access key
-        cosmos_db: Cosmos DB database name
-        what_if: If True, preview changes without committing
-        sidespins_division_id: Existing SideSpins division ID to import into (optional)
+        membership_doc: Newly transformed membership for a rostered player
+        stored_membership: Membership currently in the database
+        
+    Returns:
+        Patch operations, empty if nothing changed
     """
-    timestamp = datetime.utcnow().isoformat() + 'Z'
+    operations = []
+    for field in SKILL_LEVEL_FIELDS:
+        if field in membership_doc and stored_membership.get(field) != membership_doc[field]:
+            operations.append({"op": "set", "path": f"/{field}", "value": membership_doc[field]})
+    if stored_membership.get("leftAt"):
+        # Player is back on the roster
+        operations.append({"op": "set", "path": "/leftAt", "value": None})
+    return operations
+
+
+def new_division_stats() -> Dict:
+    """
+    Create an empty statistics dict for a roster import.
     
-    # Statistics tracking
-    stats = {
+    Returns:
+        Statistics dict with all counters at zero
+    """
+    return {
         "divisions_created": 0,
+        "divisions_unchanged": 0,
         "teams_created": 0,
+        "teams_skipped": 0,
+        "teams_synced": 0,
+        "teams_failed": 0,
         "players_created": 0,
         "players_skipped": 0,
         "memberships_created": 0,
+        "memberships_updated": 0,
+        "memberships_left": 0,
+        "memberships_unchanged": 0,
+        "memberships_failed": 0,
+        "memberships_conflicts": 0,
         "warnings": []
     }
+
+
+def plan_roster_player(
+    roster_entry: Dict,
+    is_captain: bool,
+    timestamp: str,
+    plan: Dict,
+    stats: Dict,
+    find_player: Callable[[str], Optional[Dict]],
+    what_if: bool = False
+):
+    """
+    Queue a new Player document for a roster entry, or note the existing one.
     
-    # Fetch data from API
-    access_token = fetch_access_token(refresh_token)
-    division_data = fetch_division_rosters(access_token, division_id)
-    
-    # Connect to Cosmos DB (always connect for existence checks, even in what-if mode)
-    print(f"\nConnecting to Cosmos DB: {cosmos_db}...")
-    client = CosmosClient(cosmos_uri, cosmos_key)
-    database = client.get_database_client(cosmos_db)
-    divisions_container = database.get_container_client("Divisions")
-    teams_container = database.get_container_client("Teams")
-    players_container = database.get_container_client("Players")
-    memberships_container = database.get_container_client("TeamMemberships")
-    print("✓ Connected to Cosmos DB")
-    
-    if what_if:
-        print("\n[WHAT-IF MODE] - No changes will be made to the database")
+    Args:
+        roster_entry: Raw GraphQL roster data
+        is_captain: Whether the entry is the team captain
+        timestamp: ISO timestamp for createdAt
+        plan: Team plan to add new players to
+        stats: Statistics dict to update
+        find_player: Returns the stored player for an APA member number, or None
+        what_if: If True, print previews instead of write notes
+    """
+    apa_number = roster_entry["memberNumber"]
+    display_name = roster_entry["displayName"]
+    skill_level = roster_entry.get("skillLevel", "?")
     
-    # Transform and import division
-    print(f"\n{'='*60}")
-    print("DIVISION")
-    print(f"{'='*60}")
+    # Check if player exists
+    existing_player = find_player(apa_number)
     
-    if sidespins_division_id:
-        # Use existing division
-        print(f"Using existing SideSpins division: {sidespins_division_id}")
-        division_doc = {"id": sidespins_division_id}
-        stats["divisions_created"] = 0
+    if existing_player:
+        # Player exists - check for name mismatch
+        if not compare_names(
+            display_name,
+            existing_player.get("firstName", ""),
+            existing_player.get("lastName", "")
+        ):
+            warning = (
+                f"Name mismatch for APA#{apa_number}: "
+                f"API='{display_name}' vs "
+                f"DB='{existing_player.get('firstName', '')} {existing_player.get('lastName', '')}'"
+            )
+            print(f"  ⚠  {display_name} (APA#{apa_number}) - {warning}")
+            stats["warnings"].append(warning)
+        else:
+            print(f"  ○ {display_name} (APA#{apa_number}, SL{skill_level}) - Exists{' [CAPTAIN]' if is_captain else ''}")
+        stats["players_skipped"] += 1
     else:
-        # Create new division from APA data
-        division_doc = transform_division(division_data, division_name, timestamp)
+        # Create new player
+        plan["players"].append(transform_player(roster_entry, timestamp))
         
         if what_if:
-            print(f"[WHAT-IF] Would create/update division:")
-            print(json.dumps(division_doc, indent=2))
-            stats["divisions_created"] = 1
+            print(f"  [WHAT-IF] Would create player: {display_name} (APA#{apa_number}, SL{skill_level}){' [CAPTAIN]' if is_captain else ''}")
         else:
-            divisions_container.upsert_item(division_doc)
-            print(f"✓ Division upserted: {division_doc['id']}")
-            stats["divisions_created"] = 1
+            print(f"  + {display_name} (APA#{apa_number}, SL{skill_level}) - New{' [CAPTAIN]' if is_captain else ''}")
+        stats["players_created"] += 1
+
+
+def plan_roster_sync(
+    team_data: Dict,
+    existing_team: Dict,
+    division_id: str,
+    timestamp: str,
+    stats: Dict,
+    find_player: Callable[[str], Optional[Dict]],
+    find_memberships: Callable[[str], Dict[str, Dict]],
+    what_if: bool = False
+) -> Dict:
+    """
+    Diff an existing team's API roster against its stored memberships.
     
-    # Process teams
-    print(f"\n{'='*60}")
-    print("TEAMS & PLAYERS")
-    print(f"{'='*60}")
+    New roster entries get a membership, changed skill levels are patched, and
+    players no longer on the roster get leftAt set. The team document itself is
+    left as stored.
     
-    for team_data in division_data["teams"]:
-        # Skip bye teams
-        if team_data.get("isBye"):
-            print(f"\nSkipping bye team: {team_data.get('name', 'Unknown')}")
-            continue
+    Args:
+        team_data: Raw GraphQL team data
+        existing_team: Stored team document
+        division_id: SideSpins division ID the team belongs to
+        timestamp: ISO timestamp for joinedAt/leftAt
+        stats: Statistics dict to update
+        find_player: Returns the stored player for an APA member number, or None
+        find_memberships: Returns stored memberships for a team ID, keyed by ID
+        what_if: If True, print previews instead of write notes
+        
+    Returns:
+        Team plan as returned by plan_team_import()
+    """
+    team_id = existing_team["id"]
+    roster = team_data.get("roster", [])
+    division_type = team_data.get("division", {}).get("type", "EIGHT")
+    print(f"\n--- Team: {clean_team_name(team_data['name'])} (#{team_data.get('number', 'N/A')}) - syncing roster ---")
+    stats["teams_synced"] += 1
+    
+    plan = {
+        "team": existing_team,
+        "write_team": False,
+        "players": [],
+        "memberships": [],
+        "patches": []
+    }
+    existing_memberships = find_memberships(team_id)
+    rostered_ids = set()
+    
+    print(f"  Players ({len(roster)}):")
+    for idx, roster_entry in enumerate(roster):
+        plan_roster_player(roster_entry, idx == 0, timestamp, plan, stats, find_player, what_if)
         
-        # Skip teams that already exist in the database
-        apa_team_id = str(team_data["id"])
-        existing_team = check_team_exists(teams_container, apa_team_id, division_doc["id"])
+        membership_doc = transform_membership(
+            roster_entry,
+            team_id,
+            division_id,
+            f"p_{roster_entry['memberNumber']}",
+            division_type,
+            timestamp
+        )
+        rostered_ids.add(membership_doc["id"])
+        stored_membership = existing_memberships.get(membership_doc["id"])
         
-        if existing_team:
-            print(f"\nSkipping existing team (APA ID {apa_team_id}): {team_data.get('name', 'Unknown')}")
-            stats["teams_skipped"] = stats.get("teams_skipped", 0) + 1
+        if stored_membership is None:
+            plan["memberships"].append(membership_doc)
+            print(f"    {'[WHAT-IF] Would add' if what_if else '+ Adding'} membership {membership_doc['id']}")
+            stats["memberships_created"] += 1
             continue
         
-        roster = team_data.get("roster", [])
-        if not roster:
-            print(f"\nSkipping team with no roster: {team_data.get('name', 'Unknown')}")
+        operations = membership_patch_operations(membership_doc, stored_membership)
+        if operations:
+            plan["patches"].append({
+                "id": membership_doc["id"],
+                "operations": operations,
+                "outcome": "updated",
+                "etag": stored_membership.get("_etag"),
+                "membership": membership_doc
+            })
+            changes = ", ".join(f"{op['path'].lstrip('/')}={op['value']}" for op in operations)
+            print(f"    {'[WHAT-IF] Would patch' if what_if else '~ Patching'} {membership_doc['id']}: {changes}")
+            stats["memberships_updated"] += 1
+        else:
+            stats["memberships_unchanged"] += 1
+    
+    # Players who left the roster keep their membership with leftAt set. Memberships
+    # with other roles (managers, admins) are not part of the APA roster.
+    for membership_id, stored_membership in sorted(existing_memberships.items()):
+        if (
+            membership_id in rostered_ids
+            or stored_membership.get("leftAt")
+            or stored_membership.get("role", "player") != "player"
+        ):
             continue
+        plan["patches"].append({
+            "id": membership_id,
+            "operations": [{"op": "set", "path": "/leftAt", "value": timestamp}],
+            "outcome": "left",
+            "etag": stored_membership.get("_etag"),
+            "membership": None
+        })
+        print(f"  {'[WHAT-IF] Would mark' if what_if else '- Marking'} {stored_membership.get('playerId')} as left")
+        stats["memberships_left"] += 1
+    
+    return plan
+
+
+def plan_team_import(
+    team_data: Dict,
+    division_id: str,
+    timestamp: str,
+    stats: Dict,
+    find_team: Callable[[str], Optional[Dict]],
+    find_player: Callable[[str], Optional[Dict]],
+    find_memberships: Callable[[str], Dict[str, Dict]],
+    what_if: bool = False,
+    sync: bool = False
+) -> Optional[Dict]:
+    """
+    Decide which documents to write for one API team.
+    
+    Existing data is looked up through the supplied callables, so the same
+    planning runs against live Cosmos DB reads or prefetched dicts.
+    
+    Args:
+        team_data: Raw GraphQL team data
+        division_id: SideSpins division ID the team belongs to
+        timestamp: ISO timestamp for createdAt/joinedAt
+        stats: Statistics dict to update
+        find_team: Returns the stored team for an APA team ID, or None
+        find_player: Returns the stored player for an APA member number, or None
+        find_memberships: Returns stored memberships for a team ID, keyed by ID
+        what_if: If True, print previews instead of write notes
+        sync: If True, sync the rosters of existing teams instead of skipping them
         
-        # Get division type for this team
-        division_type = team_data.get("division", {}).get("type", "EIGHT")
-        
-        # Clean team name for display
-        clean_name = clean_team_name(team_data["name"])
-        print(f"\n--- Team: {clean_name} (#{team_data.get('number', 'N/A')}) ---")
-        
-        # First roster player is captain
-        captain_roster_entry = roster[0]
-        captain_apa_number = captain_roster_entry["memberNumber"]
-        captain_player_id = f"p_{captain_apa_number}"
+    Returns:
+        Dict with the "team" document (written if "write_team"), new "players"
+        and "memberships" documents, and membership "patches" ({id, operations,
+        outcome, etag, membership}), or None if the team is skipped
+    """
+    # Skip bye teams
+    if team_data.get("isBye"):
+        print(f"\nSkipping bye team: {team_data.get('name', 'Unknown')}")
+        return None
+    
+    # Skip teams that already exist in the database unless syncing
+    apa_team_id = str(team_data["id"])
+    existing_team = find_team(apa_team_id)
+    
+    if existing_team and not sync:
+        print(f"\nSkipping existing team (APA ID {apa_team_id}): {team_data.get('name', 'Unknown')}")
+        stats["teams_skipped"] += 1
+        return None
+    
+    roster = team_data.get("roster", [])
+    if not roster:
+        print(f"\nSkipping team with no roster: {team_data.get('name', 'Unknown')}")
+        return None
+    
+    if existing_team:
+        return plan_roster_sync(
+            team_data, existing_team, division_id, timestamp, stats, find_player, find_memberships, what_if
+        )
+    
+    # Get division type for this team
+    division_type = team_data.get("division", {}).get("type", "EIGHT")
+    
+    # Clean team name for display
+    clean_name = clean_team_name(team_data["name"])
+    print(f"\n--- Team: {clean_name} (#{team_data.get('number', 'N/A')}) ---")
+    
+    # First roster player is captain
+    captain_roster_entry = roster[0]
+    captain_apa_number = captain_roster_entry["memberNumber"]
+    captain_player_id = f"p_{captain_apa_number}"
+    
+    # Transform team
+    team_doc = transform_team(
+        team_data,
+        division_id,
+        captain_player_id,
+        timestamp
+    )
+    
+    if what_if:
+        print(f"[WHAT-IF] Would create/update team:")
+        print(json.dumps(team_doc, indent=2))
+    stats["teams_created"] += 1
+    
+    plan = {
+        "team": team_doc,
+        "write_team": True,
+        "players": [],
+        "memberships": [],
+        "patches": []
+    }
+    
+    # Load stored memberships so unchanged ones are not rewritten
+    existing_memberships = find_memberships(team_doc["id"])
+    
+    # Process players and memberships
+    print(f"  Players ({len(roster)}):")
+    for idx, roster_entry in enumerate(roster):
+        plan_roster_player(roster_entry, idx == 0, timestamp, plan, stats, find_player, what_if)
         
-        # Transform team
-        team_doc = transform_team(
-            team_data,
-            division_doc["id"],
-            captain_player_id,
+        # Create membership
+        membership_doc = transform_membership(
+            roster_entry,
+            team_doc["id"],
+            division_id,
+            f"p_{roster_entry['memberNumber']}",
+            division_type,
             timestamp
         )
         
-        if what_if:
-            print(f"[WHAT-IF] Would create/update team:")
-            print(json.dumps(team_doc, indent=2))
-            stats["teams_created"] += 1
+        stored_membership = existing_memberships.get(membership_doc["id"])
+        if not has_changes(membership_doc, stored_membership):
+            stats["memberships_unchanged"] += 1
         else:
-            teams_container.upsert_item(team_doc)
-            print(f"✓ Team upserted: {team_doc['id']}")
-            stats["teams_created"] += 1
+            # Count memberships in what-if mode too
+            plan["memberships"].append(membership_doc)
+            stats["memberships_created"] += 1
+    
+    return plan
+
+
+def membership_batch_operations(plan: Dict) -> List[Tuple]:
+    """
+    Build the transactional batch that writes a team's memberships.
+    
+    Every membership of a team shares the /teamId partition, so new memberships
+    and patches go to Cosmos DB in one round trip. Patches carry If-Match on the
+    ETag of the membership they were planned from.
+    
+    Args:
+        plan: Team plan from plan_team_import()
         
-        # Process players and memberships
-        print(f"  Players ({len(roster)}):")
-        for idx, roster_entry in enumerate(roster):
-            apa_number = roster_entry["memberNumber"]
-            player_id = f"p_{apa_number}"
-            display_name = roster_entry["displayName"]
-            skill_level = roster_entry.get("skillLevel", "?")
-            is_captain = (idx == 0)
-            
-            # Check if player exists
-            existing_player = check_player_exists(players_container, apa_number)
-            
-            if existing_player:
-                # Player exists - check for name mismatch
-                if not compare_names(
-                    display_name,
-                    existing_player.get("firstName", ""),
-                    existing_player.get("lastName", "")
-                ):
-                    warning = (
-                        f"Name mismatch for APA#{apa_number}: "
-                        f"API='{display_name}' vs "
-                        f"DB='{existing_player.get('firstName', '')} {existing_player.get('lastName', '')}'"
-                    )
-                    print(f"  ⚠  {display_name} (APA#{apa_number}) - {warning}")
-                    stats["warnings"].append(warning)
-                else:
-                    print(f"  ○ {display_name} (APA#{apa_number}, SL{skill_level}) - Exists{' [CAPTAIN]' if is_captain else ''}")
-                stats["players_skipped"] += 1
-            else:
-                # Create new player
-                player_doc = transform_player(roster_entry, timestamp)
-                
-                if what_if:
-                    print(f"  [WHAT-IF] Would create player: {display_name} (APA#{apa_number}, SL{skill_level}){' [CAPTAIN]' if is_captain else ''}")
-                    stats["players_created"] += 1
-                else:
-                    players_container.upsert_item(player_doc)
-                    print(f"  ✓ {display_name} (APA#{apa_number}, SL{skill_level}) - Created{' [CAPTAIN]' if is_captain else ''}")
-                    stats["players_created"] += 1
-            
-            # Create membership
-            membership_doc = transform_membership(
-                roster_entry,
-                team_doc["id"],
-                division_doc["id"],
-                player_id,
-                division_type,
-                timestamp
+    Returns:
+        Batch operation tuples for execute_with_conflict_retry(), upserts before patches
+    """
+    operations = [("upsert", (membership_doc,)) for membership_doc in plan["memberships"]]
+    operations += [
+        with_if_match(("patch", (patch["id"], patch["operations"])), patch["etag"])
+        for patch in plan["patches"]
+    ]
+    return operations
+
+
+def replan_membership_write(plan: Dict, index: int, stored: Optional[Dict]) -> Optional[Tuple]:
+    """
+    Rebuild a conflicting membership patch against a fresh read of the membership.
+    
+    Args:
+        plan: Team plan the batch was built from
+        index: Position of the operation in membership_batch_operations(plan)
+        stored: Re-read membership (None if it was deleted)
+        
+    Returns:
+        Batch operation to retry, or None if the write is no longer needed
+    """
+    patch_index = index - len(plan["memberships"])
+    if patch_index < 0 or stored is None:
+        return None
+    
+    patch = plan["patches"][patch_index]
+    if patch["outcome"] == "updated":
+        operations = membership_patch_operations(patch["membership"], stored)
+    elif stored.get("leftAt"):
+        operations = []
+    else:
+        operations = patch["operations"]
+    
+    if not operations:
+        return None
+    return with_if_match(("patch", (patch["id"], operations)), stored.get("_etag"))
+
+
+def record_membership_write_results(plan: Dict, results: List[Dict], stats: Dict) -> int:
+    """
+    Fold per-membership batch outcomes into the import statistics.
+    
+    Args:
+        plan: Team plan the batch was built from
+        results: Per-operation results from execute_with_conflict_retry()
+        stats: Statistics dict to update
+        
+    Returns:
+        Number of memberships that failed to write
+    """
+    writes = [(doc["id"], "created") for doc in plan["memberships"]]
+    writes += [(patch["id"], patch["outcome"]) for patch in plan["patches"]]
+    
+    failed = 0
+    for (membership_id, outcome), result in zip(writes, results):
+        stats["memberships_conflicts"] += result.get("conflicts", 0)
+        if result.get("superseded"):
+            # Changed in the app meanwhile and already up to date
+            print(f"  = {membership_id} - Already up to date after re-read")
+            stats[f"memberships_{outcome}"] -= 1
+            stats["memberships_unchanged"] += 1
+        elif not result["ok"]:
+            warning = (
+                f"Failed to write membership {membership_id} "
+                f"(status {result['status_code']}): {result['error']}"
             )
-            
-            if what_if:
-                # Count memberships in what-if mode too
-                stats["memberships_created"] += 1
-            else:
-                memberships_container.upsert_item(membership_doc)
-                stats["memberships_created"] += 1
+            print(f"  ❌ {warning}")
+            stats["warnings"].append(warning)
+            stats[f"memberships_{outcome}"] -= 1
+            stats["memberships_failed"] += 1
+            failed += 1
+    return failed
+
+
+def record_incomplete_team(plan: Dict, failed: int, stats: Dict, kind: str = "memberships"):
+    """
+    Report a team whose players or memberships did not all reach the database.
+    
+    Args:
+        plan: Team plan that was not completed
+        failed: Number of writes that failed
+        stats: Statistics dict to update
+        kind: "memberships", or "players" when player upserts failed (the
+            memberships and team are then not written)
+    """
+    if kind == "players":
+        writes = len(plan["players"])
+    else:
+        writes = len(plan["memberships"]) + len(plan["patches"])
+    if plan["write_team"]:
+        warning = (
+            f"Team {plan['team']['id']} not written: {failed} of {writes} "
+            f"{kind} failed (the next import retries the team)"
+        )
+        stats["teams_created"] -= 1
+    else:
+        warning = (
+            f"Roster sync for team {plan['team']['id']} incomplete: {failed} of {writes} "
+            f"{kind[:-1]} writes failed (the next sync retries them)"
+        )
+        stats["teams_synced"] -= 1
+    print(f"  ❌ {warning}")
+    stats["warnings"].append(warning)
+    stats["teams_failed"] += 1
+
+
+def write_team_plan(
+    teams_container,
+    players_container,
+    memberships_container,
+    plan: Dict,
+    stats: Dict,
+    cache: IndexCache = None
+) -> bool:
+    """
+    Write the documents planned for one team by plan_team_import().
+    
+    Memberships are written as one transactional batch on the team's partition.
+    A new team document is written last: existing teams are skipped on the next
+    import, so a team is only stored once its roster is complete.
+    
+    Args:
+        teams_container: Cosmos DB teams container client
+        players_container: Cosmos DB players container client
+        memberships_container: Cosmos DB memberships container client
+        plan: Team plan from plan_team_import()
+        stats: Statistics dict to update with failed memberships
+        cache: Local index cache to store the written documents in (optional)
+        
+    Returns:
+        True if every document was written, False if memberships failed
+    """
+    written_players = [players_container.upsert_item(player_doc) for player_doc in plan["players"]]
+    remember(cache, players_container, PLAYER_SCOPE, written_players)
     
-    # Print summary
+    results = execute_with_conflict_retry(
+        memberships_container,
+        membership_batch_operations(plan),
+        plan["team"]["id"],
+        replan=lambda index, stored: replan_membership_write(plan, index, stored)
+    )
+    remember(cache, memberships_container, f"teamId={plan['team']['id']}", [result["body"] for result in results])
+    failed = record_membership_write_results(plan, results, stats)
+    if failed:
+        record_incomplete_team(plan, failed, stats)
+        return False
+    
+    if not plan["write_team"] and not (plan["players"] or plan["memberships"] or plan["patches"]):
+        print(f"= Team roster unchanged: {plan['team']['id']}")
+        return True
+    if not plan["write_team"]:
+        print(
+            f"✓ Team synced: {plan['team']['id']} ({len(plan['players'])} new players, "
+            f"{len(plan['memberships'])} memberships added, {len(plan['patches'])} patched)"
+        )
+        return True
+    
+    written_team = teams_container.upsert_item(plan["team"])
+    remember(cache, teams_container, f"divisionId={plan['team']['divisionId']}", [written_team])
+    print(
+        f"✓ Team upserted: {plan['team']['id']} "
+        f"({len(plan['players'])} new players, {len(plan['memberships'])} memberships in one batch)"
+    )
+    return True
+
+
+def print_division_summary(
+    stats: Dict,
+    what_if: bool = False,
+    graphql: GraphQLClient = None,
+    metrics: CosmosMetrics = None,
+    cache: IndexCache = None,
+    throttle: RuThrottle = None,
+    footer: bool = True
+):
+    """
+    Print the IMPORT SUMMARY block for a roster import.
+    
+    Args:
+        stats: Statistics dict from the import
+        what_if: Whether the import ran in preview mode
+        graphql: GraphQL client whose request counters to report (optional)
+        metrics: Cosmos DB request charge/latency metrics to report (optional)
+        cache: Local index cache whose hit counters to report (optional)
+        throttle: Write throttle whose counters to report (optional)
+        footer: Whether to end with the completion/WHAT-IF line (off when a caller
+            prints one footer for several summaries)
+    """
     print(f"\n{'='*60}")
     print("IMPORT SUMMARY")
     print(f"{'='*60}")
-    print(f"Divisions:   {stats['divisions_created']} created/updated")
-    print(f"Teams:       {stats['teams_created']} created/updated")
+    print(f"Divisions:   {stats['divisions_created']} created/updated, {stats['divisions_unchanged']} unchanged")
+    print(
+        f"Teams:       {stats['teams_created']} created/updated, {stats['teams_synced']} synced, "
+        f"{stats['teams_skipped']} skipped (existing), {stats['teams_failed']} failed"
+    )
     print(f"Players:     {stats['players_created']} created, {stats['players_skipped']} skipped (existing)")
-    print(f"Memberships: {stats['memberships_created']} created/updated")
+    print(
+        f"Memberships: {stats['memberships_created']} created/updated, {stats['memberships_updated']} patched, "
+        f"{stats['memberships_left']} left, {stats['memberships_unchanged']} unchanged, "
+        f"{stats['memberships_failed']} failed"
+    )
+    if stats["memberships_conflicts"]:
+        print(f"Conflicts:   {stats['memberships_conflicts']} membership writes retried (changed during the import)")
+    if graphql:
+        graphql.print_stats()
+    if metrics:
+        metrics.print_summary()
+    if cache:
+        cache.print_stats()
+    if throttle:
+        throttle.print_stats()
     
     if stats["warnings"]:
         print(f"\n⚠ WARNINGS ({len(stats['warnings'])}):")
         for warning in stats["warnings"]:
             print(f"  - {warning}")
     
+    if not footer:
+        return
     if what_if:
         print("\n[WHAT-IF MODE] - No actual changes were made")
+    elif stats["teams_failed"]:
+        print(f"\n⚠ Import completed with {stats['teams_failed']} incomplete teams")
     else:
         print("\n✓ Import completed successfully")
 
 
+def import_division(
+    division_id: int,
+    refresh_token: str,
+    division_name: str,
+    cosmos_uri: str,
+    cosmos_key: str,
+    cosmos_db: str,
+    what_if: bool = False,
+    sidespins_division_id: str = None,
+    cosmos_client=None,
+    metrics_json: str = None,
+    sync: bool = False,
+    index_cache: str = None,
+    ru_budget: float = None,
+    boost_ru: int = None
+):
+    """
+    Main import function to fetch and import division data.
+    
+    Args:
+        division_id: Division ID to import
+        refresh_token: API refresh token
+        division_name: Human-readable division name
+        cosmos_uri: Cosmos DB endpoint URI
+        cosmos_key: Cosmos DB access key
+        cosmos_db: Cosmos DB database name
+        what_if: If True, preview changes without committing
+        sidespins_division_id: Existing SideSpins division ID to import into (optional)
+        cosmos_client: Cosmos client to use instead of connecting with cosmos_uri/cosmos_key
+        metrics_json: Path to write Cosmos DB request charge/latency metrics to (optional)
+        sync: If True, sync the rosters of existing teams instead of skipping them
+        index_cache: Path of a local SQLite index cache to look documents up in (optional)
+        ru_budget: Throttle writes to this many RU/s (optional)
+        boost_ru: Raise the containers' throughput to this many RU/s during the import (optional)
+    """
+    timestamp = datetime.utcnow().isoformat() + 'Z'
+    
+    # Statistics tracking
+    stats = new_division_stats()
+    metrics = CosmosMetrics()
+    throttle = RuThrottle(ru_budget) if ru_budget else None
+    
+    # Fetch data from API
+    graphql = get_client()
+    access_token = graphql.authenticate(refresh_token)
+    division_data = fetch_division_rosters(access_token, division_id, graphql)
+    
+    # Connect to Cosmos DB (always connect for existence checks, even in what-if mode)
+    print(f"\nConnecting to Cosmos DB: {cosmos_db}...")
+    client = cosmos_client or CosmosClient(cosmos_uri, cosmos_key)
+    database = client.get_database_client(cosmos_db)
+    divisions_container = throttle_writes(throttle, metrics.wrap(database.get_container_client("Divisions")))
+    teams_container = throttle_writes(throttle, metrics.wrap(database.get_container_client("Teams")))
+    players_container = throttle_writes(throttle, metrics.wrap(database.get_container_client("Players")))
+    memberships_container = throttle_writes(throttle, metrics.wrap(database.get_container_client("TeamMemberships")))
+    print("✓ Connected to Cosmos DB")
+    cache = IndexCache(index_cache) if index_cache else None
+    
+    # Containers the import writes to, boosted for its duration with --boost-ru
+    boost_containers = [
+        database.get_container_client(name)
+        for name in ("Divisions", "Teams", "Players", "TeamMemberships")
+        if not (name == "Divisions" and sidespins_division_id)
+    ]
+    
+    with boosted_throughput([] if what_if else boost_containers, boost_ru):
+        if what_if:
+            print("\n[WHAT-IF MODE] - No changes will be made to the database")
+    
+        # Transform and import division
+        print(f"\n{'='*60}")
+        print("DIVISION")
+        print(f"{'='*60}")
+    
+        if sidespins_division_id:
+            # Use existing division
+            print(f"Using existing SideSpins division: {sidespins_division_id}")
+            division_doc = {"id": sidespins_division_id}
+            stats["divisions_created"] = 0
+        else:
+            # Create new division from APA data
+            division_doc = transform_division(division_data, division_name, timestamp)
+            existing_division = check_division_exists(divisions_container, division_doc["id"])
+        
+            if not has_changes(division_doc, existing_division):
+                print(f"= Division unchanged: {division_doc['id']}")
+                stats["divisions_unchanged"] = 1
+            elif what_if:
+                print(f"[WHAT-IF] Would create/update division:")
+                print(json.dumps(division_doc, indent=2))
+                stats["divisions_created"] = 1
+            else:
+                with phase("update" if existing_division else "create"):
+                    divisions_container.upsert_item(division_doc)
+                print(f"✓ Division upserted: {division_doc['id']}")
+                stats["divisions_created"] = 1
+    
+        # Process teams
+        print(f"\n{'='*60}")
+        print("TEAMS & PLAYERS")
+        print(f"{'='*60}")
+    
+        # Existing teams come from one query on the division's partition
+        teams_by_apa_id = load_teams_by_apa_id(teams_container, division_doc["id"], cache)
+        print(f"✓ Found {len(teams_by_apa_id)} teams in database")
+    
+        # Resolve the players of teams being imported (or synced) with one bulk read instead
+        # of a read per roster entry. The read happens on first use, so it is skipped when
+        # every team already exists.
+        players_by_id: Optional[Dict[str, Dict]] = None
+    
+        def find_player(apa_number: str) -> Optional[Dict]:
+            nonlocal players_by_id
+            if players_by_id is None:
+                member_numbers = division_member_numbers(division_data, () if sync else teams_by_apa_id)
+                players_by_id = load_players(players_container, member_numbers, cache)
+                print(f"  ✓ Found {len(players_by_id)} of {len(member_numbers)} division players in database")
+            return players_by_id.get(f"p_{apa_number}")
+    
+        for team_data in division_data["teams"]:
+            plan = plan_team_import(
+                team_data,
+                division_doc["id"],
+                timestamp,
+                stats,
+                find_team=teams_by_apa_id.get,
+                find_player=find_player,
+                find_memberships=lambda team_id: load_team_memberships(memberships_container, team_id, cache),
+                what_if=what_if,
+                sync=sync
+            )
+        
+            if plan and not what_if:
+                write_team_plan(teams_container, players_container, memberships_container, plan, stats, cache)
+                # Players written for this team exist for the teams that follow
+                players_by_id.update({player["id"]: player for player in plan["players"]})
+    
+    print_division_summary(stats, what_if, graphql, metrics, cache, throttle)
+    if cache:
+        cache.close()
+    
+    if metrics_json:
+        metrics.write_json(
+            metrics_json,
+            script="import_division",
+            divisionId=division_id,
+            whatIf=what_if,
+            sync=sync,
+            timestamp=timestamp,
+            throttle=throttle.summary() if throttle else None,
+            stats={key: value for key, value in stats.items() if key != "warnings"}
+        )
+
+
 def main():
     """Main entry point for the script."""
     parser = argparse.ArgumentParser(
@@ -658,8 +1200,7 @@ def main():
     )
     parser.add_argument(
         "--refresh-token",
-        required=True,
-        help="API refresh token for authentication"
+        help="API refresh token for authentication (not needed with --from-file/--from-dir)"
     )
     parser.add_argument(
         "--division-name",
@@ -690,10 +1231,39 @@ def main():
         "--sidespins-division-id",
         help="Existing SideSpins division ID to import teams into (skips division creation)"
     )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="Sync existing teams' rosters (skill levels, new and departed players) instead of skipping them"
+    )
+    parser.add_argument(
+        "--metrics-json",
+        help="Write Cosmos DB request charge and latency metrics to this JSON file"
+    )
+    parser.add_argument(
+        "--index-cache",
+        nargs="?",
+        const=os.getenv("SIDESPINS_INDEX_CACHE", DEFAULT_INDEX_CACHE_PATH),
+        help="Look up existing documents through a local SQLite cache, validated against Cosmos DB "
+             f"(default path: $SIDESPINS_INDEX_CACHE or {DEFAULT_INDEX_CACHE_PATH})"
+    )
+    parser.add_argument(
+        "--ru-budget",
+        type=float,
+        help="Throttle writes to this many RU/s, backing off on 429s (default: no throttle)"
+    )
+    parser.add_argument(
+        "--boost-ru",
+        type=int,
+        help="Raise the containers' provisioned throughput to this many RU/s during the import "
+             "and restore it afterwards (skipped on serverless accounts)"
+    )
+    add_graphql_arguments(parser)
     
     args = parser.parse_args()
     
     try:
+        configure_client_from_args(args)
         import_division(
             division_id=args.division_id,
             refresh_token=args.refresh_token,
@@ -702,7 +1272,12 @@ def main():
             cosmos_key=args.cosmos_key,
             cosmos_db=args.cosmos_db,
             what_if=args.what_if,
-            sidespins_division_id=args.sidespins_division_id
+            sidespins_division_id=args.sidespins_division_id,
+            metrics_json=args.metrics_json,
+            sync=args.sync,
+            index_cache=args.index_cache,
+            ru_budget=args.ru_budget,
+            boost_ru=args.boost_ru
         )
     except Exception as e:
         print(f"\n❌ Error: {e}", file=sys.stderr)
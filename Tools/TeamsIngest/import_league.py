@@ -0,0 +1,1254 @@
+#!/usr/bin/env python3
+"""
+import_league.py - Import rosters or schedules for many divisions concurrently
+
+This script runs the same transforms as import_division.py and import_schedule.py
+for a whole list of divisions in one process. It fetches one access token, fetches
+the divisions from the APA GraphQL API concurrently with aiohttp (packing several
+division queries into each request), writes through the async Cosmos DB client
+(azure.cosmos.aio) with a bounded number of divisions in flight, and prints one
+aggregated summary at the end.
+
+The sync command imports rosters and schedules together: both are fetched in the
+same GraphQL requests, and fetching, planning and writing run as pipeline stages
+connected by bounded queues. The schedule is planned against the teams the roster
+stage stored, so it needs no second teams query.
+
+Divisions can be given on the command line or in a file:
+  - Text file: one division per line, "418320" or "418320,Nottingham Wednesday 8-Ball"
+  - JSON file: a list of division IDs or objects with "divisionId" and optional
+    "divisionName", "sessionId" and "sidespinsDivisionId"
+
+Usage:
+    python import_league.py schedule --division-ids 418320 418321 \\
+        --refresh-token "eyJhbGc..." \\
+        --session-id "session_2025_fall" \\
+        --cosmos-uri "https://..." \\
+        --cosmos-key "..." \\
+        --cosmos-db "sidespins"
+
+    python import_league.py rosters --division-file divisions.json \\
+        --refresh-token "eyJhbGc..." \\
+        --cosmos-uri "https://..." \\
+        --cosmos-key "..." \\
+        --cosmos-db "sidespins" \\
+        --what-if
+
+    python import_league.py sync --division-file divisions.json \\
+        --refresh-token "eyJhbGc..." \\
+        --session-id "session_2025_fall" \\
+        --cosmos-uri "https://..." \\
+        --cosmos-key "..." \\
+        --cosmos-db "sidespins"
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Union
+
+import aiohttp
+from azure.cosmos import exceptions
+from azure.cosmos.aio import CosmosClient
+
+import import_division
+import import_schedule
+from cosmos_batch import execute_with_conflict_retry_async
+from cosmos_metrics import CosmosMetrics, phase
+from cosmos_throttle import RuThrottle
+from cosmos_throughput import boosted_throughput_async
+from doc_diff import has_changes
+from graphql_client import (
+    DEFAULT_BACKOFF_BASE,
+    DEFAULT_BACKOFF_MAX,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_OPERATION_BATCH_SIZE,
+    DEFAULT_READ_TIMEOUT,
+    GENERATE_ACCESS_TOKEN_MUTATION,
+    GRAPHQL_ENDPOINT,
+    GRAPHQL_HEADERS,
+    RETRY_STATUS_CODES,
+    GraphQLError,
+    ReplayClient,
+    TokenCache,
+    add_graphql_arguments,
+    backoff_delay,
+    demultiplex_batch,
+    parse_retry_after,
+    print_request_stats,
+    save_captured_responses,
+    split_batches,
+)
+
+
+# Default number of divisions fetched and written at the same time
+DEFAULT_CONCURRENCY = 8
+
+# Containers each command writes to, boosted with --boost-ru
+ROSTER_CONTAINERS = ("Divisions", "Teams", "Players", "TeamMemberships")
+BOOST_CONTAINERS = {
+    "rosters": ROSTER_CONTAINERS,
+    "schedule": ("TeamMatches",),
+    "sync": ROSTER_CONTAINERS + ("TeamMatches",),
+}
+
+
+def load_division_entries(division_ids: List[int], division_file: Optional[str]) -> List[Dict]:
+    """
+    Collect the divisions to import from the command line and/or a file.
+
+    Args:
+        division_ids: Division IDs given with --division-ids
+        division_file: Path to a text or JSON division list (optional)
+
+    Returns:
+        List of entries with "divisionId" and optional "divisionName",
+        "sessionId" and "sidespinsDivisionId"
+    """
+    entries = [{"divisionId": int(division_id)} for division_id in division_ids or []]
+
+    if division_file:
+        with open(division_file, "r", encoding="utf-8") as f:
+            if division_file.lower().endswith(".json"):
+                for item in json.load(f):
+                    if isinstance(item, dict):
+                        entry = dict(item)
+                        entry["divisionId"] = int(item["divisionId"])
+                        entries.append(entry)
+                    else:
+                        entries.append({"divisionId": int(item)})
+            else:
+                for line in f:
+                    line = line.split("#", 1)[0].strip()
+                    if not line:
+                        continue
+                    division_id, _, division_name = line.partition(",")
+                    entry = {"divisionId": int(division_id.strip())}
+                    if division_name.strip():
+                        entry["divisionName"] = division_name.strip()
+                    entries.append(entry)
+
+    if not entries:
+        raise Exception("No divisions given. Use --division-ids and/or --division-file.")
+
+    return entries
+
+
+def merge_stats(total: Dict, stats: Dict):
+    """
+    Add one division's statistics into the running totals.
+
+    Args:
+        total: Aggregated statistics dict to update
+        stats: Statistics dict from one division
+    """
+    for key, value in stats.items():
+        if isinstance(value, list):
+            total.setdefault(key, []).extend(value)
+        else:
+            total[key] = total.get(key, 0) + value
+
+
+class AsyncGraphQLClient:
+    """
+    aiohttp counterpart of graphql_client.GraphQLClient.
+
+    Shares one access token (from the same on-disk cache) across every division
+    fetch, retries transient failures with the same backoff policy, and refreshes
+    the token once when a request is rejected with 401.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        token_cache: Optional[TokenCache] = None,
+        capture_dir: Optional[str] = None,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_base: float = DEFAULT_BACKOFF_BASE,
+        backoff_max: float = DEFAULT_BACKOFF_MAX
+    ):
+        self.session = session
+        self.token_cache = token_cache
+        self.capture_dir = capture_dir
+        self.refresh_token: Optional[str] = None
+        self.access_token: Optional[str] = None
+        self._refresh_lock = asyncio.Lock()
+        self.timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.stats = {
+            "requests": 0,
+            "retries": 0,
+            "failures": 0,
+            "latencies_ms": []
+        }
+
+    async def _post_once(self, payload: List[Dict], access_token: Optional[str]):
+        headers = GRAPHQL_HEADERS.copy()
+        if access_token:
+            headers["authorization"] = access_token
+        async with self.session.post(GRAPHQL_ENDPOINT, headers=headers, json=payload, timeout=self.timeout) as response:
+            if response.status == 401 or response.status in RETRY_STATUS_CODES:
+                return response.status, parse_retry_after(response.headers.get("Retry-After")), None
+            response.raise_for_status()
+            return response.status, None, await response.json(content_type=None)
+
+    async def post(self, payload: List[Dict], authenticated: bool = True) -> List[Dict]:
+        """
+        POST a GraphQL payload and return the decoded JSON response.
+
+        Args:
+            payload: List of GraphQL operations
+            authenticated: Send the shared access token with the request
+
+        Returns:
+            Decoded JSON response (one entry per operation)
+        """
+        reauthenticated = False
+        attempt = 0
+
+        while True:
+            access_token = self.access_token if authenticated else None
+            start = time.perf_counter()
+            try:
+                status, retry_after, data = await self._post_once(payload, access_token)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                self._record(start)
+                if attempt >= self.max_retries:
+                    self.stats["failures"] += 1
+                    raise
+                status, retry_after, data, reason = None, None, None, type(e).__name__
+            except aiohttp.ClientResponseError:
+                self._record(start)
+                self.stats["failures"] += 1
+                raise
+            else:
+                self._record(start)
+                if data is not None:
+                    return data
+                reason = f"HTTP {status}"
+
+            if status == 401 and authenticated and not reauthenticated:
+                print("  ⚠ Access token rejected (HTTP 401), refreshing...")
+                await self._reauthenticate(access_token)
+                reauthenticated = True
+                continue
+            if status == 401 or (status is not None and attempt >= self.max_retries):
+                self.stats["failures"] += 1
+                raise Exception(f"GraphQL request failed: {reason}")
+
+            delay = backoff_delay(attempt, retry_after, self.backoff_base, self.backoff_max)
+            self.stats["retries"] += 1
+            print(f"  ⚠ GraphQL request failed ({reason}), retrying in {delay:.1f}s "
+                  f"(attempt {attempt + 1}/{self.max_retries})")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def execute_batch(
+        self,
+        operations: List[Dict],
+        batch_size: int = DEFAULT_OPERATION_BATCH_SIZE
+    ) -> List[Union[Dict, GraphQLError]]:
+        """
+        Run many operations, packing up to batch_size of them into each POST.
+
+        Requests for different batches are sent concurrently.
+
+        Args:
+            operations: GraphQL operations ({operationName, variables, query})
+            batch_size: Maximum operations per request
+
+        Returns:
+            One entry per operation, in order: its "data" dict, or a GraphQLError
+            if that operation failed
+        """
+        batches = split_batches(operations, batch_size)
+        responses = await asyncio.gather(*[self.post(batch) for batch in batches])
+        if self.capture_dir:
+            for batch, response in zip(batches, responses):
+                save_captured_responses(self.capture_dir, batch, response)
+        return [
+            result
+            for batch, response in zip(batches, responses)
+            for result in demultiplex_batch(batch, response)
+        ]
+
+    async def fetch_access_token(self, refresh_token: str) -> str:
+        """
+        Mint a new access token from the refresh token.
+
+        Args:
+            refresh_token: The refresh token for authentication
+
+        Returns:
+            Access token string
+        """
+        payload = [{
+            "operationName": "GenerateAccessTokenMutation",
+            "variables": {"refreshToken": refresh_token},
+            "query": GENERATE_ACCESS_TOKEN_MUTATION
+        }]
+
+        print("Fetching access token...")
+        data = await self.post(payload, authenticated=False)
+        if not data or not data[0].get("data", {}).get("generateAccessToken"):
+            raise Exception(f"Failed to get access token: {data}")
+
+        print(f"✓ Access token obtained")
+        return data[0]["data"]["generateAccessToken"]["accessToken"]
+
+    async def authenticate(self, refresh_token: str) -> str:
+        """
+        Get the shared access token, reusing a cached one when still valid.
+
+        Args:
+            refresh_token: The refresh token for authentication
+
+        Returns:
+            Access token string
+        """
+        self.refresh_token = refresh_token
+        cached = self.token_cache.get(refresh_token) if self.token_cache else None
+        if cached:
+            print("✓ Using cached access token")
+            self.access_token = cached
+            return cached
+
+        self.access_token = await self.fetch_access_token(refresh_token)
+        if self.token_cache:
+            self.token_cache.put(refresh_token, self.access_token)
+        return self.access_token
+
+    async def _reauthenticate(self, rejected_token: Optional[str]):
+        # Concurrent 401s share a single refresh
+        async with self._refresh_lock:
+            if self.access_token != rejected_token:
+                return
+            if self.token_cache:
+                self.token_cache.invalidate(self.refresh_token)
+            self.access_token = await self.fetch_access_token(self.refresh_token)
+            if self.token_cache:
+                self.token_cache.put(self.refresh_token, self.access_token)
+
+    def _record(self, start: float):
+        self.stats["requests"] += 1
+        self.stats["latencies_ms"].append((time.perf_counter() - start) * 1000)
+
+    def print_stats(self):
+        """Print request, retry and latency counters."""
+        print_request_stats(self.stats)
+
+
+class AsyncReplayClient:
+    """Async wrapper around graphql_client.ReplayClient for offline league imports."""
+
+    def __init__(self, replay: ReplayClient):
+        self.replay = replay
+
+    async def authenticate(self, refresh_token: Optional[str] = None) -> Optional[str]:
+        return self.replay.authenticate(refresh_token)
+
+    async def execute_batch(
+        self,
+        operations: List[Dict],
+        batch_size: int = DEFAULT_OPERATION_BATCH_SIZE
+    ) -> List[Union[Dict, GraphQLError]]:
+        return self.replay.execute_batch(operations)
+
+    def print_stats(self):
+        self.replay.print_stats()
+
+
+def division_operation(command: str, division_id: int) -> Dict:
+    """
+    Build the GraphQL operation that fetches one division for the given command.
+
+    Args:
+        command: "rosters" or "schedule"
+        division_id: The division ID to fetch
+
+    Returns:
+        GraphQL operation dict
+    """
+    if command == "schedule":
+        return import_schedule.division_schedule_operation(division_id)
+    return import_division.division_rosters_operation(division_id)
+
+
+def division_from_result(result, division_id: int) -> Dict:
+    """
+    Extract the division from one demultiplexed GraphQL result.
+
+    Args:
+        result: Entry from execute_batch() for the division's operation
+        division_id: The division ID that was fetched
+
+    Returns:
+        Division data dictionary
+
+    Raises:
+        Exception: If the operation failed or returned no division
+    """
+    if isinstance(result, GraphQLError) or not result.get("division"):
+        raise Exception(f"Failed to get division {division_id}: {result}")
+    return result["division"]
+
+
+async def query_all_async(container, query: str, parameters: List[Dict], partition_key) -> List[Dict]:
+    """
+    Run a single-partition query against an async container and collect the results.
+
+    Args:
+        container: azure.cosmos.aio container client
+        query: SQL query text
+        parameters: Query parameters
+        partition_key: Partition key value to scope the query to
+
+    Returns:
+        List of matching documents
+    """
+    return [
+        item async for item in container.query_items(
+            query=query,
+            parameters=parameters,
+            partition_key=partition_key
+        )
+    ]
+
+
+async def load_match_index_async(database, our_division_id: str, session_id: str) -> Dict:
+    """
+    Load the existing matches of a division/session, indexed like import_schedule.load_existing_matches().
+
+    Args:
+        database: azure.cosmos.aio database client
+        our_division_id: SideSpins division ID (the TeamMatches partition key)
+        session_id: Session ID
+
+    Returns:
+        Dict mapping (week, frozenset({homeTeamId, awayTeamId})) to match documents
+    """
+    matches = await query_all_async(
+        database.get_container_client("TeamMatches"),
+        "SELECT * FROM c WHERE c.divisionId = @divisionId AND c.sessionId = @sessionId",
+        [
+            {"name": "@divisionId", "value": our_division_id},
+            {"name": "@sessionId", "value": session_id}
+        ],
+        our_division_id
+    )
+    return import_schedule.index_matches(matches)
+
+
+async def write_schedule_async(
+    database,
+    division_data: Dict,
+    division_id: int,
+    our_division_id: str,
+    team_map: Dict[str, Dict],
+    match_index: Dict,
+    session_id: str,
+    timestamp: str,
+    what_if: bool,
+    stats: Dict
+):
+    """
+    Plan and write the matches of one division against an already built team map.
+
+    Args:
+        database: azure.cosmos.aio database client (None in what-if mode)
+        division_data: Division schedule from the divisionSchedule operation
+        division_id: APA division ID
+        our_division_id: SideSpins division ID
+        team_map: Mapping of APA team IDs to team info
+        match_index: Existing matches from load_match_index_async()
+        session_id: Session ID to link matches to
+        timestamp: ISO timestamp for createdAt
+        what_if: If True, preview changes without committing
+        stats: Statistics dict to update
+    """
+    print(f"\n{'#'*60}")
+    print(f"DIVISION {division_id} -> {our_division_id} ({len(team_map)} teams, {len(match_index)} existing matches)")
+    print(f"{'#'*60}")
+
+    pending_writes, pending_labels, pending_docs = import_schedule.plan_match_writes(
+        division_data,
+        team_map,
+        match_index,
+        our_division_id,
+        session_id,
+        timestamp,
+        stats,
+        what_if=what_if
+    )
+
+    if pending_writes:
+        results = await execute_with_conflict_retry_async(
+            database.get_container_client("TeamMatches"),
+            pending_writes,
+            our_division_id,
+            replan=lambda i, stored: import_schedule.replan_match_write(pending_labels[i][1], pending_docs[i], stored)
+        )
+        print(f"\nDivision {division_id}:")
+        import_schedule.record_match_write_results(pending_labels, results, stats)
+
+
+async def import_schedule_async(
+    database,
+    division_data: Dict,
+    entry: Dict,
+    session_id: str,
+    timestamp: str,
+    what_if: bool
+) -> Dict:
+    """
+    Import the schedule of one division.
+
+    Args:
+        database: azure.cosmos.aio database client (None in what-if mode)
+        division_data: Division schedule from the divisionSchedule operation
+        entry: Division entry from load_division_entries()
+        session_id: Default session ID (overridden by entry["sessionId"])
+        timestamp: ISO timestamp for createdAt
+        what_if: If True, preview changes without committing
+
+    Returns:
+        Statistics dict for the division
+    """
+    stats = import_schedule.new_schedule_stats()
+    division_id = entry["divisionId"]
+    session_id = entry.get("sessionId") or session_id
+    our_division_id = entry.get("sidespinsDivisionId") or f"div_{division_id}"
+
+    if what_if:
+        team_map = import_schedule.build_team_mapping_from_api(division_data)
+        match_index = {}
+    else:
+        teams, match_index = await asyncio.gather(
+            query_all_async(
+                database.get_container_client("Teams"),
+                "SELECT * FROM c WHERE c.divisionId = @divisionId",
+                [{"name": "@divisionId", "value": our_division_id}],
+                our_division_id
+            ),
+            load_match_index_async(database, our_division_id, session_id)
+        )
+        team_map = import_schedule.index_teams_by_apa_id(teams)
+
+    await write_schedule_async(
+        database, division_data, division_id, our_division_id, team_map, match_index,
+        session_id, timestamp, what_if, stats
+    )
+    return stats
+
+
+async def read_item_or_none_async(container, item_id: str, partition_key) -> Optional[Dict]:
+    """
+    Point-read a document from an async container, returning None if it is missing.
+
+    Args:
+        container: azure.cosmos.aio container client
+        item_id: Document ID
+        partition_key: Partition key value
+
+    Returns:
+        Document or None
+    """
+    try:
+        return await container.read_item(item=item_id, partition_key=partition_key)
+    except exceptions.CosmosResourceNotFoundError:
+        return None
+
+
+async def write_team_plan_async(
+    teams_container,
+    players_container,
+    memberships_container,
+    plan: Dict,
+    stats: Dict
+) -> bool:
+    """
+    Async counterpart of import_division.write_team_plan().
+
+    Args:
+        teams_container: azure.cosmos.aio teams container client
+        players_container: azure.cosmos.aio players container client
+        memberships_container: azure.cosmos.aio memberships container client
+        plan: Team plan from import_division.plan_team_import()
+        stats: Statistics dict to update with failed memberships
+
+    Returns:
+        True if every document was written, False if players or memberships failed
+    """
+    # A failed player fails its team alone; memberships would point at a missing player
+    results = await asyncio.gather(
+        *[players_container.upsert_item(doc) for doc in plan["players"]], return_exceptions=True
+    )
+    failed_players = 0
+    for doc, result in zip(plan["players"], results):
+        if isinstance(result, BaseException):
+            if not isinstance(result, Exception):
+                raise result
+            print(f"  ❌ Player {doc['id']} not written: {result}")
+            failed_players += 1
+    if failed_players:
+        import_division.record_incomplete_team(plan, failed_players, stats, kind="players")
+        return False
+
+    results = await execute_with_conflict_retry_async(
+        memberships_container,
+        import_division.membership_batch_operations(plan),
+        plan["team"]["id"],
+        replan=lambda index, stored: import_division.replan_membership_write(plan, index, stored)
+    )
+    failed = import_division.record_membership_write_results(plan, results, stats)
+    if failed:
+        import_division.record_incomplete_team(plan, failed, stats)
+        return False
+
+    if plan["write_team"]:
+        await teams_container.upsert_item(plan["team"])
+    return True
+
+
+async def plan_rosters_async(
+    database,
+    division_data: Dict,
+    entry: Dict,
+    timestamp: str,
+    what_if: bool,
+    sync: bool,
+    stats: Dict
+) -> Dict:
+    """
+    Look up what is stored for one division and plan its roster writes.
+
+    Existing teams, players and memberships are prefetched concurrently and the
+    shared planning step in import_division is run against the results.
+
+    Args:
+        database: azure.cosmos.aio database client
+        division_data: Division rosters from the divisionRosters operation
+        entry: Division entry from load_division_entries()
+        timestamp: ISO timestamp for createdAt/joinedAt
+        what_if: If True, preview changes without committing
+        sync: If True, sync the rosters of existing teams instead of skipping them
+        stats: Statistics dict to update
+
+    Returns:
+        Division plan with the "division" document (upserted if "write_division"),
+        the stored "teams" and the team "plans" from import_division.plan_team_import()
+    """
+    division_id = entry["divisionId"]
+
+    if not entry.get("divisionName") and not entry.get("sidespinsDivisionId"):
+        raise Exception(f"Division {division_id} needs a divisionName or sidespinsDivisionId")
+
+    divisions_container = database.get_container_client("Divisions")
+    teams_container = database.get_container_client("Teams")
+    players_container = database.get_container_client("Players")
+    memberships_container = database.get_container_client("TeamMemberships")
+
+    print(f"\n{'#'*60}")
+    print(f"DIVISION {division_id}")
+    print(f"{'#'*60}")
+
+    # Division document
+    write_division = False
+    existing_division = None
+    if entry.get("sidespinsDivisionId"):
+        division_doc = {"id": entry["sidespinsDivisionId"]}
+        print(f"Using existing SideSpins division: {division_doc['id']}")
+    else:
+        division_doc = import_division.transform_division(division_data, entry["divisionName"], timestamp)
+        existing_division = await read_item_or_none_async(divisions_container, division_doc["id"], division_doc["id"])
+        if not has_changes(division_doc, existing_division):
+            print(f"= Division unchanged: {division_doc['id']}")
+            stats["divisions_unchanged"] = 1
+        else:
+            write_division = True
+            if what_if:
+                print(f"[WHAT-IF] Would upsert {division_doc['id']}")
+            stats["divisions_created"] = 1
+
+    # Existing teams come from one query on the division's partition; players and
+    # memberships are only needed for the teams that will be imported or synced
+    teams = await query_all_async(
+        teams_container,
+        "SELECT * FROM c WHERE c.divisionId = @divisionId",
+        [{"name": "@divisionId", "value": division_doc["id"]}],
+        division_doc["id"]
+    )
+    teams_by_apa_id = {import_schedule.team_apa_id(team): team for team in teams}
+    roster_teams = [
+        team_data for team_data in division_data["teams"]
+        if not team_data.get("isBye") and (sync or str(team_data["id"]) not in teams_by_apa_id)
+    ]
+    member_numbers = import_division.division_member_numbers(division_data, () if sync else teams_by_apa_id)
+    team_ids = [
+        teams_by_apa_id[str(team_data["id"])]["id"] if str(team_data["id"]) in teams_by_apa_id
+        else import_division.transform_team(team_data, division_doc["id"], "", timestamp)["id"]
+        for team_data in roster_teams
+    ]
+
+    players, *membership_lists = await asyncio.gather(
+        players_container.read_items(
+            items=[(f"p_{number}", f"p_{number}") for number in member_numbers]
+        ) if member_numbers else asyncio.sleep(0, result=[]),
+        *[
+            query_all_async(
+                memberships_container,
+                "SELECT * FROM c WHERE c.teamId = @teamId",
+                [{"name": "@teamId", "value": team_id}],
+                team_id
+            )
+            for team_id in team_ids
+        ]
+    )
+    players_by_id = {player["id"]: player for player in players}
+    memberships_by_team = {
+        team_id: {membership["id"]: membership for membership in memberships}
+        for team_id, memberships in zip(team_ids, membership_lists)
+    }
+
+    plans = []
+    for team_data in division_data["teams"]:
+        plan = import_division.plan_team_import(
+            team_data,
+            division_doc["id"],
+            timestamp,
+            stats,
+            find_team=teams_by_apa_id.get,
+            find_player=lambda apa_number: players_by_id.get(f"p_{apa_number}"),
+            find_memberships=lambda team_id: memberships_by_team.get(team_id, {}),
+            what_if=what_if,
+            sync=sync
+        )
+        if plan:
+            plans.append(plan)
+
+    return {
+        "division": division_doc,
+        "write_division": write_division,
+        "division_exists": existing_division is not None,
+        "teams": teams,
+        "plans": plans,
+    }
+
+
+async def write_rosters_async(
+    database,
+    division_id: int,
+    division_plan: Dict,
+    what_if: bool,
+    stats: Dict
+) -> List[Dict]:
+    """
+    Write the documents planned by plan_rosters_async().
+
+    Args:
+        database: azure.cosmos.aio database client
+        division_id: APA division ID (for messages)
+        division_plan: Division plan from plan_rosters_async()
+        what_if: If True, write nothing
+        stats: Statistics dict to update with failed memberships
+
+    Returns:
+        Team documents of the division once the writes are done: the stored teams
+        plus every planned team that was written (or would be, in what-if mode)
+    """
+    plans = division_plan["plans"]
+    teams_by_id = {team["id"]: team for team in division_plan["teams"]}
+    if what_if:
+        teams_by_id.update({plan["team"]["id"]: plan["team"] for plan in plans})
+        return list(teams_by_id.values())
+
+    if division_plan["write_division"]:
+        with phase("update" if division_plan["division_exists"] else "create"):
+            await database.get_container_client("Divisions").upsert_item(division_plan["division"])
+        print(f"✓ Division upserted: {division_plan['division']['id']}")
+
+    if plans:
+        written = await asyncio.gather(*[
+            write_team_plan_async(
+                database.get_container_client("Teams"),
+                database.get_container_client("Players"),
+                database.get_container_client("TeamMemberships"),
+                plan,
+                stats
+            )
+            for plan in plans
+        ])
+        teams_by_id.update({plan["team"]["id"]: plan["team"] for plan, ok in zip(plans, written) if ok})
+        print(f"\n✓ Division {division_id}: {sum(written)} of {len(plans)} teams written")
+
+    return list(teams_by_id.values())
+
+
+async def import_rosters_async(
+    database,
+    division_data: Dict,
+    entry: Dict,
+    timestamp: str,
+    what_if: bool,
+    sync: bool = False
+) -> Dict:
+    """
+    Import the teams, players and memberships of one division.
+
+    Args:
+        database: azure.cosmos.aio database client
+        division_data: Division rosters from the divisionRosters operation
+        entry: Division entry from load_division_entries()
+        timestamp: ISO timestamp for createdAt/joinedAt
+        what_if: If True, preview changes without committing
+        sync: If True, sync the rosters of existing teams instead of skipping them
+
+    Returns:
+        Statistics dict for the division
+    """
+    stats = import_division.new_division_stats()
+    division_plan = await plan_rosters_async(database, division_data, entry, timestamp, what_if, sync, stats)
+    await write_rosters_async(database, entry["divisionId"], division_plan, what_if, stats)
+    return stats
+
+
+async def run_sync_pipeline(
+    graphql,
+    database,
+    entries: List[Dict],
+    session_id: str,
+    timestamp: str,
+    what_if: bool,
+    concurrency: int,
+    graphql_batch_size: int,
+    roster_total: Dict,
+    schedule_total: Dict,
+    fail: Callable[[Dict, Exception], None]
+):
+    """
+    Sync rosters and schedules of many divisions as a three-stage pipeline.
+
+    Stages are connected by bounded queues, so fetching the next divisions
+    overlaps with planning and writing the current ones:
+
+      1. fetch: one GraphQL request per group of divisions, holding both the
+         divisionRosters and divisionSchedule operations of each division
+      2. plan: prefetch stored teams, players, memberships and matches, and plan
+         the roster writes
+      3. write: write the rosters, then plan and write the schedule against the
+         team map the roster stage produced (no second teams query)
+
+    Args:
+        graphql: Authenticated AsyncGraphQLClient or AsyncReplayClient
+        database: azure.cosmos.aio database client
+        entries: Division entries from load_division_entries()
+        session_id: Default session ID (overridden by entry["sessionId"])
+        timestamp: ISO timestamp for createdAt/joinedAt
+        what_if: If True, preview changes without committing
+        concurrency: Divisions planned and written at once (also the queue bound)
+        graphql_batch_size: Maximum operations packed into one GraphQL request
+        roster_total: Aggregated roster statistics to update
+        schedule_total: Aggregated schedule statistics to update
+        fail: Called with (entry, error) when a division fails
+    """
+    workers = max(1, concurrency)
+    fetched: asyncio.Queue = asyncio.Queue(maxsize=workers)
+    planned: asyncio.Queue = asyncio.Queue(maxsize=workers)
+
+    async def fetch():
+        # Two operations per division, so a group holds half the batch size in divisions
+        for group in split_batches(entries, max(1, graphql_batch_size // 2)):
+            operations = [
+                division_operation(command, entry["divisionId"])
+                for entry in group
+                for command in ("rosters", "schedule")
+            ]
+            try:
+                results = await graphql.execute_batch(operations, batch_size=len(operations))
+            except Exception as e:
+                for entry in group:
+                    fail(entry, e)
+                continue
+            for index, entry in enumerate(group):
+                await fetched.put((entry, results[2 * index], results[2 * index + 1]))
+        for _ in range(workers):
+            await fetched.put(None)
+
+    async def plan():
+        while True:
+            item = await fetched.get()
+            if item is None:
+                return
+            entry, rosters_result, schedule_result = item
+            try:
+                rosters_data = division_from_result(rosters_result, entry["divisionId"])
+                schedule_data = division_from_result(schedule_result, entry["divisionId"])
+                our_division_id = entry.get("sidespinsDivisionId") or f"div_{entry['divisionId']}"
+                entry_session_id = entry.get("sessionId") or session_id
+                roster_stats = import_division.new_division_stats()
+                division_plan, match_index = await asyncio.gather(
+                    plan_rosters_async(database, rosters_data, entry, timestamp, what_if, True, roster_stats),
+                    load_match_index_async(database, our_division_id, entry_session_id)
+                )
+            except Exception as e:
+                fail(entry, e)
+                continue
+            await planned.put((entry, schedule_data, entry_session_id, division_plan, match_index, roster_stats))
+
+    async def write():
+        while True:
+            item = await planned.get()
+            if item is None:
+                return
+            entry, schedule_data, entry_session_id, division_plan, match_index, roster_stats = item
+            try:
+                teams = await write_rosters_async(database, entry["divisionId"], division_plan, what_if, roster_stats)
+                merge_stats(roster_total, roster_stats)
+                schedule_stats = import_schedule.new_schedule_stats()
+                await write_schedule_async(
+                    database,
+                    schedule_data,
+                    entry["divisionId"],
+                    division_plan["division"]["id"],
+                    import_schedule.index_teams_by_apa_id(teams),
+                    match_index,
+                    entry_session_id,
+                    timestamp,
+                    what_if,
+                    schedule_stats
+                )
+                merge_stats(schedule_total, schedule_stats)
+            except Exception as e:
+                fail(entry, e)
+
+    async def plan_stage():
+        await asyncio.gather(*[plan() for _ in range(workers)])
+        for _ in range(workers):
+            await planned.put(None)
+
+    await asyncio.gather(fetch(), plan_stage(), *[write() for _ in range(workers)])
+
+
+def print_sync_footer(roster_stats: Dict, schedule_stats: Dict, what_if: bool):
+    """
+    Print the one completion/WHAT-IF line that ends the sync summary.
+    
+    Args:
+        roster_stats: Merged roster statistics
+        schedule_stats: Merged schedule statistics
+        what_if: Whether the sync ran in preview mode
+    """
+    problems = []
+    if roster_stats["teams_failed"]:
+        problems.append(f"{roster_stats['teams_failed']} incomplete teams")
+    if schedule_stats["matches_failed"]:
+        problems.append(f"{schedule_stats['matches_failed']} failed matches")
+    if what_if:
+        print("\n[WHAT-IF MODE] - No actual changes were made")
+    elif problems:
+        print(f"\n⚠ Sync completed with {' and '.join(problems)}")
+    else:
+        print("\n✓ Sync completed successfully")
+
+
+async def import_league(
+    command: str,
+    entries: List[Dict],
+    refresh_token: str,
+    cosmos_uri: str,
+    cosmos_key: str,
+    cosmos_db: str,
+    session_id: str = None,
+    what_if: bool = False,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    token_cache: Optional[TokenCache] = None,
+    graphql_batch_size: int = DEFAULT_OPERATION_BATCH_SIZE,
+    from_file: Optional[str] = None,
+    from_dir: Optional[str] = None,
+    capture_dir: Optional[str] = None,
+    read_timeout: float = DEFAULT_READ_TIMEOUT,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    metrics_json: Optional[str] = None,
+    sync: bool = False,
+    ru_budget: Optional[float] = None,
+    boost_ru: Optional[int] = None
+):
+    """
+    Import rosters or schedules for many divisions concurrently.
+
+    The "sync" command imports both through run_sync_pipeline(), syncing the
+    rosters of existing teams.
+
+    Args:
+        command: "rosters", "schedule" or "sync"
+        entries: Division entries from load_division_entries()
+        refresh_token: API refresh token
+        cosmos_uri: Cosmos DB endpoint URI
+        cosmos_key: Cosmos DB access key
+        cosmos_db: Cosmos DB database name
+        session_id: Session ID for schedule and sync imports
+        what_if: If True, preview changes without committing
+        concurrency: Maximum number of divisions in flight
+        token_cache: Access token cache to use (optional)
+        graphql_batch_size: Maximum division queries packed into one GraphQL request
+        from_file: Replay this captured response file instead of calling the API
+        from_dir: Replay captured responses from this directory instead of the API
+        capture_dir: Save live GraphQL responses to this directory
+        read_timeout: GraphQL read timeout in seconds
+        max_retries: Retries for transient GraphQL failures
+        metrics_json: Path to write Cosmos DB request charge/latency metrics to (optional)
+        sync: If True, sync the rosters of existing teams instead of skipping them (rosters only)
+        ru_budget: Throttle writes of all divisions together to this many RU/s (optional)
+        boost_ru: Raise the written containers' throughput to this many RU/s during the import (optional)
+    """
+    timestamp = datetime.utcnow().isoformat() + 'Z'
+    total = import_schedule.new_schedule_stats() if command == "schedule" else import_division.new_division_stats()
+    schedule_total = import_schedule.new_schedule_stats()
+    failed_divisions = []
+    limit = asyncio.Semaphore(max(1, concurrency))
+    metrics = CosmosMetrics()
+    throttle = RuThrottle(ru_budget) if ru_budget else None
+
+    if what_if:
+        print("[WHAT-IF MODE] - No changes will be made to the database")
+
+    async with aiohttp.ClientSession() as session:
+        if from_file or from_dir:
+            graphql = AsyncReplayClient(ReplayClient(from_file=from_file, from_dir=from_dir))
+        else:
+            graphql = AsyncGraphQLClient(
+                session, token_cache, capture_dir, read_timeout=read_timeout, max_retries=max_retries
+            )
+        await graphql.authenticate(refresh_token)
+
+        # Schedule previews need no database access at all
+        client = None
+        if not (what_if and command == "schedule"):
+            print(f"Connecting to Cosmos DB: {cosmos_db}...")
+            client = CosmosClient(cosmos_uri, credential=cosmos_key)
+
+        try:
+            database = metrics.wrap_database_async(client.get_database_client(cosmos_db)) if client else None
+            if database and throttle:
+                database = throttle.wrap_database_async(database)
+
+            def fail(entry: Dict, error: Exception):
+                print(f"\n❌ Division {entry['divisionId']} failed: {error}", file=sys.stderr)
+                failed_divisions.append((entry["divisionId"], str(error)))
+
+            async def run(entry: Dict, result):
+                async with limit:
+                    try:
+                        division_data = division_from_result(result, entry["divisionId"])
+                        if command == "schedule":
+                            stats = await import_schedule_async(
+                                database, division_data, entry, session_id, timestamp, what_if
+                            )
+                        else:
+                            stats = await import_rosters_async(
+                                database, division_data, entry, timestamp, what_if, sync
+                            )
+                        merge_stats(total, stats)
+                    except Exception as e:
+                        fail(entry, e)
+
+            async def run_group(group: List[Dict]):
+                # One request fetches the whole group; each division then imports on its own
+                operations = [division_operation(command, entry["divisionId"]) for entry in group]
+                try:
+                    async with limit:
+                        results = await graphql.execute_batch(operations, batch_size=len(operations))
+                except Exception as e:
+                    for entry in group:
+                        fail(entry, e)
+                    return
+                await asyncio.gather(*[run(entry, result) for entry, result in zip(group, results)])
+
+            boost_containers = [] if what_if else [
+                client.get_database_client(cosmos_db).get_container_client(name) for name in BOOST_CONTAINERS[command]
+            ]
+            async with boosted_throughput_async(boost_containers, boost_ru):
+                if command == "sync":
+                    print(f"Syncing rosters and schedules for {len(entries)} divisions ({concurrency} at a time)...")
+                    await run_sync_pipeline(
+                        graphql, database, entries, session_id, timestamp, what_if,
+                        concurrency, graphql_batch_size, total, schedule_total, fail
+                    )
+                else:
+                    groups = split_batches(entries, graphql_batch_size)
+                    print(f"Importing {command} for {len(entries)} divisions "
+                          f"({concurrency} at a time, {len(groups)} GraphQL requests)...")
+                    await asyncio.gather(*[run_group(group) for group in groups])
+        finally:
+            if client:
+                await client.close()
+
+    if command == "schedule":
+        import_schedule.print_schedule_summary(total, what_if, graphql=graphql, metrics=metrics, throttle=throttle)
+    elif command == "sync":
+        import_division.print_division_summary(total, what_if, footer=False)
+        import_schedule.print_schedule_summary(
+            schedule_total, what_if, graphql=graphql, metrics=metrics, throttle=throttle, footer=False
+        )
+        print_sync_footer(total, schedule_total, what_if)
+    else:
+        import_division.print_division_summary(total, what_if, graphql=graphql, metrics=metrics, throttle=throttle)
+
+    print(f"\nDivisions: {len(entries) - len(failed_divisions)} imported, {len(failed_divisions)} failed")
+    for division_id, error in failed_divisions:
+        print(f"  ❌ {division_id}: {error}")
+
+    if metrics_json:
+        metrics.write_json(
+            metrics_json,
+            script=f"import_league {command}",
+            divisionIds=[entry["divisionId"] for entry in entries],
+            failedDivisionIds=[division_id for division_id, _ in failed_divisions],
+            whatIf=what_if,
+            sync=sync or command == "sync",
+            timestamp=timestamp,
+            throttle=throttle.summary() if throttle else None,
+            stats={key: value for key, value in total.items() if key != "warnings"},
+            **({"scheduleStats": {key: value for key, value in schedule_total.items() if key != "warnings"}}
+               if command == "sync" else {})
+        )
+
+    if failed_divisions:
+        raise Exception(f"{len(failed_divisions)} of {len(entries)} divisions failed")
+
+
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(
+        description="Import rosters or schedules for many divisions concurrently"
+    )
+    parser.add_argument(
+        "command",
+        choices=["rosters", "schedule", "sync"],
+        help="What to import: team rosters (import_division), match schedules (import_schedule), "
+             "or sync for both in one pipeline"
+    )
+    parser.add_argument(
+        "--division-ids",
+        type=int,
+        nargs="+",
+        default=[],
+        help="Division IDs to import (e.g., 418320 418321)"
+    )
+    parser.add_argument(
+        "--division-file",
+        help="Text or JSON file listing divisions to import"
+    )
+    parser.add_argument(
+        "--refresh-token",
+        help="API refresh token for authentication (not needed with --from-file or --from-dir)"
+    )
+    parser.add_argument(
+        "--session-id",
+        help="Session ID to link matches to (required for schedule and sync unless set per division)"
+    )
+    parser.add_argument(
+        "--cosmos-uri",
+        required=True,
+        help="Cosmos DB endpoint URI"
+    )
+    parser.add_argument(
+        "--cosmos-key",
+        required=True,
+        help="Cosmos DB access key"
+    )
+    parser.add_argument(
+        "--cosmos-db",
+        required=True,
+        help="Cosmos DB database name"
+    )
+    parser.add_argument(
+        "--what-if",
+        action="store_true",
+        help="Preview changes without committing to database"
+    )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="rosters: sync existing teams' rosters (skill levels, new and departed players) instead of skipping them"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Maximum divisions fetched/written at once (default: {DEFAULT_CONCURRENCY})"
+    )
+    parser.add_argument(
+        "--graphql-batch-size",
+        type=int,
+        default=DEFAULT_OPERATION_BATCH_SIZE,
+        help=f"Maximum division queries sent in one GraphQL request (default: {DEFAULT_OPERATION_BATCH_SIZE})"
+    )
+    parser.add_argument(
+        "--metrics-json",
+        help="Write Cosmos DB request charge and latency metrics to this JSON file"
+    )
+    parser.add_argument(
+        "--ru-budget",
+        type=float,
+        help="Throttle writes (all divisions together) to this many RU/s, backing off on 429s "
+             "(default: no throttle)"
+    )
+    parser.add_argument(
+        "--boost-ru",
+        type=int,
+        help="Raise the provisioned throughput of the containers the command writes to this many RU/s "
+             "during the import and restore it afterwards (skipped on serverless accounts)"
+    )
+    add_graphql_arguments(parser)
+
+    args = parser.parse_args()
+
+    try:
+        entries = load_division_entries(args.division_ids, args.division_file)
+        if not args.refresh_token and not (args.from_file or args.from_dir):
+            raise Exception("--refresh-token is required unless replaying with --from-file or --from-dir")
+        if args.command in ("schedule", "sync") and not args.session_id:
+            missing = [e["divisionId"] for e in entries if not e.get("sessionId")]
+            if missing:
+                raise Exception(f"--session-id is required (no sessionId for divisions {missing})")
+
+        asyncio.run(import_league(
+            command=args.command,
+            entries=entries,
+            refresh_token=args.refresh_token,
+            cosmos_uri=args.cosmos_uri,
+            cosmos_key=args.cosmos_key,
+            cosmos_db=args.cosmos_db,
+            session_id=args.session_id,
+            what_if=args.what_if,
+            concurrency=args.concurrency,
+            token_cache=None if args.no_token_cache else TokenCache(args.token_cache),
+            graphql_batch_size=args.graphql_batch_size,
+            from_file=args.from_file,
+            from_dir=args.from_dir,
+            capture_dir=args.capture_dir,
+            read_timeout=args.http_timeout,
+            max_retries=args.http_retries,
+            metrics_json=args.metrics_json,
+            sync=args.sync,
+            ru_budget=args.ru_budget,
+            boost_ru=args.boost_ru
+        ))
+    except Exception as e:
+        print(f"\n❌ Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
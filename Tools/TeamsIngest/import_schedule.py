@@ -3,8 +3,11 @@
 import_schedule.py - Import division schedule/matches from APA GraphQL API to Cosmos DB
 
 This script fetches match schedule data from the external APA GraphQL API and imports
-matches into the SideSpins Cosmos DB TeamMatches container. It only creates new matches
-and preserves existing matches to avoid overwriting user-entered lineup and score data.
+matches into the SideSpins Cosmos DB TeamMatches container. New matches are created.
+Existing matches are patched, not rewritten: only the schedule fields (scheduledAt,
+status) are set, with If-Match on the stored ETag, and API totals are only written
+while no player matches have been entered (a filter predicate Cosmos DB checks at
+write time). User-entered lineups and scores are never overwritten.
 
 Usage:
     python import_schedule.py --division-id 418320 \\
@@ -14,83 +17,115 @@ Usage:
         --cosmos-key "..." \\
         --cosmos-db "sidespins" \\
         --what-if
+
+    # Replay a captured API response (no network access or refresh token needed)
+    python import_schedule.py --division-id 418320 --from-file schedules.json \\
+        --session-id "session_2025_fall" \\
+        --cosmos-uri "https://..." --cosmos-key "..." --cosmos-db "sidespins"
 """
 
 import argparse
 import json
+import os
 import re
 import sys
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, FrozenSet, List, Optional, Tuple
 
-import requests
 from azure.cosmos import CosmosClient, exceptions
 
+from cosmos_batch import execute_with_conflict_retry, with_if_match
+from cosmos_metrics import CosmosMetrics
+from cosmos_throttle import RuThrottle, throttle_writes
+from cosmos_throughput import boosted_throughput
+from graphql_client import GraphQLClient, GraphQLError, add_graphql_arguments, configure_client_from_args, get_client
+from index_cache import DEFAULT_INDEX_CACHE_PATH, IndexCache, cached_query, remember
+
 
-# GraphQL API Configuration
-GRAPHQL_ENDPOINT = "https://gql.poolplayers.com/graphql"
-GRAPHQL_HEADERS = {
-    "accept": "*/*",
-    "accept-language": "en-US,en;q=0.9",
-    "apollographql-client-name": "MemberServices",
-    "apollographql-client-version": "3.18.44-3550",
-    "content-type": "application/json",
-    "origin": "https://league.poolplayers.com",
-    "referer": "https://league.poolplayers.com/",
-    "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+# Fields of an existing match the importer owns; everything else belongs to the app
+SCHEDULE_FIELDS = ("scheduledAt", "status")
+
+# Totals are only written while no player matches have been entered in the app.
+# Evaluated by Cosmos DB at write time, so a concurrent lineup/score edit wins.
+TOTALS_FILTER_PREDICATE = "FROM c WHERE NOT IS_DEFINED(c.playerMatches[0])"
+
+DIVISION_SCHEDULE_QUERY = """
+query divisionSchedule($id: Int!) {
+    division(id: $id) {
+        id
+        teams {
+            id
+            name
+            number
+            isBye
+            __typename
+        }
+        schedule {
+            id
+            description
+            date
+            weekOfPlay
+            skip
+            matches {
+                id
+                isBye
+                status
+                startTime
+                results {
+                    homeAway
+                    points {
+                        total
+                        __typename
+                    }
+                    __typename
+                }
+                home {
+                    id
+                    name
+                    number
+                    __typename
+                }
+                away {
+                    id
+                    name
+                    number
+                    __typename
+                }
+                __typename
+            }
+            __typename
+        }
+        __typename
+    }
 }
+"""
 
 
-def fetch_access_token(refresh_token: str) -> str:
+def division_schedule_operation(division_id: int) -> Dict:
     """
-    Fetch an access token from the GraphQL API using a refresh token.
+    Build the GraphQL operation that fetches one division's schedule.
     
     Args:
-        refresh_token: The refresh token for authentication
+        division_id: The division ID to fetch
         
     Returns:
-        Access token string
-        
-    Raises:
-        Exception: If the API request fails
+        GraphQL operation dict (sent alone or batched with other operations)
     """
-    query = """
-    mutation GenerateAccessTokenMutation($refreshToken: String!) {
-        generateAccessToken(refreshToken: $refreshToken) {
-            accessToken
-            __typename
-        }
+    return {
+        "operationName": "divisionSchedule",
+        "variables": {"id": division_id},
+        "query": DIVISION_SCHEDULE_QUERY
     }
-    """
-    
-    payload = [{
-        "operationName": "GenerateAccessTokenMutation",
-        "variables": {"refreshToken": refresh_token},
-        "query": query
-    }]
-    
-    headers = GRAPHQL_HEADERS.copy()
-    
-    print("Fetching access token...")
-    response = requests.post(GRAPHQL_ENDPOINT, headers=headers, json=payload)
-    response.raise_for_status()
-    
-    data = response.json()
-    if not data or not data[0].get("data", {}).get("generateAccessToken"):
-        raise Exception(f"Failed to get access token: {data}")
-    
-    access_token = data[0]["data"]["generateAccessToken"]["accessToken"]
-    print(f"✓ Access token obtained")
-    return access_token
 
 
-def fetch_division_schedule(access_token: str, division_id: int) -> Dict:
+def fetch_division_schedule(access_token: str, division_id: int, client: GraphQLClient = None) -> Dict:
     """
     Fetch division schedule data from the GraphQL API.
     
     Args:
         access_token: The access token for authentication
         division_id: The division ID to fetch
+        client: GraphQL client to use (defaults to the shared client)
         
     Returns:
         Division data dictionary with schedule
@@ -98,75 +133,12 @@ def fetch_division_schedule(access_token: str, division_id: int) -> Dict:
     Raises:
         Exception: If the API request fails
     """
-    query = """
-    query divisionSchedule($id: Int!) {
-        division(id: $id) {
-            id
-            teams {
-                id
-                name
-                number
-                isBye
-                __typename
-            }
-            schedule {
-                id
-                description
-                date
-                weekOfPlay
-                skip
-                matches {
-                    id
-                    isBye
-                    status
-                    startTime
-                    results {
-                        homeAway
-                        points {
-                            total
-                            __typename
-                        }
-                        __typename
-                    }
-                    home {
-                        id
-                        name
-                        number
-                        __typename
-                    }
-                    away {
-                        id
-                        name
-                        number
-                        __typename
-                    }
-                    __typename
-                }
-                __typename
-            }
-            __typename
-        }
-    }
-    """
-    
-    payload = [{
-        "operationName": "divisionSchedule",
-        "variables": {"id": division_id},
-        "query": query
-    }]
-    
-    headers = GRAPHQL_HEADERS.copy()
-    headers["authorization"] = access_token
-    
     print(f"Fetching division {division_id} schedule...")
-    response = requests.post(GRAPHQL_ENDPOINT, headers=headers, json=payload)
-    response.raise_for_status()
-    
-    data = response.json()
-    if not data or not data[0].get("data", {}).get("division"):
-        raise Exception(f"Failed to get division schedule: {data}")
+    [result] = (client or get_client()).execute_batch([division_schedule_operation(division_id)], access_token)
+    if isinstance(result, GraphQLError) or not result.get("division"):
+        raise Exception(f"Failed to get division schedule: {result}")
     
-    division_data = data[0]["data"]["division"]
+    division_data = result["division"]
     total_matches = sum(len(s["matches"]) for s in division_data["schedule"] if not s.get("skip"))
     print(f"✓ Schedule data received: {len(division_data['schedule'])} weeks, {total_matches} matches")
     return division_data
@@ -205,22 +177,79 @@ def slugify(text: str) -> str:
     return text
 
 
-def check_match_exists(
+def matches_cache_scope(division_id: str, session_id: str) -> str:
+    """Index cache scope of a division/session's matches."""
+    return f"divisionId={division_id},sessionId={session_id}"
+
+
+def load_existing_matches(
     matches_container,
     division_id: str,
     session_id: str,
+    cache: IndexCache = None
+) -> Dict[Tuple[int, FrozenSet[str]], Dict]:
+    """
+    Load every existing match for a division/session in a single partition-scoped query.
+    
+    Args:
+        matches_container: Cosmos DB matches container client
+        division_id: Division ID (partition key)
+        session_id: Session ID
+        cache: Local index cache to serve unchanged matches from (optional)
+        
+    Returns:
+        Dict mapping (week, frozenset({homeTeamId, awayTeamId})) to match documents
+    """
+    parameters = [
+        {"name": "@divisionId", "value": division_id},
+        {"name": "@sessionId", "value": session_id}
+    ]
+    
+    items = cached_query(
+        matches_container,
+        cache,
+        "c.divisionId = @divisionId AND c.sessionId = @sessionId",
+        parameters,
+        partition_key=division_id,
+        scope=matches_cache_scope(division_id, session_id)
+    )
+    
+    return index_matches(items)
+
+
+def index_matches(matches) -> Dict[Tuple[int, FrozenSet[str]], Dict]:
+    """
+    Index match documents by week and (unordered) pair of team IDs.
+    
+    Args:
+        matches: Iterable of TeamMatch documents
+        
+    Returns:
+        Dict mapping (week, frozenset({homeTeamId, awayTeamId})) to match documents
+    """
+    match_index = {}
+    for item in matches:
+        key = (item.get("week"), frozenset({item.get("homeTeamId"), item.get("awayTeamId")}))
+        match_index[key] = item
+    
+    return match_index
+
+
+def check_match_exists(
+    match_index: Dict[Tuple[int, FrozenSet[str]], Dict],
     week: int,
     home_apa_id: str,
     away_apa_id: str,
     team_map: Dict[str, Dict]
 ) -> Optional[Dict]:
     """
-    Check if a match already exists for the given teams, week, and session.
+    Check if a match already exists for the given teams and week.
+    
+    Matches are looked up in the index built by load_existing_matches(), so
+    home/away order does not matter.
     
     Args:
-        matches_container: Cosmos DB matches container client
-        division_id: Division ID
-        session_id: Session ID
+        match_index: Existing matches from load_existing_matches()
         week: Week of play
         home_apa_id: Home team's APA ID
         away_apa_id: Away team's APA ID
@@ -236,67 +265,80 @@ def check_match_exists(
     if not home_info or not away_info:
         return None
     
-    home_team_id = home_info["id"]
-    away_team_id = away_info["id"]
-    
-    # Query for existing match
-    query = """SELECT * FROM c 
-               WHERE c.divisionId = @divisionId 
-               AND c.sessionId = @sessionId 
-               AND c.week = @week 
-               AND ((c.homeTeamId = @homeTeamId AND c.awayTeamId = @awayTeamId)
-                    OR (c.homeTeamId = @awayTeamId AND c.awayTeamId = @homeTeamId))"""
-    
-    parameters = [
-        {"name": "@divisionId", "value": division_id},
-        {"name": "@sessionId", "value": session_id},
-        {"name": "@week", "value": week},
-        {"name": "@homeTeamId", "value": home_team_id},
-        {"name": "@awayTeamId", "value": away_team_id}
-    ]
-    
-    items = list(matches_container.query_items(
-        query=query,
-        parameters=parameters,
-        enable_cross_partition_query=False,
-        partition_key=division_id
-    ))
-    
-    return items[0] if items else None
+    return match_index.get((week, frozenset({home_info["id"], away_info["id"]})))
 
 
-def build_team_mapping_from_db(teams_container, division_id: str) -> Dict[str, Dict]:
+def build_team_mapping_from_db(teams_container, division_id: str, cache: IndexCache = None) -> Dict[str, Dict]:
     """
     Build a mapping from APA team IDs to database team info by querying Cosmos DB.
     
     Args:
         teams_container: Cosmos DB teams container client
         division_id: Division ID to query
+        cache: Local index cache to serve unchanged teams from (optional)
         
     Returns:
         Dict mapping APA team IDs to {id, name, apaTeamId}
     """
-    query = "SELECT * FROM c WHERE c.divisionId = @divisionId"
-    parameters = [{"name": "@divisionId", "value": division_id}]
+    return index_teams_by_apa_id(load_division_teams(teams_container, division_id, cache))
+
+
+def load_division_teams(teams_container, division_id: str, cache: IndexCache = None) -> List[Dict]:
+    """
+    Load every team of a division in one single-partition query.
+    
+    Args:
+        teams_container: Cosmos DB teams container client
+        division_id: Division ID (the Teams partition key)
+        cache: Local index cache to serve unchanged teams from (optional)
+        
+    Returns:
+        List of Team documents
+    """
+    return cached_query(
+        teams_container,
+        cache,
+        "c.divisionId = @divisionId",
+        [{"name": "@divisionId", "value": division_id}],
+        partition_key=division_id,
+        scope=f"divisionId={division_id}"
+    )
+
+
+def team_apa_id(team: Dict) -> Optional[str]:
+    """
+    Get the APA team ID of a stored team document.
     
-    teams = list(teams_container.query_items(
-        query=query,
-        parameters=parameters,
-        enable_cross_partition_query=False
-    ))
+    Args:
+        team: Team document
+        
+    Returns:
+        apaTeamId, or the team number from the end of the ID for older documents
+    """
+    # Use apaTeamId if available, otherwise fall back to extracting number from ID
+    apa_team_id = team.get("apaTeamId")
+    if not apa_team_id:
+        # Fallback: extract team number from team ID (last component)
+        # E.g., "team_we_dem_boyz_03306" -> "03306"
+        parts = team["id"].split("_")
+        if len(parts) > 0:
+            apa_team_id = parts[-1]
+    return apa_team_id
+
+
+def index_teams_by_apa_id(teams) -> Dict[str, Dict]:
+    """
+    Index team documents by APA team ID.
     
+    Args:
+        teams: Iterable of Team documents
+        
+    Returns:
+        Dict mapping APA team IDs to {id, name, apaTeamId}
+    """
     team_map = {}
     for team in teams:
-        # Use apaTeamId if available, otherwise fall back to extracting number from ID
-        apa_team_id = team.get("apaTeamId")
-        if not apa_team_id:
-            # Fallback: extract team number from team ID (last component)
-            # E.g., "team_we_dem_boyz_03306" -> "03306"
-            team_id = team["id"]
-            parts = team_id.split("_")
-            if len(parts) > 0:
-                apa_team_id = parts[-1]
-        
+        apa_team_id = team_apa_id(team)
         if apa_team_id:
             team_map[apa_team_id] = {
                 "id": team["id"],
@@ -426,107 +468,164 @@ def transform_match(
     }
 
 
-def import_schedule(
-    division_id: int,
-    refresh_token: str,
-    session_id: str,
-    cosmos_uri: str,
-    cosmos_key: str,
-    cosmos_db: str,
-    what_if: bool = False,
-    one_team_apa_id: str = None,
-    sidespins_division_id: str = None
-):
+def match_patch_operations(existing: Dict, match_doc: Dict) -> Tuple[List[Dict], List[Dict]]:
     """
-    Main import function to fetch and import schedule data.
+    Build the partial-document patches that bring an existing match up to date.
+    
+    Only the schedule fields and, for completed matches, the API totals are
+    patched. Lineups, history and player matches are never sent back.
     
     Args:
-        division_id: Division ID to import
-        refresh_token: API refresh token
-        session_id: Session ID to link matches to
-        cosmos_uri: Cosmos DB endpoint URI
-        cosmos_key: Cosmos DB access key
-        cosmos_db: Cosmos DB database name
-        what_if: If True, preview changes without committing
-        one_team_apa_id: If provided, only import/update matches for this team (APA ID)
-        sidespins_division_id: Existing SideSpins division ID to use (optional)
+        existing: Stored match document
+        match_doc: Newly transformed match document
+        
+    Returns:
+        Tuple of (schedule field operations, totals operations); the totals
+        operations must be sent with TOTALS_FILTER_PREDICATE
     """
-    timestamp = datetime.utcnow().isoformat() + 'Z'
+    schedule_operations = [
+        {"op": "set", "path": f"/{field}", "value": match_doc[field]}
+        for field in SCHEDULE_FIELDS
+        if existing.get(field) != match_doc[field]
+    ]
     
-    # Statistics tracking
-    stats = {
+    totals_operations = []
+    if (
+        match_doc["status"] == "completed"
+        and not existing.get("playerMatches")
+        and existing.get("totals") != match_doc["totals"]
+    ):
+        totals_operations.append({"op": "set", "path": "/totals", "value": match_doc["totals"]})
+    
+    return schedule_operations, totals_operations
+
+
+def schedule_patch(existing: Dict, operations: List[Dict]) -> Tuple:
+    """
+    Batch operation patching a match's schedule fields.
+    
+    Sent with If-Match on the stored ETag, so a match changed since it was read
+    fails with 412 and is re-planned instead of overwritten.
+    """
+    return with_if_match(("patch", (existing["id"], operations)), existing.get("_etag"))
+
+
+def totals_patch(match_id: str, operations: List[Dict]) -> Tuple:
+    """
+    Batch operation patching a match's totals.
+    
+    Guarded by TOTALS_FILTER_PREDICATE rather than an ETag: it may follow the
+    schedule patch of the same match in one batch, which changes the ETag.
+    """
+    return ("patch", (match_id, operations), {"filter_predicate": TOTALS_FILTER_PREDICATE})
+
+
+def replan_match_write(outcome: str, match_doc: Dict, stored: Optional[Dict]) -> Optional[Tuple]:
+    """
+    Rebuild a conflicting match patch against a fresh read of the match.
+    
+    Args:
+        outcome: "updated" (schedule fields) or "totals_updated"
+        match_doc: Newly transformed match document
+        stored: Re-read match document (None if it was deleted)
+        
+    Returns:
+        Batch operation to retry, or None if the write is no longer needed
+    """
+    if stored is None:
+        return None
+    schedule_operations, totals_operations = match_patch_operations(stored, match_doc)
+    if outcome == "updated" and schedule_operations:
+        return schedule_patch(stored, schedule_operations)
+    if outcome == "totals_updated" and totals_operations:
+        return totals_patch(stored["id"], totals_operations)
+    return None
+
+
+def new_schedule_stats() -> Dict:
+    """
+    Create an empty statistics dict for a schedule import.
+    
+    Returns:
+        Statistics dict with all counters at zero
+    """
+    return {
         "weeks_processed": 0,
         "matches_created": 0,
         "matches_updated": 0,
+        "matches_totals_updated": 0,
+        "matches_totals_preserved": 0,
+        "matches_unchanged": 0,
+        "matches_failed": 0,
+        "matches_conflicts": 0,
         "matches_skipped_exists": 0,
         "matches_skipped_bye": 0,
         "matches_skipped_no_team": 0,
         "matches_skipped_not_target_team": 0,
         "warnings": []
     }
+
+
+def build_team_mapping_from_api(division_data: Dict) -> Dict[str, Dict]:
+    """
+    Build a simulated APA team ID mapping from API data (used in what-if mode).
     
-    # Fetch data from API
-    access_token = fetch_access_token(refresh_token)
-    division_data = fetch_division_schedule(access_token, division_id)
-    
-    # Build our division ID
-    if sidespins_division_id:
-        our_division_id = sidespins_division_id
-        print(f"Using provided SideSpins division ID: {our_division_id}")
-    else:
-        our_division_id = f"div_{division_id}"
-        print(f"Using generated division ID: {our_division_id}")
+    Args:
+        division_data: Division data from fetch_division_schedule()
+        
+    Returns:
+        Dict mapping APA team IDs to {id, name, apaTeamId}
+    """
+    team_map = {}
+    for team in division_data["teams"]:
+        if not team.get("isBye"):
+            apa_team_id = str(team["id"])
+            clean_name = clean_team_name(team["name"])
+            team_id = f"team_{slugify(clean_name)}_{team['number']}"
+            team_map[apa_team_id] = {
+                "id": team_id,
+                "name": clean_name,
+                "apaTeamId": apa_team_id
+            }
+    return team_map
+
+
+def plan_match_writes(
+    division_data: Dict,
+    team_map: Dict[str, Dict],
+    match_index: Dict[Tuple[int, FrozenSet[str]], Dict],
+    our_division_id: str,
+    session_id: str,
+    timestamp: str,
+    stats: Dict,
+    what_if: bool = False,
+    one_team_apa_id: str = None
+) -> Tuple[List[Tuple], List[Tuple[str, str]], List[Dict]]:
+    """
+    Walk the API schedule and decide which matches to create or update.
     
-    # Connect to Cosmos DB
-    if not what_if:
-        print(f"\nConnecting to Cosmos DB: {cosmos_db}...")
-        client = CosmosClient(cosmos_uri, cosmos_key)
-        database = client.get_database_client(cosmos_db)
-        teams_container = database.get_container_client("Teams")
-        matches_container = database.get_container_client("TeamMatches")
-        print("✓ Connected to Cosmos DB")
-    else:
-        print("\n[WHAT-IF MODE] - No changes will be made to the database")
-        teams_container = None
-        matches_container = None
+    This step does no I/O; existing matches come from match_index and the
+    returned operations are written by the caller.
     
-    # Build team mapping from database
-    print(f"\nBuilding team mapping from database...")
-    if not what_if:
-        team_map = build_team_mapping_from_db(teams_container, our_division_id)
-        print(f"✓ Found {len(team_map)} teams in database")
-        
-        # Filter to one team if specified
-        if one_team_apa_id:
-            if one_team_apa_id not in team_map:
-                print(f"\n⚠ WARNING: Team with APA ID '{one_team_apa_id}' not found in database")
-                print(f"Available APA team IDs in division {our_division_id}:")
-                for apa_id, info in sorted(team_map.items()):
-                    print(f"  - {apa_id}: {info['name']}")
-                raise Exception(f"Team with APA ID '{one_team_apa_id}' not found. See available IDs above.")
-            print(f"✓ Filtering to one team: {team_map[one_team_apa_id]['name']} (APA ID: {one_team_apa_id})")
-    else:
-        # In what-if mode, build mapping from API data
-        team_map = {}
-        for team in division_data["teams"]:
-            if not team.get("isBye"):
-                apa_team_id = str(team["id"])
-                clean_name = clean_team_name(team["name"])
-                team_id = f"team_{slugify(clean_name)}_{team['number']}"
-                team_map[apa_team_id] = {
-                    "id": team_id,
-                    "name": clean_name,
-                    "apaTeamId": apa_team_id
-                }
-        print(f"✓ [WHAT-IF] Simulated {len(team_map)} team mappings")
+    Args:
+        division_data: Division data from fetch_division_schedule()
+        team_map: Mapping of APA team IDs to team info
+        match_index: Existing matches from load_existing_matches()
+        our_division_id: SideSpins division ID (partition key)
+        session_id: Session ID to link matches to
+        timestamp: ISO timestamp for createdAt
+        stats: Statistics dict to update
+        what_if: If True, only preview (no operations are returned)
+        one_team_apa_id: If provided, only plan matches for this team (APA ID)
         
-        # Filter to one team if specified
-        if one_team_apa_id:
-            if one_team_apa_id not in team_map:
-                raise Exception(f"Team with APA ID '{one_team_apa_id}' not found in API data")
-            print(f"✓ [WHAT-IF] Filtering to one team: {team_map[one_team_apa_id]['name']} (APA ID: {one_team_apa_id})")
+    Returns:
+        Tuple of (batch operations, (label, outcome) per operation, transformed
+        match document per operation)
+    """
+    pending_writes = []
+    pending_labels = []
+    pending_docs = []
     
-    # Process schedule
     print(f"\n{'='*60}")
     print("SCHEDULE & MATCHES")
     print(f"{'='*60}")
@@ -602,66 +701,307 @@ def import_schedule(
                 if status == "completed":
                     print(f"    Score: {match_doc['totals']['homePoints']} - {match_doc['totals']['awayPoints']}")
                 stats["matches_created"] += 1
-            else:
-                # Check if match already exists
-                existing = check_match_exists(
-                    matches_container,
-                    our_division_id,
-                    session_id,
-                    week,
-                    home_apa_id,
-                    away_apa_id,
-                    team_map
-                )
+                continue
+            
+            # Check if match already exists
+            existing = check_match_exists(
+                match_index,
+                week,
+                home_apa_id,
+                away_apa_id,
+                team_map
+            )
+            
+            if existing:
+                # Match exists - patch schedule info only, preserve user data
+                schedule_operations, totals_operations = match_patch_operations(existing, match_doc)
                 
-                if existing:
-                    # Match exists - update schedule info only, preserve user data
-                    existing["scheduledAt"] = match_doc["scheduledAt"]
-                    existing["status"] = match_doc["status"]
-                    
-                    # Update totals if from API and existing doesn't have user-entered data
-                    if status == "completed" and not existing.get("playerMatches"):
-                        existing["totals"] = match_doc["totals"]
-                    
-                    matches_container.upsert_item(existing)
-                    print(f"  {status_emoji} {home_name} vs {away_name} - Updated")
-                    if status == "completed":
-                        print(f"    Score: {existing['totals']['homePoints']} - {existing['totals']['awayPoints']}")
-                    stats["matches_updated"] += 1
-                else:
-                    # Create new match
-                    matches_container.upsert_item(match_doc)
-                    print(f"  {status_emoji} {home_name} vs {away_name} - Created")
-                    if status == "completed":
-                        print(f"    Score: {match_doc['totals']['homePoints']} - {match_doc['totals']['awayPoints']}")
-                    stats["matches_created"] += 1
+                # Skip the write when nothing actually changed
+                if not schedule_operations and not totals_operations:
+                    print(f"  = {home_name} vs {away_name} - Unchanged")
+                    stats["matches_unchanged"] += 1
+                    continue
+                
+                label = f"{home_name} vs {away_name}"
+                if schedule_operations:
+                    pending_writes.append(schedule_patch(existing, schedule_operations))
+                    pending_labels.append((label, "updated"))
+                    pending_docs.append(match_doc)
+                if totals_operations:
+                    # Separate operation so a match scored in the app still gets its schedule fields
+                    pending_writes.append(totals_patch(existing["id"], totals_operations))
+                    pending_labels.append((label, "totals_updated"))
+                    pending_docs.append(match_doc)
+                print(f"  {status_emoji} {label} - Queued for update")
+                if totals_operations:
+                    print(f"    Score: {match_doc['totals']['homePoints']} - {match_doc['totals']['awayPoints']}")
+            else:
+                # Create new match
+                pending_writes.append(("upsert", (match_doc,)))
+                pending_labels.append((f"{home_name} vs {away_name}", "created"))
+                pending_docs.append(match_doc)
+                match_key = (week, frozenset({match_doc["homeTeamId"], match_doc["awayTeamId"]}))
+                match_index[match_key] = match_doc
+                print(f"  {status_emoji} {home_name} vs {away_name} - Queued for create")
+                if status == "completed":
+                    print(f"    Score: {match_doc['totals']['homePoints']} - {match_doc['totals']['awayPoints']}")
         
         stats["weeks_processed"] += 1
     
-    # Print summary
+    return pending_writes, pending_labels, pending_docs
+
+
+def record_match_write_results(
+    pending_labels: List[Tuple[str, str]],
+    results: List[Dict],
+    stats: Dict
+):
+    """
+    Fold per-operation batch outcomes into the import statistics.
+    
+    Args:
+        pending_labels: (label, outcome) per operation from plan_match_writes();
+            outcome is "created", "updated" or "totals_updated"
+        results: Per-operation results from execute_with_conflict_retry()
+        stats: Statistics dict to update
+    """
+    failed = 0
+    for (label, outcome), result in zip(pending_labels, results):
+        stats["matches_conflicts"] += result.get("conflicts", 0)
+        if result.get("superseded") and outcome == "totals_updated":
+            # Player matches were entered in the app since the match was read
+            print(f"  = {label} - Totals kept (player matches entered in the app)")
+            stats["matches_totals_preserved"] += 1
+        elif result.get("superseded"):
+            print(f"  = {label} - Already up to date after re-read")
+            stats["matches_unchanged"] += 1
+        elif result["ok"]:
+            stats[f"matches_{outcome}"] += 1
+        else:
+            warning = f"Failed to write match {label} (status {result['status_code']}): {result['error']}"
+            print(f"  ❌ {warning}")
+            stats["warnings"].append(warning)
+            stats["matches_failed"] += 1
+            failed += 1
+    print(f"✓ {len(pending_labels) - failed} of {len(pending_labels)} match writes succeeded")
+
+
+def print_schedule_summary(
+    stats: Dict,
+    what_if: bool = False,
+    one_team_apa_id: str = None,
+    graphql: GraphQLClient = None,
+    metrics: CosmosMetrics = None,
+    cache: IndexCache = None,
+    throttle: RuThrottle = None,
+    footer: bool = True
+):
+    """
+    Print the IMPORT SUMMARY block for a schedule import.
+    
+    Args:
+        stats: Statistics dict from the import
+        what_if: Whether the import ran in preview mode
+        one_team_apa_id: Team filter used for the import, if any
+        graphql: GraphQL client whose request counters to report (optional)
+        metrics: Cosmos DB request charge/latency metrics to report (optional)
+        cache: Local index cache whose hit counters to report (optional)
+        throttle: Write throttle whose counters to report (optional)
+        footer: Whether to end with the completion/WHAT-IF line (off when a caller
+            prints one footer for several summaries)
+    """
     print(f"\n{'='*60}")
     print("IMPORT SUMMARY")
     print(f"{'='*60}")
     print(f"Weeks:   {stats['weeks_processed']} processed")
     print(f"Matches: {stats['matches_created']} created")
     print(f"         {stats['matches_updated']} updated")
+    print(f"         {stats['matches_totals_updated']} scores updated")
+    print(f"         {stats['matches_totals_preserved']} scores preserved (player matches entered in the app)")
+    print(f"         {stats['matches_unchanged']} unchanged")
+    print(f"         {stats['matches_failed']} failed")
+    print(f"         {stats['matches_conflicts']} conflicts retried (changed in the app during the import)")
     print(f"         {stats['matches_skipped_exists']} skipped (already exist)")
     print(f"         {stats['matches_skipped_bye']} skipped (bye)")
     print(f"         {stats['matches_skipped_no_team']} skipped (team not found)")
     if one_team_apa_id:
         print(f"         {stats['matches_skipped_not_target_team']} skipped (not target team)")
+    if graphql:
+        graphql.print_stats()
+    if metrics:
+        metrics.print_summary()
+    if cache:
+        cache.print_stats()
+    if throttle:
+        throttle.print_stats()
     
     if stats["warnings"]:
         print(f"\n⚠ WARNINGS ({len(stats['warnings'])}):")
         for warning in stats["warnings"]:
             print(f"  - {warning}")
     
+    if not footer:
+        return
     if what_if:
         print("\n[WHAT-IF MODE] - No actual changes were made")
+    elif stats["matches_failed"]:
+        print(f"\n⚠ Import completed with {stats['matches_failed']} failed matches")
     else:
         print("\n✓ Import completed successfully")
 
 
+def import_schedule(
+    division_id: int,
+    refresh_token: str,
+    session_id: str,
+    cosmos_uri: str,
+    cosmos_key: str,
+    cosmos_db: str,
+    what_if: bool = False,
+    one_team_apa_id: str = None,
+    sidespins_division_id: str = None,
+    cosmos_client=None,
+    metrics_json: str = None,
+    index_cache: str = None,
+    ru_budget: float = None,
+    boost_ru: int = None
+):
+    """
+    Main import function to fetch and import schedule data.
+    
+    Args:
+        division_id: Division ID to import
+        refresh_token: API refresh token
+        session_id: Session ID to link matches to
+        cosmos_uri: Cosmos DB endpoint URI
+        cosmos_key: Cosmos DB access key
+        cosmos_db: Cosmos DB database name
+        what_if: If True, preview changes without committing
+        one_team_apa_id: If provided, only import/update matches for this team (APA ID)
+        sidespins_division_id: Existing SideSpins division ID to use (optional)
+        cosmos_client: Cosmos client to use instead of connecting with cosmos_uri/cosmos_key
+        metrics_json: Path to write Cosmos DB request charge/latency metrics to (optional)
+        index_cache: Path of a local SQLite index cache to look documents up in (optional)
+        ru_budget: Throttle writes to this many RU/s (optional)
+        boost_ru: Raise the TeamMatches throughput to this many RU/s while writing (optional)
+    """
+    timestamp = datetime.utcnow().isoformat() + 'Z'
+    
+    # Statistics tracking
+    stats = new_schedule_stats()
+    metrics = CosmosMetrics()
+    throttle = RuThrottle(ru_budget) if ru_budget else None
+    
+    # Fetch data from API
+    graphql = get_client()
+    access_token = graphql.authenticate(refresh_token)
+    division_data = fetch_division_schedule(access_token, division_id, graphql)
+    
+    # Build our division ID
+    if sidespins_division_id:
+        our_division_id = sidespins_division_id
+        print(f"Using provided SideSpins division ID: {our_division_id}")
+    else:
+        our_division_id = f"div_{division_id}"
+        print(f"Using generated division ID: {our_division_id}")
+    
+    # Connect to Cosmos DB
+    if not what_if:
+        print(f"\nConnecting to Cosmos DB: {cosmos_db}...")
+        client = cosmos_client or CosmosClient(cosmos_uri, cosmos_key)
+        database = client.get_database_client(cosmos_db)
+        teams_container = throttle_writes(throttle, metrics.wrap(database.get_container_client("Teams")))
+        matches_container = throttle_writes(throttle, metrics.wrap(database.get_container_client("TeamMatches")))
+        print("✓ Connected to Cosmos DB")
+        cache = IndexCache(index_cache) if index_cache else None
+    else:
+        print("\n[WHAT-IF MODE] - No changes will be made to the database")
+        teams_container = None
+        matches_container = None
+        cache = None
+    
+    # Build team mapping from database
+    print(f"\nBuilding team mapping from database...")
+    if not what_if:
+        team_map = build_team_mapping_from_db(teams_container, our_division_id, cache)
+        print(f"✓ Found {len(team_map)} teams in database")
+        
+        # Filter to one team if specified
+        if one_team_apa_id:
+            if one_team_apa_id not in team_map:
+                print(f"\n⚠ WARNING: Team with APA ID '{one_team_apa_id}' not found in database")
+                print(f"Available APA team IDs in division {our_division_id}:")
+                for apa_id, info in sorted(team_map.items()):
+                    print(f"  - {apa_id}: {info['name']}")
+                raise Exception(f"Team with APA ID '{one_team_apa_id}' not found. See available IDs above.")
+            print(f"✓ Filtering to one team: {team_map[one_team_apa_id]['name']} (APA ID: {one_team_apa_id})")
+    else:
+        # In what-if mode, build mapping from API data
+        team_map = build_team_mapping_from_api(division_data)
+        print(f"✓ [WHAT-IF] Simulated {len(team_map)} team mappings")
+        
+        # Filter to one team if specified
+        if one_team_apa_id:
+            if one_team_apa_id not in team_map:
+                raise Exception(f"Team with APA ID '{one_team_apa_id}' not found in API data")
+            print(f"✓ [WHAT-IF] Filtering to one team: {team_map[one_team_apa_id]['name']} (APA ID: {one_team_apa_id})")
+    
+    # Load existing matches once so per-match existence checks don't hit the database
+    if not what_if:
+        print(f"\nLoading existing matches for session {session_id}...")
+        match_index = load_existing_matches(matches_container, our_division_id, session_id, cache)
+        print(f"✓ Found {len(match_index)} existing matches in database")
+    else:
+        match_index = {}
+    
+    # Decide what to write, then flush it as batches
+    pending_writes, pending_labels, pending_docs = plan_match_writes(
+        division_data,
+        team_map,
+        match_index,
+        our_division_id,
+        session_id,
+        timestamp,
+        stats,
+        what_if=what_if,
+        one_team_apa_id=one_team_apa_id
+    )
+    
+    # All matches share the division partition, so write them as transactional batches
+    if pending_writes:
+        print(f"\nWriting {len(pending_writes)} matches in transactional batches...")
+        with boosted_throughput([database.get_container_client("TeamMatches")], boost_ru):
+            results = execute_with_conflict_retry(
+                matches_container,
+                pending_writes,
+                our_division_id,
+                replan=lambda i, stored: replan_match_write(pending_labels[i][1], pending_docs[i], stored)
+            )
+        record_match_write_results(pending_labels, results, stats)
+        remember(
+            cache,
+            matches_container,
+            matches_cache_scope(our_division_id, session_id),
+            [result["body"] for result in results]
+        )
+    
+    print_schedule_summary(stats, what_if, one_team_apa_id, graphql, metrics, cache, throttle)
+    if cache:
+        cache.close()
+    
+    if metrics_json:
+        metrics.write_json(
+            metrics_json,
+            script="import_schedule",
+            divisionId=division_id,
+            sessionId=session_id,
+            whatIf=what_if,
+            timestamp=timestamp,
+            throttle=throttle.summary() if throttle else None,
+            stats={key: value for key, value in stats.items() if key != "warnings"}
+        )
+
+
 def main():
     """Main entry point for the script."""
     parser = argparse.ArgumentParser(
@@ -675,8 +1015,7 @@ def main():
     )
     parser.add_argument(
         "--refresh-token",
-        required=True,
-        help="API refresh token for authentication"
+        help="API refresh token for authentication (not needed with --from-file/--from-dir)"
     )
     parser.add_argument(
         "--session-id",
@@ -711,10 +1050,34 @@ def main():
         "--sidespins-division-id",
         help="Existing SideSpins division ID to use (e.g., 'div_nottingham_wed_9b_311')"
     )
+    parser.add_argument(
+        "--metrics-json",
+        help="Write Cosmos DB request charge and latency metrics to this JSON file"
+    )
+    parser.add_argument(
+        "--index-cache",
+        nargs="?",
+        const=os.getenv("SIDESPINS_INDEX_CACHE", DEFAULT_INDEX_CACHE_PATH),
+        help="Look up existing documents through a local SQLite cache, validated against Cosmos DB "
+             f"(default path: $SIDESPINS_INDEX_CACHE or {DEFAULT_INDEX_CACHE_PATH})"
+    )
+    parser.add_argument(
+        "--ru-budget",
+        type=float,
+        help="Throttle writes to this many RU/s, backing off on 429s (default: no throttle)"
+    )
+    parser.add_argument(
+        "--boost-ru",
+        type=int,
+        help="Raise the TeamMatches provisioned throughput to this many RU/s while writing "
+             "and restore it afterwards (skipped on serverless accounts)"
+    )
+    add_graphql_arguments(parser)
     
     args = parser.parse_args()
     
     try:
+        configure_client_from_args(args)
         import_schedule(
             division_id=args.division_id,
             refresh_token=args.refresh_token,
@@ -724,7 +1087,11 @@ def main():
             cosmos_db=args.cosmos_db,
             what_if=args.what_if,
             one_team_apa_id=args.one_team_only,
-            sidespins_division_id=args.sidespins_division_id
+            sidespins_division_id=args.sidespins_division_id,
+            metrics_json=args.metrics_json,
+            index_cache=args.index_cache,
+            ru_budget=args.ru_budget,
+            boost_ru=args.boost_ru
         )
     except Exception as e:
         print(f"\n❌ Error: {e}", file=sys.stderr)
@@ -0,0 +1,239 @@
+"""
+index_cache.py - Optional local SQLite cache of the documents the importers look up
+
+The importers decide what to write by looking up existing teams (by APA team ID),
+memberships, matches (by week and teams) and players (by APA member number). With
+an IndexCache those documents are kept in a local SQLite file together with their
+_etag, and each lookup is validated lazily with a cheap projection query that
+returns only ids and ETags:
+
+  - entries whose ETag still matches are served from the cache
+  - new or changed documents are re-read from Cosmos DB in one bulk read
+  - documents that disappeared are dropped
+
+Documents the importers write are stored straight from the write responses, so a
+repeat import of an unchanged division costs only the validation queries.
+
+Documents are grouped by container and scope: the filter they were loaded with,
+e.g. "divisionId=div_418320" for a division's teams.
+"""
+
+import json
+import os
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional
+
+
+DEFAULT_INDEX_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "sidespins", "index.sqlite")
+
+# Players are partitioned by /id, so they are cached by ID alone
+PLAYER_SCOPE = ""
+
+
+class IndexCache:
+    """SQLite-backed document cache shared by importer runs."""
+
+    def __init__(self, path: str = DEFAULT_INDEX_CACHE_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.hits = 0
+        self.reads = 0
+        self._db = sqlite3.connect(path)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS documents (
+                   container TEXT NOT NULL,
+                   scope TEXT NOT NULL,
+                   id TEXT NOT NULL,
+                   etag TEXT,
+                   body TEXT NOT NULL,
+                   PRIMARY KEY (container, scope, id)
+               )"""
+        )
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+    def documents(self, container: str, scope: str, ids: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+        """
+        Get cached documents.
+
+        Args:
+            container: Container name
+            scope: Scope the documents were stored under
+            ids: Only return these IDs (optional)
+
+        Returns:
+            Dict mapping document IDs to documents
+        """
+        rows = self._db.execute(
+            "SELECT id, body FROM documents WHERE container = ? AND scope = ?", (container, scope)
+        ).fetchall()
+        wanted = set(ids) if ids is not None else None
+        return {
+            doc_id: json.loads(body)
+            for doc_id, body in rows
+            if wanted is None or doc_id in wanted
+        }
+
+    def put(self, container: str, scope: str, docs: Iterable[Dict]):
+        """
+        Store documents as returned by Cosmos DB (with their _etag).
+
+        Args:
+            container: Container name
+            scope: Scope to store the documents under
+            docs: Documents to store
+        """
+        self._db.executemany(
+            "INSERT OR REPLACE INTO documents (container, scope, id, etag, body) VALUES (?, ?, ?, ?, ?)",
+            [(container, scope, doc["id"], doc.get("_etag"), json.dumps(doc, default=str)) for doc in docs]
+        )
+        self._db.commit()
+
+    def remove(self, container: str, scope: str, ids: Iterable[str]):
+        """
+        Drop documents that no longer exist.
+
+        Args:
+            container: Container name
+            scope: Scope the documents were stored under
+            ids: Document IDs to drop
+        """
+        self._db.executemany(
+            "DELETE FROM documents WHERE container = ? AND scope = ? AND id = ?",
+            [(container, scope, doc_id) for doc_id in ids]
+        )
+        self._db.commit()
+
+    def print_stats(self):
+        """Print how many lookups were served from the cache."""
+        print(f"Index cache: {self.hits} documents current, {self.reads} re-read from Cosmos DB ({self.path})")
+
+
+def _refresh(
+    container,
+    cache: IndexCache,
+    scope: str,
+    current: Dict[str, str],
+    partition_key_of,
+    expected_ids: Optional[Iterable[str]] = None
+) -> List[Dict]:
+    """
+    Bring one scope of the cache in line with the ids/ETags Cosmos DB reported.
+
+    Args:
+        container: Cosmos DB container client
+        cache: Index cache
+        scope: Scope being validated
+        current: Document ID -> ETag from the validation query
+        partition_key_of: Returns the partition key value for a document ID
+        expected_ids: IDs the lookup asked for; cached IDs outside this set are kept
+
+    Returns:
+        Current documents of the scope
+    """
+    cached = cache.documents(container.id, scope, expected_ids)
+    stale = [doc_id for doc_id, etag in current.items() if cached.get(doc_id, {}).get("_etag") != etag]
+    gone = [doc_id for doc_id in cached if doc_id not in current]
+
+    fresh = list(container.read_items(items=[(doc_id, partition_key_of(doc_id)) for doc_id in stale])) if stale else []
+    if fresh:
+        cache.put(container.id, scope, fresh)
+    if gone:
+        cache.remove(container.id, scope, gone)
+
+    cache.hits += len(current) - len(stale)
+    cache.reads += len(fresh)
+    docs = {doc_id: cached[doc_id] for doc_id in current if doc_id not in stale}
+    docs.update({doc["id"]: doc for doc in fresh})
+    return list(docs.values())
+
+
+def cached_query(
+    container,
+    cache: Optional[IndexCache],
+    where: str,
+    parameters: List[Dict],
+    partition_key: Any,
+    scope: str
+) -> List[Dict]:
+    """
+    Run a single-partition SELECT * query, serving unchanged documents from the cache.
+
+    Without a cache this is a plain query. With one, only ids and ETags are
+    queried and new or changed documents are bulk-read.
+
+    Args:
+        container: Cosmos DB container client
+        cache: Index cache, or None
+        where: Filter, e.g. "c.divisionId = @divisionId"
+        parameters: Query parameters
+        partition_key: Partition key value the query is scoped to
+        scope: Cache scope for the filter, e.g. "divisionId=div_418320"
+
+    Returns:
+        Matching documents
+    """
+    if cache is None:
+        return list(container.query_items(
+            query=f"SELECT * FROM c WHERE {where}",
+            parameters=parameters,
+            partition_key=partition_key
+        ))
+
+    current = {
+        row["id"]: row.get("_etag")
+        for row in container.query_items(
+            query=f"SELECT c.id, c._etag FROM c WHERE {where}",
+            parameters=parameters,
+            partition_key=partition_key
+        )
+    }
+    return _refresh(container, cache, scope, current, lambda doc_id: partition_key)
+
+
+def cached_read_players(players_container, cache: Optional[IndexCache], player_ids: List[str]) -> List[Dict]:
+    """
+    Bulk-read players by ID, serving unchanged players from the cache.
+
+    Args:
+        players_container: Cosmos DB players container client (partitioned by /id)
+        cache: Index cache, or None
+        player_ids: Player IDs to read
+
+    Returns:
+        Players that exist
+    """
+    if not player_ids:
+        return []
+    if cache is None:
+        return list(players_container.read_items(items=[(player_id, player_id) for player_id in player_ids]))
+
+    current = {
+        row["id"]: row.get("_etag")
+        for row in players_container.query_items(
+            query="SELECT c.id, c._etag FROM c WHERE ARRAY_CONTAINS(@ids, c.id)",
+            parameters=[{"name": "@ids", "value": list(player_ids)}],
+            enable_cross_partition_query=True
+        )
+    }
+    return _refresh(players_container, cache, PLAYER_SCOPE, current, lambda doc_id: doc_id, player_ids)
+
+
+def remember(cache: Optional[IndexCache], container, scope: str, docs: Iterable[Optional[Dict]]):
+    """
+    Store documents returned by writes so the next run does not re-read them.
+
+    Args:
+        cache: Index cache, or None (no-op)
+        container: Container client the documents were written to
+        scope: Cache scope the documents belong to
+        docs: Written documents as returned by Cosmos DB (None entries are skipped)
+    """
+    if cache is None:
+        return
+    docs = [doc for doc in docs if doc and doc.get("_etag")]
+    if docs:
+        cache.put(container.id, scope, docs)
@@ -0,0 +1,465 @@
+"""
+memory_cosmos.py - In-memory stand-in for the Cosmos DB client used by the importers
+
+Implements the subset of the azure-cosmos API that the TeamsIngest importers call
+(query_items, read_item, read_items, upsert_item, patch_item, execute_item_batch) against documents held in
+memory, so imports can be run and benchmarked without a Cosmos DB account.
+
+Every round trip can sleep for an injected latency and is charged a simulated
+request charge (RU). The charge is reported the same way the SDK reports it: in the
+x-ms-request-charge header of client_connection.last_response_headers and through
+an optional response_hook(headers, result) keyword argument.
+
+The RU model is a rough approximation of Cosmos DB pricing for small documents. It
+is meant for comparing code paths, not for predicting an Azure bill.
+"""
+
+import json
+import math
+import re
+import time
+import uuid
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from azure.cosmos import exceptions
+
+
+# Partition key paths, mirroring CONTAINER_SPECS in db/import_cosmos_sidespins.py
+PARTITION_KEY_PATHS = {
+    "Divisions": "/id",
+    "Teams": "/divisionId",
+    "Players": "/id",
+    "TeamMemberships": "/teamId",
+    "TeamMatches": "/divisionId",
+    "Sessions": "/divisionId",
+    "Observations": "/id",
+    "Notes": "/observationId",
+}
+
+# Simulated request charges
+POINT_READ_RU_PER_KB = 1.0
+CREATE_RU_PER_KB = 5.7
+REPLACE_RU_PER_KB = 10.7
+QUERY_BASE_RU = 2.8
+QUERY_RU_PER_RESULT_KB = 0.4
+QUERY_PAGE_SIZE = 100
+
+# Supported WHERE terms: c.field = @param and ARRAY_CONTAINS(@param, c.field), joined with AND
+_WHERE_TERM = re.compile(r"^c\.(\w+)\s*=\s*(@\w+)$")
+_ARRAY_CONTAINS_TERM = re.compile(r"^ARRAY_CONTAINS\((@\w+),\s*c\.(\w+)\)$", re.IGNORECASE)
+
+# Supported projections: * or a list of top-level fields (c.id, c._etag)
+_PROJECTION = re.compile(r"^(?:\*|c\.\w+(?:\s*,\s*c\.\w+)*)$")
+
+# Supported patch filter predicates: FROM c WHERE [NOT] IS_DEFINED(c.path), path may index arrays
+_FILTER_PREDICATE = re.compile(r"^FROM c WHERE (NOT )?IS_DEFINED\(c((?:\.\w+|\[\d+\])+)\)$", re.IGNORECASE)
+
+
+def _size_kb(doc: Dict) -> int:
+    return max(1, math.ceil(len(json.dumps(doc, default=str)) / 1024))
+
+
+def _page_kb(page: List[Dict]) -> float:
+    # Query results are charged by the bytes returned, so projections cost less
+    return len(json.dumps(page, default=str)) / 1024
+
+
+def _apply_patch(doc: Dict, operations: List[Dict]) -> Dict:
+    """
+    Apply partial-document patch operations (set/replace/add/remove/incr) to a copy of doc.
+
+    Raises:
+        ValueError: If an operation is unsupported or its path does not exist
+    """
+    patched = json.loads(json.dumps(doc, default=str))
+    for operation in operations:
+        *parents, field = operation["path"].strip("/").split("/")
+        target = patched
+        for parent in parents:
+            target = target[parent]
+        op = operation["op"]
+        if op in ("set", "add"):
+            target[field] = operation["value"]
+        elif op == "replace" and field in target:
+            target[field] = operation["value"]
+        elif op == "remove" and field in target:
+            del target[field]
+        elif op == "incr":
+            target[field] = target.get(field, 0) + operation["value"]
+        else:
+            raise ValueError(f"Cannot apply patch operation {op} to {operation['path']}")
+    return patched
+
+
+def _matches_filter(doc: Dict, predicate: Optional[str]) -> bool:
+    """
+    Evaluate a patch filter predicate against a document.
+
+    Raises:
+        ValueError: If the predicate uses syntax the stand-in does not support
+    """
+    if not predicate:
+        return True
+    match = _FILTER_PREDICATE.match(" ".join(predicate.split()))
+    if not match:
+        raise ValueError(f"Unsupported filter predicate for in-memory container: {predicate}")
+
+    value: Any = doc
+    defined = True
+    for part in re.findall(r"\.(\w+)|\[(\d+)\]", match.group(2)):
+        field, index = part
+        if field and isinstance(value, dict) and field in value:
+            value = value[field]
+        elif index and isinstance(value, list) and int(index) < len(value):
+            value = value[int(index)]
+        else:
+            defined = False
+            break
+    return defined != bool(match.group(1))
+
+
+def _parse_query(query: str) -> Tuple[Optional[List[str]], List[Tuple[str, str, str]]]:
+    """
+    Parse a "SELECT * FROM c WHERE c.a = @a AND ..." query.
+
+    Args:
+        query: SQL query text
+
+    Returns:
+        (projected fields, or None for *; list of (operator, field, parameter name)
+        terms, operator being "=" or "in")
+
+    Raises:
+        ValueError: If the query uses syntax the stand-in does not support
+    """
+    text = " ".join(query.split())
+    match = re.match(r"^SELECT (.+?) FROM c(?: WHERE (.+))?$", text, re.IGNORECASE)
+    if not match or not _PROJECTION.match(match.group(1)):
+        raise ValueError(f"Unsupported query for in-memory container: {text}")
+    fields = None if match.group(1) == "*" else re.findall(r"c\.(\w+)", match.group(1))
+    if not match.group(2):
+        return fields, []
+
+    terms = []
+    for term in re.split(r"\s+AND\s+", match.group(2), flags=re.IGNORECASE):
+        term_match = _WHERE_TERM.match(term.strip())
+        contains_match = _ARRAY_CONTAINS_TERM.match(term.strip())
+        if term_match:
+            terms.append(("=", term_match.group(1), term_match.group(2)))
+        elif contains_match:
+            terms.append(("in", contains_match.group(2), contains_match.group(1)))
+        else:
+            raise ValueError(f"Unsupported WHERE term for in-memory container: {term}")
+    return fields, terms
+
+
+def _matches_terms(doc: Dict, terms: List[Tuple[str, str, str]], values: Dict[str, Any]) -> bool:
+    return all(
+        doc.get(field) == values.get(name) if operator == "=" else doc.get(field) in (values.get(name) or [])
+        for operator, field, name in terms
+    )
+
+
+class _ClientConnection:
+    """Holds the headers of the last response, like the SDK's CosmosClientConnection."""
+
+    def __init__(self):
+        self.last_response_headers: Dict[str, str] = {}
+
+
+class InMemoryContainer:
+    """Container stand-in storing documents by (partition key value, id)."""
+
+    def __init__(self, client: "InMemoryCosmosClient", name: str, partition_key_path: str):
+        self.client = client
+        self.client_connection = client.client_connection
+        self.id = name
+        self.partition_key_path = partition_key_path
+        self.items: Dict[Tuple[Any, str], Dict] = {}
+        self.operations: Counter = Counter()
+        self.round_trips = 0
+        self.request_charge = 0.0
+
+    def _partition_key_of(self, doc: Dict) -> Any:
+        return doc.get(self.partition_key_path.lstrip("/"))
+
+    def _round_trip(self, operation: str, charge: float) -> Dict[str, str]:
+        """Account for one round trip: sleep, charge RU and publish response headers."""
+        if self.client.latency_ms:
+            time.sleep(self.client.latency_ms / 1000)
+        self.operations[operation] += 1
+        self.round_trips += 1
+        self.request_charge += charge
+        headers = {
+            "x-ms-request-charge": f"{charge:.2f}",
+            "x-ms-activity-id": str(uuid.uuid4()),
+        }
+        self.client_connection.last_response_headers = headers
+        return headers
+
+    def _respond(self, operation: str, charge: float, result, response_hook: Optional[Callable] = None):
+        """Complete a successful round trip, calling response_hook like the SDK does."""
+        headers = self._round_trip(operation, charge)
+        if response_hook:
+            response_hook(headers, result)
+        return result
+
+    def _not_found(self, item: str, headers: Dict[str, str]):
+        error = exceptions.CosmosResourceNotFoundError(
+            status_code=404,
+            message=f"Entity with the specified id does not exist in the system. ('{item}' in {self.id})"
+        )
+        error.headers = headers
+        return error
+
+    def _write(self, body: Dict) -> Tuple[Dict, float, int]:
+        """Store a document and return (stored doc, charge, status code)."""
+        doc = json.loads(json.dumps(body, default=str))
+        key = (self._partition_key_of(doc), doc["id"])
+        replaced = key in self.items
+        doc["_etag"] = f'"{uuid.uuid4()}"'
+        doc["_ts"] = int(time.time())
+        self.items[key] = doc
+        rate = REPLACE_RU_PER_KB if replaced else CREATE_RU_PER_KB
+        return doc, rate * _size_kb(doc), 200 if replaced else 201
+
+    def query_items(
+        self,
+        query: str,
+        parameters: Optional[List[Dict]] = None,
+        partition_key: Any = None,
+        enable_cross_partition_query: Optional[bool] = None,
+        response_hook: Optional[Callable] = None,
+        **kwargs
+    ) -> List[Dict]:
+        """
+        Run a filter query; one round trip per page of results.
+
+        A query without partition_key is charged once per physical partition.
+        Projections are charged by the size of the projected results.
+        """
+        values = {p["name"]: p["value"] for p in parameters or []}
+        fields, terms = _parse_query(query)
+        results = [
+            dict(doc) if fields is None else {field: doc[field] for field in fields if field in doc}
+            for (pk, _), doc in self.items.items()
+            if (partition_key is None or pk == partition_key) and _matches_terms(doc, terms, values)
+        ]
+
+        fan_out = 1 if partition_key is not None else self.client.physical_partitions
+        pages = [results[i:i + QUERY_PAGE_SIZE] for i in range(0, len(results), QUERY_PAGE_SIZE)] or [[]]
+        for page in pages:
+            charge = QUERY_BASE_RU * fan_out + QUERY_RU_PER_RESULT_KB * _page_kb(page)
+            self._respond("query", charge, page, response_hook)
+        return results
+
+    def read_item(self, item: str, partition_key: Any, response_hook: Optional[Callable] = None, **kwargs) -> Dict:
+        """Point-read a document."""
+        doc = self.items.get((partition_key, item))
+        if doc is None:
+            raise self._not_found(item, self._round_trip("read", POINT_READ_RU_PER_KB))
+        return self._respond("read", POINT_READ_RU_PER_KB * _size_kb(doc), dict(doc), response_hook)
+
+    def read_items(self, items: List[Tuple[str, Any]], response_hook: Optional[Callable] = None, **kwargs) -> List[Dict]:
+        """
+        Bulk-read documents by (id, partition key); missing ones are left out.
+
+        Charged like a query per physical partition touched plus a point read per
+        document found, in one round trip.
+        """
+        found = [dict(self.items[(pk, item)]) for item, pk in items if (pk, item) in self.items]
+        fan_out = min(self.client.physical_partitions, len({pk for _, pk in items})) or 1
+        charge = QUERY_BASE_RU * fan_out + POINT_READ_RU_PER_KB * sum(_size_kb(doc) for doc in found)
+        return self._respond("read_items", charge, found, response_hook)
+
+    def upsert_item(self, body: Dict, response_hook: Optional[Callable] = None, **kwargs) -> Dict:
+        """Create or replace a document."""
+        doc, charge, _ = self._write(body)
+        return self._respond("upsert", charge, dict(doc), response_hook)
+
+    def patch_item(
+        self,
+        item: str,
+        partition_key: Any,
+        patch_operations: List[Dict],
+        filter_predicate: Optional[str] = None,
+        response_hook: Optional[Callable] = None,
+        **kwargs
+    ) -> Dict:
+        """Apply partial-document patch operations to a stored document."""
+        stored = self.items.get((partition_key, item))
+        if stored is None:
+            raise self._not_found(item, self._round_trip("patch", POINT_READ_RU_PER_KB))
+        if not _matches_filter(stored, filter_predicate):
+            error = exceptions.CosmosHttpResponseError(
+                status_code=412, message="Precondition Failed: the patch filter predicate is not satisfied"
+            )
+            error.headers = self._round_trip("patch", POINT_READ_RU_PER_KB)
+            raise error
+        doc, charge, _ = self._write(_apply_patch(stored, patch_operations))
+        return self._respond("patch", charge, dict(doc), response_hook)
+
+    def execute_item_batch(
+        self,
+        batch_operations: List[Tuple],
+        partition_key: Any,
+        response_hook: Optional[Callable] = None,
+        **kwargs
+    ) -> List[Dict]:
+        """
+        Run a transactional batch of upsert/create/replace/patch/read/delete operations.
+
+        The batch is atomic: if one operation fails nothing is stored and
+        CosmosBatchOperationError is raised with the failing operation's index.
+        Operations may carry if_match_etag and (patch) filter_predicate options.
+        """
+        if len(batch_operations) > 100:
+            raise exceptions.CosmosHttpResponseError(
+                status_code=400,
+                message=f"Batch request has more operations than what is supported ({len(batch_operations)} > 100)"
+            )
+
+        snapshot = dict(self.items)
+        responses = []
+        charge = 0.0
+        for index, operation in enumerate(batch_operations):
+            kind, args = operation[0], operation[1]
+            options = operation[2] if len(operation) > 2 else {}
+            status_code = None
+            op_charge = 0.0
+            body = None
+            if_match = options.get("if_match_etag")
+            target = args[0] if isinstance(args[0], str) else args[-1]["id"]
+            stored = self.items.get((partition_key, target))
+            if if_match and (stored is None or stored.get("_etag") != if_match):
+                status_code = 412 if stored is not None else 404
+            elif kind in ("upsert", "create", "replace"):
+                # replace takes (id, body), the others (body,)
+                doc = args[-1]
+                key = (self._partition_key_of(doc), doc["id"])
+                if key[0] != partition_key:
+                    status_code = 400
+                elif kind == "create" and key in self.items:
+                    status_code = 409
+                elif kind == "replace" and key not in self.items:
+                    status_code = 404
+                else:
+                    body, op_charge, status_code = self._write(doc)
+            elif kind == "patch":
+                key = (partition_key, args[0])
+                if key not in self.items:
+                    status_code = 404
+                elif not _matches_filter(self.items[key], options.get("filter_predicate")):
+                    status_code = 412
+                else:
+                    try:
+                        body, op_charge, _ = self._write(_apply_patch(self.items[key], args[1]))
+                        status_code = 200
+                    except (KeyError, ValueError):
+                        status_code = 400
+            elif kind in ("read", "delete"):
+                key = (partition_key, args[0])
+                if key not in self.items:
+                    status_code = 404
+                else:
+                    op_charge = POINT_READ_RU_PER_KB * _size_kb(self.items[key])
+                    if kind == "read":
+                        body = self.items[key]
+                    if kind == "delete":
+                        del self.items[key]
+                    status_code = 200 if kind == "read" else 204
+            else:
+                raise ValueError(f"Unsupported batch operation for in-memory container: {kind}")
+
+            charge += op_charge
+            if status_code >= 400:
+                self.items = snapshot
+                operation_responses = [{"statusCode": 424} for _ in batch_operations]
+                operation_responses[index] = {"statusCode": status_code}
+                headers = self._round_trip("batch", charge)
+                raise exceptions.CosmosBatchOperationError(
+                    error_index=index,
+                    headers=headers,
+                    status_code=status_code,
+                    message=f"Batch operation {index} ({kind}) failed with status {status_code}",
+                    operation_responses=operation_responses
+                )
+            response = {"statusCode": status_code, "requestCharge": round(op_charge, 2)}
+            if body is not None:
+                response.update(eTag=body["_etag"], resourceBody=dict(body))
+            responses.append(response)
+
+        return self._respond("batch", charge, responses, response_hook)
+
+
+class InMemoryDatabase:
+    """Database stand-in that creates containers on first use."""
+
+    def __init__(self, client: "InMemoryCosmosClient", name: str):
+        self.client = client
+        self.id = name
+        self.containers: Dict[str, InMemoryContainer] = {}
+
+    def get_container_client(self, container: str) -> InMemoryContainer:
+        if container not in self.containers:
+            path = PARTITION_KEY_PATHS.get(container, "/id")
+            self.containers[container] = InMemoryContainer(self.client, container, path)
+        return self.containers[container]
+
+
+class InMemoryCosmosClient:
+    """
+    Drop-in replacement for azure.cosmos.CosmosClient backed by memory.
+
+    Args:
+        url: Ignored (accepted for CosmosClient compatibility)
+        credential: Ignored
+        latency_ms: Simulated latency per round trip
+        physical_partitions: Partitions a cross-partition query fans out to
+    """
+
+    def __init__(
+        self,
+        url: str = None,
+        credential: str = None,
+        latency_ms: float = 0.0,
+        physical_partitions: int = 1
+    ):
+        self.latency_ms = latency_ms
+        self.physical_partitions = max(1, physical_partitions)
+        self.client_connection = _ClientConnection()
+        self.databases: Dict[str, InMemoryDatabase] = {}
+
+    def get_database_client(self, database: str) -> InMemoryDatabase:
+        if database not in self.databases:
+            self.databases[database] = InMemoryDatabase(self, database)
+        return self.databases[database]
+
+    def containers(self) -> List[InMemoryContainer]:
+        """All containers created so far, across databases."""
+        return [c for db in self.databases.values() for c in db.containers.values()]
+
+    def reset_counters(self):
+        """Zero operation counts, round trips and request charges (documents are kept)."""
+        for container in self.containers():
+            container.operations.clear()
+            container.round_trips = 0
+            container.request_charge = 0.0
+
+    def counters(self) -> Dict[str, Dict]:
+        """
+        Per-container operation counts, round trips and request charge.
+
+        Returns:
+            Dict mapping container name to {operations, round_trips, request_charge}
+        """
+        return {
+            container.id: {
+                "operations": dict(container.operations),
+                "round_trips": container.round_trips,
+                "request_charge": round(container.request_charge, 2),
+            }
+            for container in self.containers()
+            if container.round_trips
+        }
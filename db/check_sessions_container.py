@@ -29,10 +29,10 @@ def main():
             print("✓ Partition key is correct: /divisionId")
         else:
             print(f"✗ WRONG partition key! Expected ['/divisionId'], got {props['partitionKey']['paths']}")
-            print("\nTo fix this, you need to:")
-            print("1. Delete the Sessions container")
-            print("2. Recreate it with partition key /divisionId")
-            print("\nRun: python import_cosmos_sidespins.py --seed ./seed_sidespins.json")
+            print("\nTo fix this, copy it while the app runs, then swap with the app stopped:")
+            print("Run: python migrate_containers.py migrate --container Sessions")
+            print("Then: python migrate_containers.py migrate --container Sessions --swap --writes-stopped")
+            print("(python migrate_containers.py check checks every container)")
             
     except exceptions.CosmosResourceNotFoundError:
         print("Sessions container not found!")
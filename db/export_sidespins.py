@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+export_sidespins.py
+Exports Sidespins containers from Azure Cosmos DB to a snapshot of gzipped NDJSON files.
+
+Usage:
+  python export_sidespins.py --out ./snapshot-2025-fall
+
+Environment variables:
+  COSMOS_URI, COSMOS_KEY, COSMOS_DB (as for import_cosmos_sidespins.py)
+Optional flags:
+  --containers Teams Players  Export only these containers (default: all in CONTAINER_SPECS)
+  --workers 8           Feed ranges read concurrently
+  --ru-budget 400       Throttle reads to this many RU/s, backing off on 429s
+  --page-size 1000      Documents per read
+  --metrics-json PATH   Write request charge/latency per container to PATH
+
+Each container is read with one reader per feed range (a physical partition), all
+containers at once, and each reader streams its documents into
+<Container>.<n>.ndjson.gz in the seed importer's NDJSON format:
+  {"container": "Players", "doc": {"id": "p_12345", ...}}
+System properties (_rid, _etag, _ts, ...) are dropped. manifest.json is written last
+and lists every file with its document count and checksum, so a directory without
+one holds an incomplete export. Checksums are the ones migrate_containers.py
+verifies with, summed per container.
+
+Load a snapshot into another database (counts are checked against the manifest):
+  python import_cosmos_sidespins.py --seed ./snapshot-2025-fall --create-db
+
+Feed ranges are read independently, so the export is not a point-in-time snapshot:
+documents written while it runs may or may not be in it.
+"""
+import os
+import gzip
+import json
+import argparse
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, Any, List, Optional
+from azure.cosmos import CosmosClient, exceptions
+
+from import_cosmos_sidespins import (
+    CONTAINER_SPECS, MANIFEST_FORMAT, MANIFEST_NAME, Progress, RuThrottle, get_required_env,
+)
+from migrate_containers import count, doc_checksum, read_pages, strip_system
+# Tools/TeamsIngest is on sys.path once import_cosmos_sidespins is imported
+from cosmos_metrics import CosmosMetrics
+
+class Stopped(Exception):
+    """Raised by export_range() when the export is abandoned while it reads."""
+
+def export_range(container, name: str, feed_range: Dict[str, Any], path: str, page_size: int,
+                 metrics: CosmosMetrics, throttle: Optional[RuThrottle], progress: Progress,
+                 stop: threading.Event) -> Dict[str, Any]:
+    """
+    Stream one feed range into path; returns its manifest entry.
+
+    Pages are read from the previous page's continuation token, so a 429 the SDK gave
+    up on is retried (with --ru-budget) from that page. The file is written as
+    path.partial and only renamed once the range has been read in full (and removed
+    if it is not). stop is checked between pages and raises Stopped once it is set.
+    """
+    partial = path + ".partial"
+    total, checksum = 0, 0
+    try:
+        with gzip.open(partial, "wt", encoding="utf-8", compresslevel=6) as f:
+            for page in read_pages(container, metrics, throttle, feed_range=feed_range, page_size=page_size):
+                if stop.is_set():
+                    raise Stopped(path)
+                for doc in page:
+                    doc = strip_system(doc)
+                    f.write(json.dumps({"container": name, "doc": doc}, separators=(",", ":")) + "\n")
+                    checksum = (checksum + doc_checksum(doc)) % 2**64
+                total += len(page)
+                progress.add(len(page))
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    os.replace(partial, path)
+    return {
+        "path": os.path.basename(path),
+        "container": name,
+        "count": total,
+        "checksum": f"{checksum:016x}",
+        "bytes": os.path.getsize(path),
+    }
+
+def plan(db, names: List[str]):
+    """(container, feed ranges, document count) of each existing container, read concurrently."""
+    def describe(name: str):
+        container = db.get_container_client(name)
+        try:
+            return container, list(container.read_feed_ranges()), count(container)
+        except exceptions.CosmosResourceNotFoundError:
+            return None
+    with ThreadPoolExecutor(max_workers=len(names)) as executor:
+        return dict(zip(names, executor.map(describe, names)))
+
+def export(db, dbname: str, names: List[str], out: str, workers: int, page_size: int,
+           metrics: CosmosMetrics, throttle: Optional[RuThrottle]) -> Dict[str, Any]:
+    """Export names into out and write its manifest; returns the manifest."""
+    found = {}
+    for name, info in plan(db, names).items():
+        if info is None:
+            print(f"[skip] {name}: container does not exist")
+        else:
+            found[name] = info
+    tasks = [(name, i, feed_range) for name, (_, ranges, _) in found.items() for i, feed_range in enumerate(ranges)]
+    progress = Progress(sum(n for _, _, n in found.values()), metrics)
+    print(f"[export] {len(found)} containers, {len(tasks)} feed ranges -> {out}")
+
+    paths = [os.path.join(out, f"{name}.{i}.ndjson.gz") for name, i, _ in tasks]
+    stop = threading.Event()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [
+            executor.submit(export_range, found[name][0], name, feed_range, path, page_size, metrics, throttle,
+                            progress, stop)
+            for (name, i, feed_range), path in zip(tasks, paths)
+        ]
+        try:
+            files = [f.result() for f in futures]
+        except BaseException as e:
+            # Queued ranges are cancelled; running ones stop at their next page
+            stop.set()
+            for f in futures:
+                f.cancel()
+            try:
+                wait(futures)
+            finally:
+                # Without a manifest the files are unusable; leave nothing half-written behind,
+                # even if a second Ctrl-C cuts the wait short
+                for path in paths:
+                    for leftover in (path, path + ".partial"):
+                        if os.path.exists(leftover):
+                            os.remove(leftover)
+            failed = [os.path.basename(p) for p, f in zip(paths, futures)
+                      if not f.cancelled() and f.exception() and not isinstance(f.exception(), Stopped)]
+            if failed:
+                progress.note(f"[!] Export failed reading {', '.join(failed)}: {e}. Partial files removed.")
+            else:
+                progress.note("[!] Export interrupted. Partial files removed.")
+            raise
+    progress.done()
+
+    containers = {}
+    for name in found:
+        entries = [e for e in files if e["container"] == name]
+        checksum = sum(int(e["checksum"], 16) for e in entries) % 2**64
+        containers[name] = {
+            "partitionKey": CONTAINER_SPECS[name]["partition_key"],
+            "count": sum(e["count"] for e in entries),
+            "checksum": f"{checksum:016x}",
+        }
+        print(f"[ok] {name}: {containers[name]['count']} docs in {len(entries)} files, checksum {checksum:016x}")
+    manifest = {
+        "format": MANIFEST_FORMAT,
+        "database": dbname,
+        "exportedAt": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "containers": containers,
+        "files": files,
+    }
+    with open(os.path.join(out, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def get_args():
+    p = argparse.ArgumentParser(description="Export Sidespins containers to gzipped NDJSON with a manifest")
+    p.add_argument("--out", required=True, help="Directory for the snapshot (must not already hold one)")
+    p.add_argument("--containers", nargs="+", choices=list(CONTAINER_SPECS), default=list(CONTAINER_SPECS),
+                   help="Containers to export (default: all)")
+    p.add_argument("--workers", type=int, default=8, help="Feed ranges read concurrently (default: 8)")
+    p.add_argument("--ru-budget", type=float, help="Throttle reads to this many RU/s (default: no throttle)")
+    p.add_argument("--page-size", type=int, default=1000, help="Documents per read (default: 1000)")
+    p.add_argument("--metrics-json", help="Write request charge/latency metrics to this JSON file")
+    return p.parse_args()
+
+def main():
+    args = get_args()
+    uri = get_required_env("COSMOS_URI")
+    key = get_required_env("COSMOS_KEY")
+    dbname = get_required_env("COSMOS_DB")
+
+    if os.path.exists(os.path.join(args.out, MANIFEST_NAME)):
+        raise SystemExit(f"{args.out} already holds a snapshot; choose another --out")
+    os.makedirs(args.out, exist_ok=True)
+
+    db = CosmosClient(uri, key).get_database_client(dbname)
+    metrics = CosmosMetrics()
+    throttle = RuThrottle(args.ru_budget) if args.ru_budget else None
+    manifest = export(db, dbname, args.containers, args.out, args.workers, args.page_size, metrics, throttle)
+
+    size = sum(e["bytes"] for e in manifest["files"])
+    print(f"\nDone. {sum(c['count'] for c in manifest['containers'].values())} docs, "
+          f"{size / 1024 / 1024:.1f} MB in {args.out}")
+    metrics.print_summary()
+    if throttle:
+        throttle.print_stats()
+    if args.metrics_json:
+        metrics.write_json(args.metrics_json, script="export_sidespins", out=args.out,
+                           throttle=throttle.summary() if throttle else None)
+
+if __name__ == "__main__":
+    main()
@@ -13,29 +13,111 @@ Environment variables:
 Optional flags:
   --create-db           Create database if it doesn't exist
   --throughput 400      Throughput for new containers (ignored for autoscale accounts)
+  --metrics-json PATH   Write request charge/latency per phase and container to PATH
+  --ru-budget 200       Throttle writes to this many RU/s, backing off on 429s
+  --boost-ru 4000       Raise the containers' throughput to this many RU/s for the import,
+                        restoring the original values afterwards (skipped on serverless)
+  --workers 8           Partitions written concurrently
+  --bulk-mode           Turn indexing off during the load, then restore the policies and
+                        wait for the re-index (filtered queries fail while it is off)
+
+Documents are validated before anything is written, then grouped by partition key
+value and written as transactional batches. Groups that do not depend on each
+other (e.g. Divisions and Players) load at the same time.
+
+--seed also takes newline-delimited JSON (.ndjson or .jsonl, optionally gzipped as
+.ndjson.gz), one document per line tagged with its container:
+  {"container": "Players", "doc": {"id": "p_12345", ...}}
+NDJSON seeds are streamed from disk (once to validate, then once per dependency
+wave) with bounded buffering, so memory stays flat regardless of file size.
+
+--seed also takes a snapshot written by export_sidespins.py (its directory or its
+manifest.json); document counts are checked against the manifest before loading.
 """
 import os
+import sys
+import gzip
 import json
+import time
 import argparse
-from typing import Dict, Any, List
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, Any, Iterator, List, Tuple
 from azure.cosmos import CosmosClient, PartitionKey, exceptions
 
+# The write throttle and throughput boost are shared with the TeamsIngest importers
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Tools", "TeamsIngest"))
+from cosmos_metrics import CosmosMetrics
+from cosmos_throttle import RuThrottle
+from cosmos_throughput import boosted_throughput
+
+def indexing_policy(excluded=(), composites=()) -> Dict[str, Any]:
+    """Index every path except `excluded` subtrees, plus composite indexes given as [(path, order), ...]."""
+    return {
+        "indexingMode": "consistent",
+        "automatic": True,
+        "includedPaths": [{"path": "/*"}],
+        "excludedPaths": [{"path": p} for p in excluded] + [{"path": '/"_etag"/?'}],
+        "compositeIndexes": [[{"path": p, "order": o} for p, o in c] for c in composites],
+    }
+
+# Bulky subtrees that are never filtered on are excluded, so writes don't pay to index them.
+# Composite indexes cover the multi-property filters of the Functions API and the importers.
 CONTAINER_SPECS = {
-    "Divisions":      {"partition_key": "/id",          "indexing_policy": None},
-    "Teams":          {"partition_key": "/divisionId",  "indexing_policy": None},
-    "Players":        {"partition_key": "/id",          "indexing_policy": None},
-    "TeamMemberships":{"partition_key": "/teamId",      "indexing_policy": None},
-    "TeamMatches":    {"partition_key": "/divisionId",  "indexing_policy": None},
-    "Sessions":       {"partition_key": "/divisionId",  "indexing_policy": None},
-    "Observations":   {"partition_key": "/id",          "indexing_policy": None},
-    "Notes":          {"partition_key": "/observationId", "indexing_policy": None},
+    "Divisions":      {"partition_key": "/id",          "indexing_policy": indexing_policy()},
+    "Teams":          {"partition_key": "/divisionId",  "indexing_policy": indexing_policy(
+        composites=[[("/divisionId", "ascending"), ("/activeSessionId", "ascending")]])},
+    "Players":        {"partition_key": "/id",          "indexing_policy": indexing_policy(
+        composites=[[("/type", "ascending"), ("/authUserId", "ascending")]])},
+    "TeamMemberships":{"partition_key": "/teamId",      "indexing_policy": indexing_policy(
+        composites=[[("/playerId", "ascending"), ("/teamId", "ascending")]])},
+    "TeamMatches":    {"partition_key": "/divisionId",  "indexing_policy": indexing_policy(
+        excluded=["/lineupPlan/*", "/playerMatches/*"],
+        composites=[[("/divisionId", "ascending"), ("/sessionId", "ascending"), ("/week", "ascending")]])},
+    "Sessions":       {"partition_key": "/divisionId",  "indexing_policy": indexing_policy(
+        composites=[[("/divisionId", "ascending"), ("/isActive", "ascending")]])},
+    "Observations":   {"partition_key": "/id",          "indexing_policy": indexing_policy(
+        excluded=["/recordingParts/*"],
+        composites=[[("/type", "ascending"), ("/startTime", "descending")]])},
+    "Notes":          {"partition_key": "/observationId", "indexing_policy": indexing_policy(excluded=["/text/?"])},
+}
+
+# Seed groups and the groups they reference; a group loads once its dependencies are in
+DEPENDS_ON = {
+    "Divisions":       [],
+    "Players":         [],
+    "Sessions":        ["Divisions"],
+    "Teams":           ["Divisions", "Players"],
+    "TeamMemberships": ["Teams", "Players"],
+    "TeamMatches":     ["Teams", "Sessions"],
+    "Observations":    [],
+    "Notes":           ["Observations"],
 }
 
+# export_sidespins.py snapshots: manifest.json next to the NDJSON files it lists
+MANIFEST_NAME = "manifest.json"
+MANIFEST_FORMAT = "sidespins-ndjson/1"
+
+# Cosmos DB allows at most 100 operations in one transactional batch
+MAX_BATCH_OPERATIONS = 100
+
+# Documents held in partition buffers before all of them are flushed as (smaller) batches
+MAX_BUFFERED_DOCS = 10000
+
 def get_args():
     p = argparse.ArgumentParser()
-    p.add_argument("--seed", required=True, help="Path to seed_sidespins.json")
+    p.add_argument("--seed", required=True,
+                   help="Path to seed_sidespins.json, an NDJSON seed (.ndjson/.jsonl, optionally .gz) "
+                        "or an export_sidespins.py snapshot (directory or manifest.json)")
     p.add_argument("--create-db", action="store_true", help="Create database if not exists")
     p.add_argument("--throughput", type=int, default=400, help="Throughput for new containers (RU/s)")
+    p.add_argument("--metrics-json", help="Write request charge/latency metrics to this JSON file")
+    p.add_argument("--ru-budget", type=float, help="Throttle writes to this many RU/s (default: no throttle)")
+    p.add_argument("--boost-ru", type=int, help="Raise container throughput to this many RU/s during the import")
+    p.add_argument("--workers", type=int, default=8, help="Partitions written concurrently (default: 8)")
+    p.add_argument("--bulk-mode", action="store_true",
+                   help="Turn indexing off while loading, then restore it and wait for the re-index")
     return p.parse_args()
 
 def get_required_env(name: str) -> str:
@@ -57,11 +139,35 @@ def ensure_database(client: CosmosClient, db_name: str, create: bool):
         print(f"[+] Creating database: {db_name}")
         return client.create_database_if_not_exists(id=db_name)
 
-def ensure_container(db, name: str, spec: Dict[str, Any], throughput: int):
+def _policy_key(policy: Dict[str, Any]):
+    """Comparable form of an indexing policy, ignoring the defaults Cosmos DB fills in."""
+    policy = policy or {}
+    paths = lambda key: sorted(p["path"] for p in policy.get(key) or [] if p["path"] != '/"_etag"/?')
+    composites = sorted(json.dumps([[c["path"], c.get("order", "ascending")] for c in index])
+                        for index in policy.get("compositeIndexes") or [])
+    return (str(policy.get("indexingMode", "consistent")).lower(), policy.get("automatic", True),
+            paths("includedPaths"), paths("excludedPaths"), composites)
+
+def replace_indexing_policy(db, container, properties: Dict[str, Any], policy: Dict[str, Any]):
+    """Replace a container's indexing policy, keeping the rest of its settings."""
+    return db.replace_container(
+        container,
+        partition_key=PartitionKey(path=properties["partitionKey"]["paths"][0]),
+        indexing_policy=policy,
+        default_ttl=properties.get("defaultTtl"),
+        conflict_resolution_policy=properties.get("conflictResolutionPolicy"),
+    )
+
+def ensure_container(db, name: str, spec: Dict[str, Any], throughput: int, metrics: CosmosMetrics):
     try:
         container = db.get_container_client(name)
-        _ = container.read()
+        properties = metrics.call("lookup", name, container.read)
         print(f"[ok] Using container: {name}")
+        # Reconcile the indexing policy; Cosmos DB re-indexes in the background
+        policy = spec["indexing_policy"]
+        if policy and _policy_key(properties.get("indexingPolicy")) != _policy_key(policy):
+            print(f"[~] Updating indexing policy: {name}")
+            replace_indexing_policy(db, container, properties, policy)
         return container
     except exceptions.CosmosResourceNotFoundError:
         # Try with throughput first (provisioned/autoscale scenarios)
@@ -70,6 +176,7 @@ def ensure_container(db, name: str, spec: Dict[str, Any], throughput: int):
             return db.create_container(
                 id=name,
                 partition_key=PartitionKey(path=spec["partition_key"]),
+                indexing_policy=spec["indexing_policy"],
                 offer_throughput=throughput
             )
         except exceptions.CosmosHttpResponseError as e:
@@ -79,24 +186,281 @@ def ensure_container(db, name: str, spec: Dict[str, Any], throughput: int):
                 print(f"[~] Serverless detected. Retrying container create without throughput: {name}")
                 return db.create_container(
                     id=name,
-                    partition_key=PartitionKey(path=spec["partition_key"]) 
+                    partition_key=PartitionKey(path=spec["partition_key"]),
+                    indexing_policy=spec["indexing_policy"]
                 )
             raise
 
-def upsert_all(container, docs: List[Dict[str, Any]], pk_path: str):
-    count = 0
-    for d in docs:
-        # Minimal guard: ensure partition key field is present
-        pk_field = pk_path.lstrip("/")
-        if pk_field not in d:
-            # Special-case for /id: ensure id exists
-            if pk_field == "id" and "id" in d:
-                pass
-            else:
-                raise ValueError(f"Document missing partition key field '{pk_field}': {d.get('id', '<no id>')}")
-        container.upsert_item(d)
-        count += 1
-    print(f"[upserted] {count:>3} docs into {container.container_link.split('/')[-1]}")
+def index_progress(container) -> int:
+    """Percentage of the container's index transformation that is done (100 when idle)."""
+    container.read(populate_quota_info=True)
+    headers = container.client_connection.last_response_headers or {}
+    progress = headers.get("x-ms-documentdb-collection-index-transformation-progress")
+    return int(float(progress)) if progress else 100
+
+def wait_for_index(containers: Dict[str, Any], poll_seconds: float = 5.0):
+    """Poll until every container's index transformation has finished, printing progress."""
+    pending = dict(containers)
+    while pending:
+        progress = {name: index_progress(container) for name, container in pending.items()}
+        print("[index] " + "  ".join(f"{name} {pct}%" for name, pct in progress.items()), flush=True)
+        pending = {name: pending[name] for name, pct in progress.items() if pct < 100}
+        if pending:
+            time.sleep(poll_seconds)
+
+@contextlib.contextmanager
+def indexing_off(db, containers: Dict[str, Any]):
+    """
+    --bulk-mode: turn indexing off on the containers being loaded, then put their
+    CONTAINER_SPECS policies back and follow the re-index. Policies are restored on
+    errors and Ctrl-C too; one that fails to restore is reconciled by the next run.
+    """
+    paused = []
+    try:
+        for name, container in containers.items():
+            replace_indexing_policy(db, container, container.read(), {"indexingMode": "none", "automatic": False})
+            paused.append(name)
+            print(f"[bulk] Indexing off: {name}")
+        yield
+    finally:
+        for name in paused:
+            try:
+                replace_indexing_policy(db, containers[name], containers[name].read(),
+                                        CONTAINER_SPECS[name]["indexing_policy"])
+                print(f"[bulk] Indexing restored: {name}")
+            except Exception as e:
+                print(f"[!] Could not restore the indexing policy of {name}: {e}. Rerun to reconcile it.")
+    # Only reached when the load succeeded; Ctrl-C while waiting leaves the re-index running
+    wait_for_index({name: containers[name] for name in paused})
+
+def open_seed(path: str):
+    """Open a seed file as text, transparently decompressing gzip."""
+    with open(path, "rb") as f:
+        gzipped = f.read(2) == b"\x1f\x8b"
+    return gzip.open(path, "rt", encoding="utf-8") if gzipped else open(path, "r", encoding="utf-8")
+
+def is_ndjson(path: str) -> bool:
+    return os.path.splitext(path[:-3] if path.endswith(".gz") else path)[1] in (".ndjson", ".jsonl")
+
+def json_records(seed: Dict[str, List[Dict[str, Any]]], groups=None) -> Iterator[Tuple[str, str, Any]]:
+    """(where, group, doc) for each document of a seed_sidespins.json-style dict."""
+    for group in groups or DEPENDS_ON:
+        for i, d in enumerate(seed.get(group) or []):
+            yield f"{group}[{i}]", group, d
+
+def ndjson_records(path: str, groups=None) -> Iterator[Tuple[str, str, Any]]:
+    """(where, group, doc) for each {"container": ..., "doc": {...}} line, streamed from disk."""
+    with open_seed(path) as f:
+        for n, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise SystemExit(f"{path} line {n}: invalid JSON ({e.msg})")
+            if not isinstance(record, dict):
+                record = {}
+            if groups is None or record.get("container") in groups:
+                yield f"line {n} {record.get('container')}", record.get("container"), record.get("doc")
+
+def is_manifest(path: str) -> bool:
+    return os.path.isdir(path) or os.path.basename(path) == MANIFEST_NAME
+
+def read_manifest(path: str) -> Tuple[str, Dict[str, Any]]:
+    """(directory, manifest) of an export_sidespins.py snapshot, given the directory or its manifest.json."""
+    if os.path.isdir(path):
+        path = os.path.join(path, MANIFEST_NAME)
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != MANIFEST_FORMAT:
+        raise SystemExit(f"{path}: not an export_sidespins.py manifest (format {manifest.get('format')!r})")
+    return os.path.dirname(path), manifest
+
+def manifest_records(path: str, groups=None) -> Iterator[Tuple[str, str, Any]]:
+    """(where, group, doc) for each document of a snapshot; files of other groups are not opened."""
+    base, manifest = read_manifest(path)
+    for entry in manifest["files"]:
+        if groups is None or entry["container"] in groups:
+            for where, group, doc in ndjson_records(os.path.join(base, entry["path"]), groups):
+                yield f"{entry['path']} {where}", group, doc
+
+def validate_records(records, check_duplicates: bool = True) -> Tuple[List[str], Dict[str, int]]:
+    """
+    Check every document before any write: a known container, an id and its partition key.
+    Duplicate ids within a partition are only reported when check_duplicates is set, since
+    that needs every key in memory; otherwise the last one wins, as with sequential upserts.
+
+    Returns:
+        (errors, document count per group)
+    """
+    errors, counts, seen = [], {}, set()
+    for where, group, d in records:
+        if group not in DEPENDS_ON:
+            errors.append(f"{where}: unknown container")
+            continue
+        if not isinstance(d, dict):
+            errors.append(f"{where}: not a document")
+            continue
+        label = f"{where} ({d.get('id', '<no id>')})"
+        pk_field = CONTAINER_SPECS[group]["partition_key"].lstrip("/")
+        if not d.get("id"):
+            errors.append(f"{label}: missing id")
+        elif pk_field not in d:
+            errors.append(f"{label}: missing partition key field '{pk_field}'")
+        elif check_duplicates and (group, json.dumps(d[pk_field]), d["id"]) in seen:
+            errors.append(f"{label}: duplicate id in partition {d[pk_field]!r}")
+        else:
+            if check_duplicates:
+                seen.add((group, json.dumps(d[pk_field]), d["id"]))
+            counts[group] = counts.get(group, 0) + 1
+    return errors, counts
+
+def write_batch(container, pk, docs: List[Dict[str, Any]], metrics: CosmosMetrics, throttle: RuThrottle = None):
+    """Upsert one partition's chunk: a single upsert for one document, a transactional batch otherwise."""
+    if len(docs) == 1:
+        call = ("upsert", container.id, container.upsert_item, docs[0])
+    else:
+        operations = [("upsert", (d,), {}) for d in docs]
+        call = ("batch", container.id, container.execute_item_batch, operations, pk)
+    try:
+        if throttle:
+            throttle.call(metrics.call, *call)
+        else:
+            metrics.call(*call)
+    except exceptions.CosmosBatchOperationError as e:
+        raise RuntimeError(
+            f"Batch into {container.id} (pk={pk!r}) failed at {docs[e.error_index]['id']}: {e.message}"
+        ) from e
+
+class Progress:
+    """Live docs/sec and RU/sec while the loader runs."""
+
+    def __init__(self, total: int, metrics: CosmosMetrics):
+        self.total = total
+        self.metrics = metrics
+        self.docs = 0
+        self.lock = threading.Lock()
+        self.start = self.printed = time.monotonic()
+        # Rewrite one line on a terminal, log a line every 10 s otherwise
+        self.tty = sys.stdout.isatty()
+        self.open_line = False
+
+    def line(self) -> str:
+        elapsed = max(time.monotonic() - self.start, 1e-6)
+        return (f"[progress] {self.docs}/{self.total} docs  {self.docs / elapsed:.1f} docs/s  "
+                f"{self.metrics.total_charge / elapsed:.1f} RU/s  {elapsed:.1f} s")
+
+    def add(self, docs: int):
+        with self.lock:
+            self.docs += docs
+            now = time.monotonic()
+            if now - self.printed >= (0.5 if self.tty else 10):
+                self.printed = now
+                if self.tty:
+                    print("\r" + self.line(), end="", flush=True)
+                    self.open_line = True
+                else:
+                    print(self.line(), flush=True)
+
+    def note(self, message: str):
+        with self.lock:
+            print(("\n" if self.open_line else "") + message)
+            self.open_line = False
+
+    def done(self):
+        print(("\r" if self.open_line else "") + self.line())
+
+def load_waves(groups: List[str]) -> List[List[str]]:
+    """Split groups into waves whose groups only depend on earlier waves."""
+    waves, loaded, pending = [], set(), list(groups)
+    while pending:
+        wave = [g for g in pending if all(dep in loaded or dep not in groups for dep in DEPENDS_ON[g])]
+        waves.append(wave)
+        loaded.update(wave)
+        pending = [g for g in pending if g not in loaded]
+    return waves
+
+def bulk_load(containers, records, counts: Dict[str, int], metrics: CosmosMetrics, throttle: RuThrottle = None,
+              workers: int = 8, write=write_batch):
+    """
+    Load the seed wave by wave, writing up to `workers` partitions at a time.
+
+    records(groups) yields (where, group, doc) for those groups and is read once per wave.
+    Documents are buffered per partition until a full batch (or MAX_BUFFERED_DOCS overall)
+    and at most 2 * workers batches are in flight, so memory stays flat for any seed size.
+    Batches of the same partition are written one after another in the order they were
+    submitted, so when an id repeats in the seed its last record is the one stored.
+    write(container, pk, docs, metrics, throttle) stores one batch (default: upserts).
+    """
+    groups = [g for g in DEPENDS_ON if counts.get(g)]
+    progress = Progress(sum(counts[g] for g in groups), metrics)
+    in_flight = max(1, workers) * 2
+    slots = threading.BoundedSemaphore(in_flight)
+    failures = []
+    # (group, partition key) -> the partition's last submitted batch, while it runs
+    tails: Dict[Tuple[str, str], Any] = {}
+    tails_lock = threading.Lock()
+
+    def run(previous, container, pk, docs: List[Dict[str, Any]]):
+        # The pool takes work in submission order, so previous is running or done by now
+        if previous is not None:
+            wait([previous])
+            if previous.exception():
+                return
+        write(container, pk, docs, metrics, throttle)
+
+    def finished(future, key: Tuple[str, str], docs: int):
+        with tails_lock:
+            if tails.get(key) is future:
+                del tails[key]
+        if future.exception():
+            failures.append(future.exception())
+        else:
+            progress.add(docs)
+        slots.release()
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        def submit(group: str, pk, docs: Dict[str, Dict[str, Any]]):
+            slots.acquire()
+            key = (group, json.dumps(pk))
+            with tails_lock:
+                future = executor.submit(run, tails.get(key), containers[group], pk, list(docs.values()))
+                tails[key] = future
+            future.add_done_callback(lambda f, n=len(docs): finished(f, key, n))
+
+        for wave in load_waves(groups):
+            # (group, partition key) -> (partition key value, {id: doc}); a repeated id replaces the earlier doc
+            buffers: Dict[Tuple[str, str], Tuple[Any, Dict[str, Dict[str, Any]]]] = {}
+            buffered = 0
+            for _, group, d in records(wave):
+                if failures:
+                    break
+                pk = d[CONTAINER_SPECS[group]["partition_key"].lstrip("/")]
+                key = (group, json.dumps(pk))
+                docs = buffers.setdefault(key, (pk, {}))[1]
+                buffered += d["id"] not in docs
+                docs[d["id"]] = d
+                if len(docs) == MAX_BATCH_OPERATIONS:
+                    submit(group, pk, buffers.pop(key)[1])
+                    buffered -= MAX_BATCH_OPERATIONS
+                elif buffered >= MAX_BUFFERED_DOCS:
+                    for (g, _), (p, ds) in buffers.items():
+                        submit(g, p, ds)
+                    buffers, buffered = {}, 0
+            for (g, _), (p, ds) in buffers.items():
+                if failures:
+                    break
+                submit(g, p, ds)
+            # Holding every slot means every batch of the wave has finished
+            for _ in range(in_flight):
+                slots.acquire()
+            for _ in range(in_flight):
+                slots.release()
+            if failures:
+                raise failures[0]
+            for g in wave:
+                progress.note(f"[upserted] {counts[g]:>3} docs into {g}")
+    progress.done()
 
 def main():
     args = get_args()
@@ -104,27 +468,54 @@ def main():
     key = get_required_env("COSMOS_KEY")
     dbname = get_required_env("COSMOS_DB")
 
-    with open(args.seed, "r", encoding="utf-8") as f:
-        seed = json.load(f)
+    # NDJSON seeds and snapshots are streamed from disk on every pass; JSON seeds are loaded once
+    if is_manifest(args.seed):
+        records = lambda groups=None: manifest_records(args.seed, groups)
+        errors, counts = validate_records(records(), check_duplicates=False)
+        expected = {name: c["count"] for name, c in read_manifest(args.seed)[1]["containers"].items() if c["count"]}
+        if counts != expected:
+            errors.append(f"document counts {counts} do not match the manifest {expected}")
+    elif is_ndjson(args.seed):
+        records = lambda groups=None: ndjson_records(args.seed, groups)
+        errors, counts = validate_records(records(), check_duplicates=False)
+    else:
+        with open_seed(args.seed) as f:
+            seed = json.load(f)
+        records = lambda groups=None: json_records(seed, groups)
+        errors, counts = validate_records(records())
+
+    # Nothing is written unless every document is valid
+    if errors:
+        shown = errors[:20] + ([f"... and {len(errors) - 20} more"] if len(errors) > 20 else [])
+        raise SystemExit("Seed validation failed:\n  " + "\n  ".join(shown))
+    print(f"[ok] Validated {sum(counts.values())} documents")
+    for group in DEPENDS_ON:
+        if not counts.get(group):
+            print(f"[skip] No '{group}' in seed")
 
     client = CosmosClient(uri, key)
     db = ensure_database(client, dbname, create=args.create_db)
+    metrics = CosmosMetrics()
+    throttle = RuThrottle(args.ru_budget) if args.ru_budget else None
 
     # Ensure containers
     containers = {}
     for name, spec in CONTAINER_SPECS.items():
-        containers[name] = ensure_container(db, name, spec, args.throughput)
+        containers[name] = ensure_container(db, name, spec, args.throughput, metrics)
 
-    # Upsert groups in an order that satisfies references
-    order = ["Divisions", "Sessions", "Players", "Teams", "TeamMemberships", "TeamMatches"]
-    for group in order:
-        if group not in seed:
-            print(f"[skip] No '{group}' in seed")
-            continue
-        docs = seed[group]
-        upsert_all(containers[group], docs, CONTAINER_SPECS[group]["partition_key"])
+    # Upsert groups in waves that satisfy references
+    loaded = {group: containers[group] for group in DEPENDS_ON if counts.get(group)}
+    with boosted_throughput(loaded.values(), args.boost_ru):
+        with indexing_off(db, loaded) if args.bulk_mode else contextlib.nullcontext():
+            bulk_load(containers, records, counts, metrics, throttle, args.workers)
 
-    print("\nDone. Tip: check RU charges in Insights logs or enable diagnostics on containers.")
+    print("\nDone.")
+    metrics.print_summary()
+    if throttle:
+        throttle.print_stats()
+    if args.metrics_json:
+        metrics.write_json(args.metrics_json, script="import_cosmos_sidespins", seed=args.seed,
+                           throttle=throttle.summary() if throttle else None)
 
 if __name__ == "__main__":
     main()
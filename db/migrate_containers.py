@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+migrate_containers.py
+Checks every container in CONTAINER_SPECS and migrates ones with the wrong partition key.
+
+Usage:
+  python migrate_containers.py check [--fix-indexing]
+  python migrate_containers.py migrate --container Sessions
+  python migrate_containers.py migrate --container Sessions --swap --writes-stopped
+
+Environment variables:
+  COSMOS_URI, COSMOS_KEY, COSMOS_DB (as for import_cosmos_sidespins.py)
+
+check
+  Reads every container concurrently and compares its partition key and indexing
+  policy with CONTAINER_SPECS. --fix-indexing replaces drifted indexing policies in
+  place (Cosmos DB re-indexes online). Exits with status 1 if a container is missing
+  or has the wrong partition key.
+
+migrate
+  A partition key cannot be changed, so the container is copied:
+    1. <name>-migrating is created with the right partition key and indexing policy.
+    2. The change feed is read from the beginning and written to it in parallel
+       transactional batches (--workers), then read again from where it stopped
+       until no changes are left.
+    3. Document counts and content checksums of both containers are compared.
+       Documents deleted from the source meanwhile are removed from the copy.
+  The app keeps using the original container while it is copied, and a copy can be
+  refreshed by running migrate again.
+
+  The Functions app has the container names built in and Cosmos DB has no container
+  rename, so switching to the copy means replacing the original: --swap deletes it,
+  recreates it with the right key (and its throughput) and copies the verified
+  documents back. This takes the container offline, so --swap only runs with
+  --writes-stopped, after the app has been stopped (e.g. az functionapp stop), and
+  the copy is caught up and verified once more before anything is deleted. The
+  original throughput is printed before the delete. If the copy back is
+  interrupted, <name>-migrating is kept and rerunning the same command resumes it
+  (documents already copied back are skipped); pass the printed --throughput if
+  <name> still has to be recreated. Start the app again once the swap reports the
+  counts match. While <name>-migrating exists, migrate does not report <name> as
+  done.
+Optional flags:
+  --throughput 400      Throughput for the -migrating container, and for <name> when a
+                        resumed swap recreates it (RU/s)
+  --ru-budget 400       Throttle copy reads and writes to this many RU/s
+  --workers 8           Partitions written concurrently
+  --keep-staging        Keep <name>-migrating after a swap
+"""
+import json
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional, Set, Tuple
+from azure.cosmos import CosmosClient, ThroughputProperties, exceptions
+
+from import_cosmos_sidespins import (
+    CONTAINER_SPECS, RuThrottle, _policy_key, bulk_load, ensure_container, get_required_env,
+    replace_indexing_policy,
+)
+# Tools/TeamsIngest is on sys.path once import_cosmos_sidespins is imported
+from cosmos_metrics import CosmosMetrics
+from cosmos_throughput import is_serverless_error
+
+# Properties Cosmos DB sets on every document; not copied and not checksummed
+SYSTEM_PROPERTIES = ("_rid", "_self", "_etag", "_attachments", "_ts", "_lsn")
+
+# Catch-up reads of the change feed before giving up on a quiet source
+MAX_CATCH_UP_ROUNDS = 10
+
+def staging_name(name: str) -> str:
+    return f"{name}-migrating"
+
+def strip_system(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in doc.items() if k not in SYSTEM_PROPERTIES}
+
+def check_container(db, name: str, spec: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        props = db.get_container_client(name).read()
+    except exceptions.CosmosResourceNotFoundError:
+        return {"name": name, "exists": False}
+    return {
+        "name": name,
+        "exists": True,
+        "properties": props,
+        "partitionKey": props["partitionKey"]["paths"],
+        "keyOk": props["partitionKey"]["paths"] == [spec["partition_key"]],
+        "indexingOk": _policy_key(props.get("indexingPolicy")) == _policy_key(spec["indexing_policy"]),
+    }
+
+def check(db, fix_indexing: bool) -> bool:
+    """Check every container concurrently; returns whether all exist with the right partition key."""
+    with ThreadPoolExecutor(max_workers=len(CONTAINER_SPECS)) as executor:
+        results = list(executor.map(lambda item: check_container(db, *item), CONTAINER_SPECS.items()))
+    healthy = True
+    for r in results:
+        name, spec = r["name"], CONTAINER_SPECS[r["name"]]
+        if not r["exists"]:
+            healthy = False
+            print(f"[missing] {name}: run import_cosmos_sidespins.py --create-db to create it")
+        elif not r["keyOk"]:
+            healthy = False
+            print(f"[!] {name}: partition key {r['partitionKey']}, expected {spec['partition_key']} "
+                  f"-> python migrate_containers.py migrate --container {name}")
+        elif not r["indexingOk"]:
+            if fix_indexing:
+                replace_indexing_policy(db, db.get_container_client(name), r["properties"], spec["indexing_policy"])
+                print(f"[~] {name}: indexing policy updated (re-indexing online)")
+            else:
+                print(f"[~] {name}: indexing policy differs from CONTAINER_SPECS (--fix-indexing to update it)")
+        else:
+            print(f"[ok] {name}: {spec['partition_key']}, indexing policy up to date")
+    return healthy
+
+class ChangeFeed:
+    """
+    A container's change feed, read from the beginning and then from where the previous read stopped.
+
+    The SDK derives the pager's continuation token from its client's last response
+    headers, so the container must belong to a client nothing else uses.
+    """
+
+    def __init__(self, container, group: str):
+        self.container = container
+        self.group = group
+        self.continuation = None
+
+    def records(self, groups=None) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        """(where, group, doc) records for bulk_load(); deletes are not in the change feed."""
+        kwargs = {"continuation": self.continuation} if self.continuation else {"start_time": "Beginning"}
+        pager = self.container.query_items_change_feed(**kwargs).by_page()
+        for page in pager:
+            for doc in page:
+                yield "change feed", self.group, strip_system(doc)
+        self.continuation = pager.continuation_token
+
+def read_pages(container, metrics: CosmosMetrics, throttle: Optional[RuThrottle], query: str = "SELECT * FROM c",
+               feed_range: Dict[str, Any] = None, page_size: int = 1000) -> Iterator[List[Dict[str, Any]]]:
+    """
+    A query's results a page at a time, each page one call through metrics and the throttle.
+
+    Every page is a new query from the previous page's continuation token, so a 429 the
+    SDK gave up on is retried from that page. Without feed_range the container's feed
+    ranges are read one after another.
+    """
+    for rng in [feed_range] if feed_range is not None else container.read_feed_ranges():
+        state = {"continuation": None}
+
+        def fetch(**hooks):
+            pager = container.query_items(query, feed_range=rng, max_item_count=page_size, **hooks)
+            pages = pager.by_page(state["continuation"])
+            page = list(next(pages, []))
+            state["continuation"] = pages.continuation_token
+            return page
+
+        while True:
+            if throttle:
+                yield throttle.call(metrics.call, "lookup", container.id, fetch)
+            else:
+                yield metrics.call("lookup", container.id, fetch)
+            if not state["continuation"]:
+                break
+
+def count(container) -> int:
+    return list(container.query_items("SELECT VALUE COUNT(1) FROM c", enable_cross_partition_query=True))[0]
+
+def doc_checksum(doc: Dict[str, Any]) -> int:
+    """Checksum of a document without system properties; sums of these mod 2**64 are order-independent."""
+    body = json.dumps(strip_system(doc), sort_keys=True, separators=(",", ":"), default=str)
+    return int.from_bytes(hashlib.sha256(body.encode("utf-8")).digest()[:8], "big")
+
+def fingerprint(container, metrics: CosmosMetrics, throttle: Optional[RuThrottle]) -> Tuple[int, int]:
+    """(document count, order-independent checksum of the documents without system properties)"""
+    total, checksum = 0, 0
+    for page in read_pages(container, metrics, throttle):
+        for doc in page:
+            checksum = (checksum + doc_checksum(doc)) % 2**64
+        total += len(page)
+    return total, checksum
+
+def keys(container, pk_field: str, metrics: CosmosMetrics, throttle: Optional[RuThrottle]) -> Set[Tuple[str, str]]:
+    query = f"SELECT c.id, c[\"{pk_field}\"] AS pk FROM c"
+    return {(json.dumps(r.get("pk")), r["id"]) for page in read_pages(container, metrics, throttle, query) for r in page}
+
+def verify(source, target, metrics: CosmosMetrics, throttle: Optional[RuThrottle]) -> bool:
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        (n_source, sum_source), (n_target, sum_target) = executor.map(
+            lambda c: fingerprint(c, metrics, throttle), (source, target))
+    match = (n_source, sum_source) == (n_target, sum_target)
+    print(f"[verify] {source.id}: {n_source} docs {sum_source:016x}  {target.id}: {n_target} docs {sum_target:016x}"
+          f"  {'match' if match else 'MISMATCH'}")
+    return match
+
+def catch_up(feed: ChangeFeed, name: str, staging, metrics: CosmosMetrics, throttle: Optional[RuThrottle], workers: int):
+    """Copy changes until a read of the change feed comes back empty."""
+    for _ in range(MAX_CATCH_UP_ROUNDS):
+        changes = list(feed.records())
+        print(f"[catch-up] {len(changes)} changed docs")
+        if not changes:
+            return
+        bulk_load({name: staging}, lambda groups: iter(changes), {name: len(changes)}, metrics, throttle, workers)
+    print(f"[~] {name} is still changing after {MAX_CATCH_UP_ROUNDS} catch-up reads")
+
+def copy_and_verify(source, feed: ChangeFeed, name: str, staging, metrics: CosmosMetrics,
+                    throttle: Optional[RuThrottle], workers: int, attempts: int = 3) -> bool:
+    """Catch up and verify; documents deleted from the source are deleted from the copy."""
+    pk_field = CONTAINER_SPECS[name]["partition_key"].lstrip("/")
+    for _ in range(attempts):
+        catch_up(feed, name, staging, metrics, throttle, workers)
+        if verify(source, staging, metrics, throttle):
+            return True
+        gone = keys(staging, pk_field, metrics, throttle) - keys(source, pk_field, metrics, throttle)
+        for pk, doc_id in gone:
+            staging.delete_item(doc_id, partition_key=json.loads(pk))
+        if gone:
+            print(f"[~] Removed {len(gone)} docs deleted from {name} since they were copied")
+    return False
+
+def create_missing(container, pk, docs, metrics: CosmosMetrics, throttle: RuThrottle = None):
+    """bulk_load() writer for the swap: create documents, skipping ones an interrupted swap already copied."""
+    call = (lambda *args: throttle.call(metrics.call, *args)) if throttle else metrics.call
+    if len(docs) > 1:
+        try:
+            call("batch", container.id, container.execute_item_batch, [("create", (d,), {}) for d in docs], pk)
+            return
+        except exceptions.CosmosBatchOperationError as e:
+            if e.operation_responses[e.error_index].get("statusCode") != 409:
+                raise
+    for d in docs:
+        try:
+            call("create", container.id, container.create_item, d)
+        except exceptions.CosmosResourceExistsError:
+            pass
+
+def current_throughput(container):
+    """The container's own throughput to recreate it with, or None (serverless/shared)."""
+    try:
+        t = container.get_throughput()
+    except exceptions.CosmosHttpResponseError as e:
+        if is_serverless_error(e) or e.status_code == 404:
+            return None
+        raise
+    if t.auto_scale_max_throughput:
+        return ThroughputProperties(auto_scale_max_throughput=t.auto_scale_max_throughput)
+    return t.offer_throughput
+
+def describe_throughput(throughput) -> str:
+    if throughput is None:
+        return "shared or serverless"
+    if isinstance(throughput, ThroughputProperties):
+        return f"autoscale max {throughput.auto_scale_max_throughput} RU/s"
+    return f"{throughput} RU/s"
+
+def resume_flags(throughput) -> str:
+    """The --throughput a resumed swap needs to recreate the container as it was."""
+    if throughput is None:
+        return ""
+    if isinstance(throughput, ThroughputProperties):
+        return (f" (the container is recreated with --throughput; set autoscale max "
+                f"{throughput.auto_scale_max_throughput} RU/s again in the Azure portal)")
+    return f" --throughput {throughput}"
+
+def copy_back(db, name: str, spec: Dict[str, Any], staging, throughput, metrics: CosmosMetrics,
+              throttle: Optional[RuThrottle], workers: int):
+    """Create name with the right partition key (if missing) and copy the staging documents into it."""
+    target = ensure_container(db, name, spec, throughput, metrics)
+    n = count(staging)
+    records = lambda groups: (("copy", name, strip_system(d)) for page in read_pages(staging, metrics, throttle)
+                              for d in page)
+    bulk_load({name: target}, records, {name: n}, metrics, throttle, workers, write=create_missing)
+    copied = count(target)
+    if copied != n:
+        raise SystemExit(f"{name} has {copied} of {n} documents; {staging.id} is kept. "
+                         f"Rerun with --swap --writes-stopped to resume.")
+    print(f"[ok] {name} recreated with {copied} docs. Start the app again.")
+
+def migrate(reader_db, db, name: str, args, metrics: CosmosMetrics, throttle: Optional[RuThrottle]):
+    spec = CONTAINER_SPECS[name]
+    if args.swap and not args.writes_stopped:
+        raise SystemExit(f"--swap deletes and recreates {name}, so the app must not write to it meanwhile. "
+                         f"Stop the Functions app and rerun with --swap --writes-stopped.")
+    status = check_container(db, name, spec)
+    staging_status = check_container(db, staging_name(name), spec)
+    copy = staging_status["exists"] and staging_status["keyOk"]
+    if not status["exists"] or status["keyOk"]:
+        # An interrupted swap: the original was deleted (and maybe recreated); the verified copy is complete
+        if args.swap and copy:
+            state = "has the new partition key" if status["exists"] else f"is missing (recreating it at {args.throughput} RU/s)"
+            print(f"[~] {name} {state} and {staging_status['name']} exists: resuming the copy back")
+            copy_back(db, name, spec, db.get_container_client(staging_status["name"]), args.throughput,
+                      metrics, throttle, args.workers)
+            if not args.keep_staging:
+                db.delete_container(staging_status["name"])
+                print(f"[-] Deleted {staging_status['name']}")
+            return
+        if not status["exists"]:
+            raise SystemExit(f"{name} does not exist; run import_cosmos_sidespins.py --create-db")
+        if copy:
+            raise SystemExit(f"{name} has partition key {spec['partition_key']} but {staging_status['name']} "
+                             f"still exists, so a swap may not have finished copying back. Rerun with "
+                             f"--swap --writes-stopped to finish it, or delete {staging_status['name']}.")
+        print(f"[ok] {name} already has partition key {spec['partition_key']}")
+        return
+
+    # The copy needs every document to carry the new partition key
+    source = db.get_container_client(name)
+    pk_field = spec["partition_key"].lstrip("/")
+    missing = list(source.query_items(f"SELECT TOP 5 VALUE c.id FROM c WHERE NOT IS_DEFINED(c[\"{pk_field}\"])",
+                                      enable_cross_partition_query=True))
+    if missing:
+        raise SystemExit(f"Documents in {name} lack '{pk_field}' (e.g. {missing}); fix them before migrating")
+
+    if staging_status["exists"] and not staging_status["keyOk"]:
+        raise SystemExit(f"{staging_status['name']} exists with another partition key; delete it and rerun")
+    staging = ensure_container(db, staging_name(name), spec, args.throughput, metrics)
+
+    print(f"[copy] {name} {status['partitionKey']} -> {staging.id} [{spec['partition_key']}]")
+    feed = ChangeFeed(reader_db.get_container_client(name), name)
+    bulk_load({name: staging}, feed.records, {name: count(source)}, metrics, throttle, args.workers)
+    if not copy_and_verify(source, feed, name, staging, metrics, throttle, args.workers):
+        raise SystemExit(f"{staging.id} does not match {name}; rerun once writes settle")
+    if not args.swap:
+        print(f"[ok] {staging.id} is in sync with {name}. Stop the app and rerun with --swap --writes-stopped "
+              f"to replace {name} with it.")
+        return
+
+    # Writes are stopped and the copy verified: replace the original from it
+    throughput = current_throughput(source)
+    print(f"[swap] {name} throughput: {describe_throughput(throughput)}. If the swap is interrupted, "
+          f"resume it with --swap --writes-stopped{resume_flags(throughput)}.")
+    print(f"[swap] Recreating {name} with partition key {spec['partition_key']}")
+    db.delete_container(name)
+    copy_back(db, name, spec, staging, throughput, metrics, throttle, args.workers)
+    if not args.keep_staging:
+        db.delete_container(staging.id)
+        print(f"[-] Deleted {staging.id}")
+
+def get_args():
+    p = argparse.ArgumentParser(description="Check containers against CONTAINER_SPECS and migrate partition keys")
+    sub = p.add_subparsers(dest="command", required=True)
+    c = sub.add_parser("check", help="Check partition keys and indexing policies of every container")
+    c.add_argument("--fix-indexing", action="store_true", help="Replace indexing policies that differ")
+    m = sub.add_parser("migrate", help="Copy a container to the right partition key (--swap to replace it)")
+    m.add_argument("--container", required=True, choices=list(CONTAINER_SPECS))
+    m.add_argument("--swap", action="store_true",
+                   help="Delete the container and recreate it from the verified copy (takes it offline)")
+    m.add_argument("--writes-stopped", action="store_true",
+                   help="Confirm the app is stopped and nothing writes to the container (required by --swap)")
+    m.add_argument("--keep-staging", action="store_true", help="Keep the -migrating container after --swap")
+    m.add_argument("--throughput", type=int, default=400, help="Throughput for the -migrating container (RU/s)")
+    m.add_argument("--ru-budget", type=float, help="Throttle copy reads and writes to this many RU/s (default: no throttle)")
+    m.add_argument("--workers", type=int, default=8, help="Partitions written concurrently (default: 8)")
+    return p.parse_args()
+
+def main():
+    args = get_args()
+    uri = get_required_env("COSMOS_URI")
+    key = get_required_env("COSMOS_KEY")
+    dbname = get_required_env("COSMOS_DB")
+    db = CosmosClient(uri, key).get_database_client(dbname)
+
+    if args.command == "check":
+        if not check(db, args.fix_indexing):
+            raise SystemExit(1)
+        return
+
+    # The change feed gets a client of its own: its continuation comes from the client's last response
+    reader_db = CosmosClient(uri, key).get_database_client(dbname)
+    metrics = CosmosMetrics()
+    throttle = RuThrottle(args.ru_budget) if args.ru_budget else None
+    migrate(reader_db, db, args.container, args, metrics, throttle)
+    metrics.print_summary()
+    if throttle:
+        throttle.print_stats()
+
+if __name__ == "__main__":
+    main()